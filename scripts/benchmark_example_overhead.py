@@ -0,0 +1,65 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+"""Measure how much time @given spends per example on top of running the
+test itself, using a test which does nothing.
+
+Usage: PYTHONPATH=src python scripts/benchmark_example_overhead.py [examples]
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import sys
+import time
+
+from hypothesis import given, Settings
+from hypothesis.strategies import integers
+
+
+def best_time(f, repeats=5):
+    best = float(u'inf')
+    for _ in range(repeats):
+        start = time.time()
+        f()
+        best = min(best, time.time() - start)
+    return best
+
+
+def main(examples):
+    calls = [0]
+    settings = Settings(
+        max_examples=examples, max_iterations=examples * 10, timeout=-1,
+        database=None,
+    )
+
+    def trivial(x):
+        calls[0] += 1
+
+    test = given(integers(), settings=settings)(trivial)
+    test()
+    runs = calls[0]
+    calls[0] = 0
+
+    given_time = best_time(test)
+    direct_time = best_time(lambda: [trivial(i) for i in range(runs)])
+    print(u'%d examples per run' % (runs,))
+    print(u'per example with @given: %8.1fus' % (given_time / runs * 1e6,))
+    print(u'per call of the test:    %8.1fus' % (direct_time / runs * 1e6,))
+
+
+if __name__ == u'__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
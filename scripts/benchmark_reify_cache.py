@@ -0,0 +1,76 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+"""Compare how long it takes to shrink collections of expensive mapped values
+with and without map(..., pure=True).
+
+Usage: PYTHONPATH=src python scripts/benchmark_reify_cache.py [runs]
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import sys
+import time
+from random import Random
+
+from hypothesis import find, Settings
+from hypothesis.strategies import lists, tuples, integers, \
+    fixed_dictionaries
+
+
+def expensive(n):
+    # Stand in for building an ORM object or parsing a document.
+    total = 0
+    for i in range(2000):
+        total += i * n
+    return (n, total)
+
+
+def candidates(pure):
+    element = integers().map(expensive, pure=pure)
+    return [
+        (u'tuples', tuples(*[element] * 10),
+         lambda x: sum(v[0] for v in x) >= 100),
+        (u'lists', lists(element, min_size=10),
+         lambda x: len(x) >= 10 and sum(v[0] for v in x) >= 100),
+        (u'fixed_dictionaries', fixed_dictionaries(
+            dict((u'k%d' % (i,), element) for i in range(10))),
+         lambda x: sum(v[0] for v in x.values()) >= 100),
+    ]
+
+
+def time_find(strategy, condition, seed):
+    settings = Settings(
+        database=None, max_examples=1000, max_shrinks=5000, timeout=-1)
+    start = time.time()
+    find(strategy, condition, settings=settings, random=Random(seed))
+    return time.time() - start
+
+
+def main(runs):
+    impure = candidates(False)
+    pure = candidates(True)
+    print(u'%-20s %10s %10s %8s' % (u'strategy', u'impure', u'pure', u'ratio'))
+    for (name, s, f), (_, t, g) in zip(impure, pure):
+        before = sum(time_find(s, f, seed) for seed in range(runs))
+        after = sum(time_find(t, g, seed) for seed in range(runs))
+        print(u'%-20s %9.3fs %9.3fs %7.2fx' % (
+            name, before, after, before / after))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,114 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+"""Measure how many steps per second stateful testing can execute, both when
+drawing fresh programs and when replaying a recorded one as the shrinker
+does, using state machines whose steps do almost nothing.
+
+Usage: PYTHONPATH=src python scripts/benchmark_stateful.py [steps]
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import sys
+import time
+
+from hypothesis.stateful import Bundle, StateMachineRunner, \
+    GenericStateMachine, RuleBasedStateMachine, rule
+from hypothesis.strategies import just, lists, tuples, integers
+
+
+class Rules(RuleBasedStateMachine):
+    values = Bundle(u'values')
+    pairs = Bundle(u'pairs')
+
+    @rule(target=values, x=integers())
+    def value(self, x):
+        return x
+
+    @rule(target=pairs, x=values, y=lists(integers()))
+    def pair(self, x, y):
+        return (x, y)
+
+    @rule(x=values, y=pairs)
+    def use(self, x, y):
+        pass
+
+    @rule(x=pairs)
+    def use_pair(self, x):
+        pass
+
+
+GENERIC_STEPS = tuples(just(u'push'), integers()) | just((u'pop', None))
+
+
+class Generic(GenericStateMachine):
+
+    def __init__(self):
+        self.stack = []
+
+    def steps(self):
+        return GENERIC_STEPS
+
+    def execute_step(self, step):
+        if step[0] == u'push':
+            self.stack.append(step[1])
+        elif self.stack:
+            self.stack.pop()
+
+
+def best_time(f, repeats=5):
+    best = float(u'inf')
+    for _ in range(repeats):
+        start = time.time()
+        f()
+        best = min(best, time.time() - start)
+    return best
+
+
+def steps_per_second(machine, steps, runs=20):
+    runners = [StateMachineRunner(i, i, steps) for i in range(runs)]
+
+    def fresh():
+        for runner in runners:
+            StateMachineRunner(
+                runner.parameter_seed, runner.template_seed, steps,
+            ).run(machine())
+
+    def replay():
+        for runner in runners:
+            StateMachineRunner(
+                runner.parameter_seed, runner.template_seed, steps,
+                record=runner.record,
+            ).run(machine())
+
+    for runner in runners:
+        runner.run(machine())
+    total = steps * runs
+    return total / best_time(fresh), total / best_time(replay)
+
+
+def main(steps):
+    for machine in (Rules, Generic):
+        fresh, replay = steps_per_second(machine, steps)
+        print(u'%-8s fresh: %8.0f steps/s  replay: %8.0f steps/s' % (
+            machine.__name__, fresh, replay,
+        ))
+
+
+if __name__ == u'__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -21,7 +21,7 @@ import traceback
 from hypothesis.errors import CleanupFailed, InvalidArgument, \
     UnsatisfiedAssumption
 from hypothesis.reporting import report
-from hypothesis.internal.compat import text_type
+from hypothesis.internal.compat import text_type, integer_types
 from hypothesis.utils.dynamicvariables import DynamicVariable
 
 
@@ -57,11 +57,19 @@ class BuildContext(object):
         self.close_on_capture = close_on_capture
         self.captured = False
         self.close_on_del = False
+        self.targets = {}
 
     def mark_captured(self):
         self.captured = True
 
+    def reusable(self):
+        """Can this context be used again for another example once it has
+        exited? This is only safe if nothing registered cleanup with it or
+        captured it, as otherwise the next example would see its state."""
+        return not (self.tasks or self.captured or self.close_on_del)
+
     def __enter__(self):
+        self.targets = {}
         self.assign_variable = _current_build_context.with_value(self)
         self.assign_variable.__enter__()
         return self
@@ -123,3 +131,31 @@ def note(value):
             u'Cannot make notes outside of build context')
     if context.is_final:
         report(value)
+
+
+def target(score, label=u''):
+    """Tell Hypothesis how good the current example is at something you want
+    to find the worst case of, e.g. how long it took or how big a queue got.
+
+    Once it has seen some scores, Hypothesis will spend part of its budget
+    hill climbing from the highest scoring examples, looking for ones that
+    score higher still. If you want more than one thing maximised, give each
+    its own label. Returns score.
+
+    """
+    if isinstance(score, bool) or not isinstance(
+        score, integer_types + (float,)
+    ):
+        raise InvalidArgument(
+            u'target() needs an int or float score but got %r' % (score,))
+    if score != score:
+        raise InvalidArgument(u'Cannot target a score of NaN')
+    context = _current_build_context.value
+    if context is None:
+        raise InvalidArgument(
+            u'Cannot call target() outside of build context')
+    if label in context.targets:
+        raise InvalidArgument(
+            u'target() was called more than once with label %r' % (label,))
+    context.targets[label] = score
+    return score
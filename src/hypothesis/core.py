@@ -19,31 +19,44 @@
 
 from __future__ import division, print_function, absolute_import
 
+import copy
 import math
 import time
+import hashlib
 import inspect
 import binascii
 import functools
 import traceback
 from random import Random
-from itertools import islice
-from collections import namedtuple
+from itertools import chain, islice
+from collections import deque, namedtuple
 
 from hypothesis.errors import Flaky, Timeout, NoSuchExample, \
-    Unsatisfiable, BadTemplateDraw, InvalidArgument, \
+    Unsatisfiable, BadTemplateDraw, InvalidArgument, DeadlineExceeded, \
     UnsatisfiedAssumption, DefinitelyNoSuchExample
 from hypothesis.control import BuildContext
 from hypothesis.settings import Settings, Verbosity, note_deprecation
-from hypothesis.executors import executor
+from hypothesis.executors import executor, default_executor
 from hypothesis.reporting import report, debug_report, verbose_report, \
     current_verbosity
 from hypothesis.internal.compat import qualname, getargspec, \
     unicode_safe_repr
-from hypothesis.internal.tracker import Tracker
+from hypothesis.internal.corpus import CoverageCorpus
+from hypothesis.internal.tracker import Tracker, OutcomeCache, value_key
+from hypothesis.internal.targeting import TargetScores, hill_climb
 from hypothesis.internal.reflection import arg_string, impersonate, \
     copy_argspec, function_digest, fully_qualified_name, \
     convert_positional_arguments, get_pretty_function_description
 from hypothesis.internal.examplesource import ParameterSource
+from hypothesis.internal.slowexamples import SlowExamples
+from hypothesis.internal.simplifierstats import SimplifierStats
+from hypothesis.executors.coroutines import event_loop_for, \
+    with_event_loop, run_on_event_loop, is_coroutine_function
+
+
+#: How often, in seconds, the simplest example found so far is saved to the
+#: database while shrinking, so that an interrupted run can resume from it.
+SHRINK_CHECKPOINT_INTERVAL = 1.0
 
 
 def time_to_call_it_a_day(settings, start_time):
@@ -53,9 +66,47 @@ def time_to_call_it_a_day(settings, start_time):
     return time.time() >= start_time + settings.timeout
 
 
+def time_to_stop_shrinking(settings, shrink_start_time):
+    """Have we exceeded our budget for shrinking?"""
+    if settings.shrink_timeout <= 0:
+        return False
+    return time.time() >= shrink_start_time + settings.shrink_timeout
+
+
+def prefetching(templates, condition):
+    """Iterate over templates, first passing each one to condition.prefetch
+    along with the ones that come after it, up to condition.prefetch_size of
+    them.
+
+    This lets a condition which can evaluate several templates at once (e.g.
+    in parallel subprocesses) get started on templates before they are
+    needed. If condition has no prefetch method this is just templates, so
+    they are not drawn any earlier than they otherwise would be.
+
+    """
+    prefetch = getattr(condition, u'prefetch', None)
+    if prefetch is None:
+        return templates
+    return _prefetching(iter(templates), prefetch, condition.prefetch_size)
+
+
+def _prefetching(templates, prefetch, size):
+    upcoming = deque()
+    while True:
+        while len(upcoming) < size:
+            try:
+                upcoming.append(next(templates))
+            except StopIteration:
+                break
+        if not upcoming:
+            return
+        prefetch(list(upcoming))
+        yield upcoming.popleft()
+
+
 def find_satisfying_template(
     search_strategy, random, condition, tracker, settings, storage=None,
-    max_parameter_tries=None,
+    max_parameter_tries=None, targets=None, corpus=None,
 ):
     """Attempt to find a template for search_strategy such that condition is
     truthy.
@@ -68,6 +119,14 @@ def find_satisfying_template(
     settings.max_examples examples have been considered or settings.timeout
     seconds have passed (if settings.timeout > 0).
 
+    If targets is a TargetScores which condition records scores in, then
+    once any have been recorded half the examples are spent hill climbing
+    from the highest scoring templates rather than drawing new ones.
+
+    If corpus is a CoverageCorpus which condition records coverage in, the
+    templates it has saved are tried first, and new templates are often
+    derived from the ones in it rather than drawn.
+
     May raise a variety of exceptions depending on exact circumstances, but
     these will all subclass either Unsatisfiable (to indicate not enough
     examples were found which did not raise UnsatisfiedAssumption to consider
@@ -114,36 +173,90 @@ def find_satisfying_template(
     else:
         assert isinstance(search_strategy.template_upper_bound, int)
 
-    for parameter in parameter_source:  # pragma: no branch
-        if len(tracker) >= search_strategy.template_upper_bound:
-            break
-        if examples_considered >= max_iterations:
-            break
-        if satisfying_examples >= max_examples:
-            break
-        if time_to_call_it_a_day(settings, start_time):
-            break
-        examples_considered += 1
+    # These are lists so that draw_templates can update them.
+    examples_considered = [examples_considered]
+    satisfying = [satisfying_examples]
 
-        try:
-            example = search_strategy.draw_template(
-                random, parameter
-            )
-        except BadTemplateDraw:
-            debug_report(u'Failed attempt to draw a template')
-            parameter_source.mark_bad()
-            continue
-        if tracker.track(example) > 1:
-            debug_report(u'Skipping duplicate example')
-            parameter_source.mark_bad()
-            continue
+    def corpus_templates():
+        if corpus is None:
+            return
+        for example in corpus.stored_templates():
+            if examples_considered[0] >= max_iterations:
+                break
+            if time_to_call_it_a_day(settings, start_time):
+                break
+            examples_considered[0] += 1
+            if tracker.track(example) > 1:
+                continue
+            yield example
+
+    def draw_templates():
+        for parameter in parameter_source:  # pragma: no branch
+            if len(tracker) >= search_strategy.template_upper_bound:
+                break
+            if examples_considered[0] >= max_iterations:
+                break
+            if satisfying[0] >= max_examples:
+                break
+            if targets and satisfying[0] >= max_examples // 2:
+                break
+            if time_to_call_it_a_day(settings, start_time):
+                break
+            examples_considered[0] += 1
+
+            example = None
+            if corpus is not None:
+                example = corpus.derive(random)
+            # Templates derived from the corpus say nothing about how good
+            # the current parameter is.
+            derived = example is not None
+            if not derived:
+                try:
+                    example = search_strategy.draw_template(
+                        random, parameter
+                    )
+                except BadTemplateDraw:
+                    debug_report(u'Failed attempt to draw a template')
+                    parameter_source.mark_bad()
+                    continue
+            if tracker.track(example) > 1:
+                debug_report(u'Skipping duplicate example')
+                if not derived:
+                    parameter_source.mark_bad()
+                continue
+            yield example
+
+    def climb_templates():
+        if not targets:
+            return
+        verbose_report(u'Hill climbing towards higher target scores')
+        for example in hill_climb(search_strategy, random, targets):
+            if examples_considered[0] >= max_iterations:
+                break
+            if satisfying[0] >= max_examples:
+                break
+            if time_to_call_it_a_day(settings, start_time):
+                break
+            examples_considered[0] += 1
+            if tracker.track(example) > 1:
+                continue
+            yield example
+
+    for example in prefetching(
+        chain(corpus_templates(), draw_templates(), climb_templates()),
+        condition
+    ):
         try:
             if condition(example):
                 return example
         except UnsatisfiedAssumption:
-            parameter_source.mark_bad()
+            # When prefetching we may have moved on to another parameter
+            # which has already been marked.
+            if not parameter_source.mark_set:
+                parameter_source.mark_bad()
             continue
-        satisfying_examples += 1
+        satisfying[0] += 1
+    satisfying_examples = satisfying[0]
     run_time = time.time() - start_time
     timed_out = settings.timeout >= 0 and run_time >= settings.timeout
     if (
@@ -190,51 +303,80 @@ def simplify_template_such_that(
     If f throws UnsatisfiedAssumption this will be treated the same as if
     it returned False.
 
+    Stops early if settings.timeout has passed since start_time or
+    settings.shrink_timeout has passed since shrinking began, in which case
+    the last template yielded is the simplest found so far.
+
     """
     assert isinstance(random, Random)
 
     yield t
     successful_shrinks = 0
-
-    changed = True
-    max_warmup = 5
-    warmup = 0
-    while (
-        (changed or warmup < max_warmup) and
-        successful_shrinks < settings.max_shrinks
-    ):
-        changed = False
-        warmup += 1
-        if warmup < max_warmup:
-            debug_report(u'Running warmup simplification round %d' % (
-                warmup
-            ))
-        elif warmup == max_warmup:
-            debug_report(u'Warmup is done. Moving on to fully simplifying')
-
-        any_simplifiers = False
-        for simplify in search_strategy.simplifiers(random, t):
-            debug_report(u'Applying simplification pass %s' % (
-                simplify.__name__,
-            ))
-            any_simplifiers = True
-            any_shrinks = False
-            while True:
-                simpler = simplify(random, t)
-                if warmup < max_warmup:
-                    simpler = islice(simpler, warmup)
-                for s in simpler:
-                    any_shrinks = True
-                    if time_to_call_it_a_day(settings, start_time):
-                        return
-                    if tracker.track(s) > 1:
-                        debug_report(
-                            u'Skipping simplifying to duplicate %s' % (
-                                unicode_safe_repr(s),
-                            ))
-                        continue
-                    try:
-                        if f(s):
+    shrink_start_time = time.time()
+    stats = SimplifierStats()
+    try:
+        changed = True
+        skip_failing = True
+        max_warmup = 5
+        warmup = 0
+        while (
+            (changed or warmup < max_warmup) and
+            successful_shrinks < settings.max_shrinks
+        ):
+            changed = False
+            skipped_any = False
+            warmup += 1
+            if warmup < max_warmup:
+                debug_report(u'Running warmup simplification round %d' % (
+                    warmup
+                ))
+            elif warmup == max_warmup:
+                debug_report(
+                    u'Warmup is done. Moving on to fully simplifying')
+
+            any_simplifiers = False
+            for simplify in search_strategy.simplifiers(random, t):
+                any_simplifiers = True
+                key = stats.key(simplify)
+                if skip_failing and stats.should_skip(key):
+                    debug_report(u'Skipping unproductive pass %s' % (
+                        simplify.__name__,
+                    ))
+                    skipped_any = True
+                    continue
+                debug_report(u'Applying simplification pass %s' % (
+                    simplify.__name__,
+                ))
+                any_shrinks = False
+                while True:
+                    simpler = simplify(random, t)
+                    if warmup < max_warmup:
+                        simpler = islice(simpler, warmup)
+                    for s in prefetching(simpler, f):
+                        any_shrinks = True
+                        if time_to_call_it_a_day(settings, start_time):
+                            return
+                        if time_to_stop_shrinking(settings, shrink_start_time):
+                            verbose_report((
+                                u'Ran out of time for shrinking after %d '
+                                u'shrinks. Reporting the simplest example so '
+                                u'far.'
+                            ) % (successful_shrinks,))
+                            return
+                        if tracker.track(s) > 1:
+                            debug_report(
+                                u'Skipping simplifying to duplicate %s' % (
+                                    unicode_safe_repr(s),
+                                ))
+                            continue
+                        attempt_start = time.time()
+                        try:
+                            success = f(s)
+                        except UnsatisfiedAssumption:
+                            success = False
+                        stats.record(
+                            key, success, time.time() - attempt_start)
+                        if success:
                             successful_shrinks += 1
                             changed = True
                             yield s
@@ -242,24 +384,46 @@ def simplify_template_such_that(
                             break
                         else:
                             yield t
-                    except UnsatisfiedAssumption:
-                        pass
-                else:
+                    else:
+                        break
+                if not any_shrinks:
+                    debug_report(u'No shrinks possible')
+                if successful_shrinks >= settings.max_shrinks:
                     break
-            if not any_shrinks:
-                debug_report(u'No shrinks possible')
-            if successful_shrinks >= settings.max_shrinks:
+            if not any_simplifiers:
+                debug_report(u'No simplifiers for template %s' % (
+                    unicode_safe_repr(t),
+                ))
                 break
-        if not any_simplifiers:
-            debug_report(u'No simplifiers for template %s' % (
-                unicode_safe_repr(t),
+            # Passes are only skipped while other passes are still making
+            # progress, so we always finish on a round that tries every one.
+            skip_failing = changed or not skipped_any
+            if not skip_failing:
+                debug_report(u'Retrying skipped passes before finishing')
+                changed = True
+    finally:
+        if stats.attempts:
+            verbose_report(lambda: u'Simplification passes:\n%s' % (
+                stats.describe_statistics(),
             ))
-            break
+
+
+def save_checkpoint(storage, search_strategy, template, previous):
+    """Save template as the simplest example found so far, replacing the
+    previous checkpoint (if any) so that they don't accumulate in the
+    database. Returns template for use as the next previous checkpoint."""
+    storage.save(template, search_strategy)
+    if previous is not None and (
+        search_strategy.to_basic(previous) !=
+        search_strategy.to_basic(template)
+    ):
+        storage.delete(previous, search_strategy)
+    return template
 
 
 def best_satisfying_template(
     search_strategy, random, condition, settings, storage, tracker=None,
-    max_parameter_tries=None,
+    max_parameter_tries=None, outcome_cache=None, targets=None, corpus=None,
 ):
     """Find and then minimize a satisfying template.
 
@@ -267,25 +431,64 @@ def best_satisfying_template(
     one. May throw all the exceptions of find_satisfying_template. Once
     an example has been found it will be further minimized.
 
+    If condition consults an OutcomeCache, passing it as outcome_cache will
+    report how useful it was.
+
+    Templates which were fully simplified are marked as minimal in storage,
+    and will not be simplified again if found there on a later run.
+
     """
     if tracker is None:
         tracker = Tracker()
     start_time = time.time()
 
-    successful_shrinks = -1
+    successful_shrinks = 0
+    checkpoint = None
+    checkpoint_time = None
     with settings:
-        satisfying_example = find_satisfying_template(
-            search_strategy, random, condition, tracker, settings, storage,
-            max_parameter_tries=max_parameter_tries,
-        )
-        for simpler in simplify_template_such_that(
-            search_strategy, random, satisfying_example, condition, tracker,
-            settings, start_time,
-        ):
-            successful_shrinks += 1
-            satisfying_example = simpler
+        try:
+            satisfying_example = find_satisfying_template(
+                search_strategy, random, condition, tracker, settings,
+                storage, max_parameter_tries=max_parameter_tries,
+                targets=targets, corpus=corpus,
+            )
+            if storage is not None and storage.is_minimal(
+                satisfying_example, search_strategy
+            ):
+                verbose_report(
+                    u'Example is already known to be minimal. Not shrinking.')
+                return satisfying_example
+            shrink_start_time = time.time()
+            for simpler in simplify_template_such_that(
+                search_strategy, random, satisfying_example, condition,
+                tracker, settings, start_time,
+            ):
+                # Unsuccessful shrinks yield the current template again.
+                if simpler is not satisfying_example:
+                    successful_shrinks += 1
+                satisfying_example = simpler
+                if storage is not None and (
+                    checkpoint_time is None or
+                    time.time() >= checkpoint_time + SHRINK_CHECKPOINT_INTERVAL
+                ):
+                    checkpoint = save_checkpoint(
+                        storage, search_strategy, satisfying_example,
+                        checkpoint
+                    )
+                    checkpoint_time = time.time()
+        finally:
+            if outcome_cache is not None:
+                debug_report(u'Outcome cache: %s' % (
+                    outcome_cache.describe_statistics(),))
         if storage is not None:
-            storage.save(satisfying_example, search_strategy)
+            save_checkpoint(
+                storage, search_strategy, satisfying_example, checkpoint)
+            if not (
+                successful_shrinks >= settings.max_shrinks or
+                time_to_call_it_a_day(settings, start_time) or
+                time_to_stop_shrinking(settings, shrink_start_time)
+            ):
+                storage.mark_minimal(satisfying_example, search_strategy)
         if not successful_shrinks:
             verbose_report(u'Could not shrink example')
         elif successful_shrinks == 1:
@@ -323,6 +526,29 @@ HypothesisProvided = namedtuple(u'HypothesisProvided', (u'value,'))
 Example = namedtuple(u'Example', (u'args', u'kwargs'))
 
 
+def given_fingerprint(
+    test, arguments, argument_strategies, kwargs, kwarg_strategies
+):
+    """A digest of what the examples for a test given arguments depend on,
+    which is stable from one run to the next.
+
+    Explicit arguments such as self may have reprs that aren't, so only the
+    strategies for generated arguments are included. Their reprs don't show
+    the bodies of lambdas, but the test's source does.
+
+    """
+    hasher = hashlib.md5(function_digest(test))
+    for i, v in enumerate(arguments):
+        if isinstance(v, HypothesisProvided):
+            hasher.update((u'%d=%r' % (
+                i, argument_strategies[i])).encode(u'utf-8'))
+    for k in sorted(kwargs):
+        if isinstance(kwargs[k], HypothesisProvided):
+            hasher.update((u'%s=%r' % (
+                k, kwarg_strategies[k])).encode(u'utf-8'))
+    return hasher.digest()
+
+
 def example(*args, **kwargs):
     """Add an explicit example called with these args and kwargs to the
     test."""
@@ -343,15 +569,88 @@ def example(*args, **kwargs):
     return accept
 
 
+#: How much longer than the deadline an example has to take to count as a
+#: failure other than on its final run, so that an example which only just
+#: exceeded it then doesn't fail to reproduce.
+DEADLINE_SLACK = 1.25
+
+
+def check_deadline(runtime, deadline, is_final):
+    """Raise DeadlineExceeded if runtime, in seconds, is over deadline, in
+    milliseconds."""
+    if not deadline or deadline <= 0:
+        return
+    allowed = deadline if is_final else deadline * DEADLINE_SLACK
+    if runtime * 1000 > allowed:
+        raise DeadlineExceeded((
+            u'Test took %.2fms, which exceeds the deadline of %.2fms'
+        ) % (runtime * 1000, deadline))
+
+
+#: Outcomes recorded in an OutcomeCache for examples that did not fail. An
+#: example that failed is recorded as the exception it raised.
+PASSED = u'passed'
+REJECTED = u'rejected'
+
+
+def without_traceback(exception):
+    """Returns a copy of exception which doesn't hold on to the traceback
+    (and so every frame and local) of where it was raised, or None if it
+    can't be copied."""
+    try:
+        return copy.copy(exception)
+    except Exception:
+        return None
+
+
 def reify_and_execute(
     search_strategy, template, test,
     print_example=False, always_print=False, record_repr=None,
-    is_final=False,
+    is_final=False, outcome_cache=None, argspec=None, build_context=None,
+    deadline=None, timings=None, targets=None, corpus=None,
 ):
+    """Returns a function which reifies template and calls test with the
+    result.
+
+    argspec may be test's argspec, to save recalculating it for every
+    example. build_context may be a function returning the BuildContext to
+    use, so that callers running many examples can reuse one.
+
+    If deadline is set, calls to test which take longer than that many
+    milliseconds fail with DeadlineExceeded. The time each call takes is
+    recorded in timings if it is a SlowExamples, and any scores the test
+    passes to target() are recorded in targets if it is a TargetScores.
+    If corpus is a CoverageCorpus, calls it chooses to trace are recorded
+    in it. Those calls are slowed down by tracing, so they aren't timed.
+
+    """
+    def call_test(context, args, kwargs, text_version):
+        traced = corpus is not None and corpus.should_trace(template)
+        start = time.time()
+        if traced:
+            result = corpus.run(test, *args, **kwargs)
+        else:
+            result = test(*args, **kwargs)
+        runtime = time.time() - start
+        if targets is not None and context.targets:
+            targets.record(template, context.targets, u'%s(%s)' % (
+                test.__name__, text_version))
+        if traced:
+            corpus.record(template)
+            return result
+        if timings is not None:
+            timings.record(runtime, u'%s(%s)' % (test.__name__, text_version))
+        check_deadline(runtime, deadline, is_final)
+        return result
+
     def run():
-        with BuildContext(is_final=is_final):
+        if build_context is None:
+            context = BuildContext(is_final=is_final)
+        else:
+            context = build_context()
+        with context:
             args, kwargs = search_strategy.reify(template)
-            text_version = arg_string(test, args, kwargs)
+            text_version = arg_string(test, args, kwargs, argspec)
             if print_example:
                 report(
                     lambda: u'Falsifying example: %s(%s)' % (
@@ -362,7 +661,41 @@ def reify_and_execute(
                         test.__name__, text_version))
             if record_repr is not None:
                 record_repr[0] = text_version
-            return test(*args, **kwargs)
+            if outcome_cache is None:
+                return call_test(context, args, kwargs, text_version)
+            cache_key = outcome_cache.key((args, kwargs))
+            outcome = outcome_cache.lookup(cache_key)
+            if outcome is PASSED:
+                return
+            elif outcome is REJECTED:
+                raise UnsatisfiedAssumption()
+            elif outcome is not None:
+                # Raising the recorded exception itself would attach a
+                # traceback to it, which it would then keep.
+                raise without_traceback(outcome)
+            try:
+                result = call_test(context, args, kwargs, text_version)
+            except UnsatisfiedAssumption:
+                outcome_cache.record(cache_key, REJECTED)
+                raise
+            except Exception as e:
+                recorded = without_traceback(e)
+                if recorded is not None:
+                    outcome_cache.record(cache_key, recorded)
+                raise
+            outcome_cache.record(cache_key, PASSED)
+            return result
+    # Enough to rebuild this example in another process which has its own
+    # copies of search_strategy and test, e.g. a forked worker.
+    run.search_strategy = search_strategy
+    run.test = test
+    run.template = template
+    run.options = {
+        u'print_example': print_example,
+        u'always_print': always_print,
+        u'is_final': is_final,
+        u'deadline': deadline,
+    }
     return run
 
 
@@ -403,6 +736,9 @@ def given(*generator_arguments, **generator_kwargs):
             random = provided_random or Random()
 
         original_argspec = getargspec(test)
+        is_coroutine = is_coroutine_function(test)
+        if is_coroutine:
+            test = run_on_event_loop(test)
         if generator_arguments and original_argspec.varargs:
             raise InvalidArgument(
                 u'varargs are not supported with positional arguments to '
@@ -483,6 +819,11 @@ def given(*generator_arguments, **generator_kwargs):
             if isinstance(selfy, HypothesisProvided):
                 selfy = None
             test_runner = executor(selfy)
+            if is_coroutine:
+                # All examples, including the ones run while shrinking, get
+                # run on the same loop.
+                test_runner = with_event_loop(
+                    test_runner, event_loop_for(selfy))
 
             for example in getattr(
                 wrapped_test, u'hypothesis_explicit_examples', ()
@@ -527,31 +868,93 @@ def given(*generator_arguments, **generator_kwargs):
                 else:
                     return sd.just(v)
 
+            argument_strategies = list(map(convert_to_specifier, arguments))
+            kwarg_strategies = dict(
+                (k, convert_to_specifier(v)) for (k, v) in kwargs.items())
             given_specifier = sd.tuples(
-                sd.tuples(*map(convert_to_specifier, arguments)),
-                sd.fixed_dictionaries(dict(
-                    (k, convert_to_specifier(v)) for (k, v) in kwargs.items()))
+                sd.tuples(*argument_strategies),
+                sd.fixed_dictionaries(kwarg_strategies)
             )
 
             search_strategy = strategy(given_specifier, settings)
 
             if settings.database:
                 storage = settings.database.storage(
-                    fully_qualified_name(test))
+                    fully_qualified_name(test),
+                    fingerprint=given_fingerprint(
+                        test, arguments, argument_strategies,
+                        kwargs, kwarg_strategies,
+                    ),
+                )
             else:
                 storage = None
 
             last_exception = [None]
             repr_for_last_exception = [None]
 
+            # Arguments which were passed in explicitly are the same for
+            # every example, so only the generated ones go into the key.
+            generated_args = [
+                i for i, v in enumerate(arguments)
+                if isinstance(v, HypothesisProvided)
+            ]
+            generated_kwargs = sorted(
+                k for k, v in kwargs.items()
+                if isinstance(v, HypothesisProvided)
+            )
+
+            def generated_value_key(example):
+                args, kwargs = example
+                return value_key((
+                    [args[i] for i in generated_args],
+                    [kwargs[k] for k in generated_kwargs],
+                ))
+
+            outcome_cache = OutcomeCache(key=generated_value_key)
+
+            # Most examples don't register any cleanup, so rather than
+            # creating a new BuildContext for each one we keep using the
+            # same one until something makes it unsafe to.
+            build_contexts = [BuildContext()]
+
+            def build_context():
+                if not build_contexts[0].reusable():
+                    build_contexts[0] = BuildContext()
+                return build_contexts[0]
+
+            slow_examples = SlowExamples()
+            targets = TargetScores()
+            corpus = None
+            if settings.coverage_guided:
+                corpus = CoverageCorpus(
+                    search_strategy, Random(random.getrandbits(64)),
+                    settings.coverage_packages or (test.__module__,),
+                    storage=settings.database and settings.database.storage(
+                        fully_qualified_name(test) + u'.corpus'),
+                )
+
+            def example_for(xs, record_repr=None):
+                return reify_and_execute(
+                    search_strategy, xs, test,
+                    always_print=settings.max_shrinks <= 0,
+                    record_repr=record_repr,
+                    outcome_cache=outcome_cache,
+                    argspec=original_argspec,
+                    build_context=build_context,
+                    deadline=settings.deadline,
+                    timings=slow_examples,
+                    targets=targets,
+                    corpus=corpus,
+                )
+
             def is_template_example(xs):
                 record_repr = [None]
+                run = example_for(xs, record_repr)
                 try:
-                    test_runner(reify_and_execute(
-                        search_strategy, xs, test,
-                        always_print=settings.max_shrinks <= 0,
-                        record_repr=record_repr,
-                    ))
+                    if test_runner is default_executor:
+                        run()
+                    else:
+                        test_runner(run)
                     return False
                 except UnsatisfiedAssumption as e:
                     raise e
@@ -566,21 +969,43 @@ def given(*generator_arguments, **generator_kwargs):
             is_template_example.__name__ = test.__name__
             is_template_example.__qualname__ = qualname(test)
 
+            # Runners which can run several examples at once get told about
+            # examples before we need their results.
+            prefetch_examples = getattr(selfy, u'prefetch_examples', None)
+            if prefetch_examples is not None:
+                is_template_example.prefetch = lambda templates: (
+                    prefetch_examples([example_for(t) for t in templates]))
+                is_template_example.prefetch_size = selfy.prefetch_size
+
             falsifying_template = None
             try:
                 falsifying_template = best_satisfying_template(
                     search_strategy, random, is_template_example,
-                    settings, storage
+                    settings, storage, outcome_cache=outcome_cache,
+                    targets=targets, corpus=corpus,
                 )
             except NoSuchExample:
                 return
+            finally:
+                with settings:
+                    if slow_examples.count:
+                        verbose_report(lambda: u'Slowest runs:\n%s' % (
+                            slow_examples.describe_slowest(),))
+                    if corpus is not None:
+                        verbose_report(u'Coverage: %s' % (
+                            corpus.describe_statistics(),))
+                    if targets:
+                        verbose_report(
+                            lambda: u'Highest target scores:\n%s' % (
+                                targets.describe_best(),))
 
             assert last_exception[0] is not None
 
             with settings:
                 test_runner(reify_and_execute(
                     search_strategy, falsifying_template, test,
-                    print_example=True, is_final=True
+                    print_example=True, is_final=True,
+                    deadline=settings.deadline,
                 ))
 
                 report(
@@ -591,7 +1016,8 @@ def given(*generator_arguments, **generator_kwargs):
                 test_runner(reify_and_execute(
                     search_strategy, falsifying_template,
                     test_is_flaky(test, repr_for_last_exception[0]),
-                    print_example=True, is_final=True
+                    print_example=True, is_final=True,
+                    deadline=settings.deadline,
                 ))
         for attr in dir(test):
             if attr[0] != '_' and not hasattr(wrapped_test, attr):
@@ -620,11 +1046,25 @@ def find(specifier, condition, settings=None, random=None, storage=None):
 
     random = random or Random()
     successful_examples = [0]
+    outcome_cache = OutcomeCache()
+    targets = TargetScores()
 
     def template_condition(template):
-        with BuildContext():
+        with BuildContext() as context:
             result = search.reify(template)
-            success = condition(result)
+            cache_key = outcome_cache.key(result)
+            success = outcome_cache.lookup(cache_key)
+            if success is REJECTED:
+                raise UnsatisfiedAssumption()
+            elif success is None:
+                try:
+                    success = condition(result)
+                except UnsatisfiedAssumption:
+                    outcome_cache.record(cache_key, REJECTED)
+                    raise
+                outcome_cache.record(cache_key, success)
+                if context.targets:
+                    targets.record(template, context.targets, repr(result))
 
         if success:
             successful_examples[0] += 1
@@ -651,7 +1091,7 @@ def find(specifier, condition, settings=None, random=None, storage=None):
         template = best_satisfying_template(
             search, random, template_condition, settings,
             tracker=tracker, max_parameter_tries=2,
-            storage=storage,
+            storage=storage, outcome_cache=outcome_cache, targets=targets,
         )
         with BuildContext(is_final=True, close_on_capture=False):
             return search.reify(template)
@@ -14,11 +14,27 @@
 #
 # END HEADER
 
+from __future__ import division, print_function, absolute_import
+
+import hashlib
+
 from hypothesis.searchstrategy.strategies import BadData
 from hypothesis.database.formats import JSONFormat
 from hypothesis.database.backend import SQLiteBackend
 
 
+# Records that a value is a local minimum are kept alongside the values
+# themselves, wrapped up in a list starting with this marker.
+MINIMAL_MARKER = u'hypothesis:minimal'
+
+
+def is_minimal_record(basic):
+    return (
+        isinstance(basic, list) and len(basic) == 3 and
+        basic[0] == MINIMAL_MARKER
+    )
+
+
 class Storage(object):
 
     """Handles saving and loading examples matching a particular specifier."""
@@ -28,23 +44,60 @@ class Storage(object):
 
     def __init__(
         self, backend, key, format,
-        database
+        database, fingerprint=None,
     ):
         self.database = database
         self.backend = backend
         self.format = format
         self.key = key
+        self.fingerprint = fingerprint
 
     def save(self, value, strategy):
         converted = strategy.to_basic(value)
         serialized = self.format.serialize_basic(converted)
         self.backend.save(self.key, serialized)
 
+    def delete(self, value, strategy):
+        converted = strategy.to_basic(value)
+        serialized = self.format.serialize_basic(converted)
+        self.backend.delete(self.key, serialized)
+        self.backend.delete(self.key, self.minimal_record(value, strategy))
+
+    def minimal_record(self, value, strategy):
+        """Serialized data recording that value could not be simplified any
+        further with this strategy.
+
+        This includes a digest of the storage's fingerprint, or of the
+        strategy's repr if it doesn't have one, so changing the strategy will
+        cause values to be simplified again. The repr isn't always stable
+        between processes (e.g. it may include the address of an object), so
+        callers that know what the values depend on should give a
+        fingerprint.
+
+        """
+        fingerprint = self.fingerprint
+        if fingerprint is None:
+            fingerprint = repr(strategy).encode(u'utf-8')
+        digest = hashlib.md5(fingerprint).hexdigest()
+        return self.format.serialize_basic(
+            [MINIMAL_MARKER, digest, strategy.to_basic(value)])
+
+    def mark_minimal(self, value, strategy):
+        """Record that value is a local minimum for strategy, so there is no
+        point in trying to simplify it again."""
+        self.backend.save(self.key, self.minimal_record(value, strategy))
+
+    def is_minimal(self, value, strategy):
+        record = self.minimal_record(value, strategy)
+        return any(data == record for data in self.backend.fetch(self.key))
+
     def fetch(self, strategy):
         for data in self.backend.fetch(self.key):
             try:
-                yield strategy.from_basic(
-                    self.format.deserialize_data(data))
+                basic = self.format.deserialize_data(data)
+                if is_minimal_record(basic):
+                    continue
+                yield strategy.from_basic(basic)
             except BadData:
                 continue
 
@@ -76,13 +129,19 @@ class ExampleDatabase(object):
                     self.format.data_type(), self.backend.data_type()
                 )))
 
-    def storage(self, key):
-        """Get a storage object corresponding to this specifier."""
+    def storage(self, key, fingerprint=None):
+        """Get a storage object corresponding to this specifier.
+
+        fingerprint is a bytes value identifying what the values stored
+        depend on, used to tell whether they are known to be minimal.
+
+        """
         return Storage(
             key=key,
             database=self,
             backend=self.backend,
             format=self.format,
+            fingerprint=fingerprint,
         )
 
     def close(self):
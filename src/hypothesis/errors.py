@@ -134,6 +134,13 @@ class Timeout(Unsatisfiable):
     of this hypothesis in the amount of time allotted to us."""
 
 
+class DeadlineExceeded(HypothesisException):
+
+    """A call to the test took longer than the deadline setting allows, which
+    Hypothesis treats as a failure so that it can find the simplest input
+    that makes the code under test slow."""
+
+
 class WrongFormat(HypothesisException, ValueError):
 
     """An exception indicating you have attempted to serialize a value that
@@ -38,5 +38,6 @@ between minor versions either.
 
 
 from .executors import executor, default_executor
+from .coroutines import EventLoopExecutor
 
-__all__ = ['executor', 'default_executor']
+__all__ = ['executor', 'default_executor', 'EventLoopExecutor']
@@ -0,0 +1,295 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+"""Support for tests and state machine steps which are asyncio coroutines.
+
+Coroutines are run to completion on an event loop, one at a time unless
+the test's runner is an EventLoopExecutor with a concurrency above one.
+Unless the runner provides its own event_loop, every coroutine is run on
+one loop that is shared by all tests, so there's no cost to creating one
+per example.
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+from hypothesis.control import BuildContext
+from hypothesis.internal.reflection import proxies
+from hypothesis.utils.dynamicvariables import DynamicVariable
+
+try:
+    import asyncio
+except ImportError:  # pragma: no cover
+    asyncio = None
+
+_current_event_loop = DynamicVariable(None)
+_started_example = DynamicVariable(None)
+_shared_event_loop = [None]
+
+
+def is_coroutine_function(function):
+    return asyncio is not None and asyncio.iscoroutinefunction(function)
+
+
+def shared_event_loop():
+    """Returns the event loop used for coroutines when nothing else has
+    asked for a specific one, creating a new one if there isn't one or it
+    has been closed."""
+    loop = _shared_event_loop[0]
+    if loop is None or loop.is_closed():
+        loop = _shared_event_loop[0] = asyncio.new_event_loop()
+    return loop
+
+
+def current_event_loop():
+    return _current_event_loop.value or shared_event_loop()
+
+
+def new_event_loop():
+    """Returns a new event loop, or None if asyncio isn't available. A loop
+    can only be run by one thread at a time, so threads which run
+    coroutines alongside others need one of their own."""
+    return asyncio.new_event_loop() if asyncio is not None else None
+
+
+def event_loop_for(runner):
+    """The event loop to run a test's coroutines on, given the object it is
+    being run for (e.g. a TestCase)."""
+    return getattr(runner, u'event_loop', None) or shared_event_loop()
+
+
+def with_event_loop(execute, loop):
+    """Returns an executor that runs examples with execute, with loop as the
+    loop to run coroutines on."""
+    def accept(function):
+        with _current_event_loop.with_value(loop):
+            return execute(function)
+    return accept
+
+
+def run_coroutine(coroutine):
+    return current_event_loop().run_until_complete(coroutine)
+
+
+def call_on_event_loop(function, *args, **kwargs):
+    """Call function, and if it is a coroutine function run the coroutine it
+    returns to completion on the current event loop."""
+    result = function(*args, **kwargs)
+    if is_coroutine_function(function):
+        result = run_coroutine(result)
+    return result
+
+
+def start_coroutine(coroutine):
+    """Schedule coroutine to run on the current event loop, returning a
+    future for its result."""
+    return asyncio.ensure_future(coroutine, loop=current_event_loop())
+
+
+def when_done(coroutine, callback):
+    """Start coroutine, returning a future for the result of calling
+    callback with what it returns. Cancelling the future cancels the
+    coroutine."""
+    task = start_coroutine(coroutine)
+    done = asyncio.Future(loop=current_event_loop())
+
+    def finished(task):
+        if done.cancelled():
+            return
+        if task.cancelled():
+            done.cancel()
+        elif task.exception() is not None:
+            done.set_exception(task.exception())
+        else:
+            try:
+                done.set_result(callback(task.result()))
+            except Exception as e:
+                done.set_exception(e)
+
+    def cancelled(done):
+        if done.cancelled():
+            task.cancel()
+    task.add_done_callback(finished)
+    done.add_done_callback(cancelled)
+    return done
+
+
+def let_tasks_run():
+    """Run the current event loop for one iteration, so that everything
+    which was ready to run gets to until it next has to wait."""
+    loop = current_event_loop()
+    loop.call_soon(loop.stop)
+    loop.run_forever()
+
+
+def wait_for(futures):
+    loop = current_event_loop()
+    loop.run_until_complete(asyncio.wait(futures, loop=loop))
+
+
+def wait_for_any(futures):
+    """Run the current event loop until at least one of futures is done."""
+    loop = current_event_loop()
+    loop.run_until_complete(asyncio.wait(
+        futures, loop=loop, return_when=asyncio.FIRST_COMPLETED))
+
+
+def run_on_event_loop(test):
+    """Returns a plain function with the same signature as the coroutine
+    function test, which runs it to completion on the current event loop.
+
+    If an EventLoopExecutor has already started running this example, that
+    is waited for instead of starting it again.
+
+    """
+    @proxies(test)
+    def run(*args, **kwargs):
+        started = _started_example.value
+        if started is None:
+            started = test(*args, **kwargs)
+        return current_event_loop().run_until_complete(started)
+    run.hypothesis_coroutine_function = test
+    return run
+
+
+class CoroutineInContext(object):
+
+    """An awaitable which runs coroutine with context as the current build
+    context whenever it is resumed, so that examples interleaved on the
+    same loop each see their own."""
+
+    def __init__(self, coroutine, context):
+        self.context = context
+        self.steps = getattr(coroutine, u'__await__', lambda: coroutine)()
+
+    def __await__(self):
+        return self
+
+    __iter__ = __await__
+
+    def __next__(self):
+        return self.send(None)
+
+    def send(self, value):
+        return self.resume(self.steps.send, value)
+
+    def throw(self, *args):
+        return self.resume(self.steps.throw, *args)
+
+    def resume(self, method, *args):
+        # The coroutine finishing mustn't look like it happened inside
+        # local(), which is a generator.
+        with self.context.local():
+            try:
+                return method(*args)
+            except StopIteration as e:
+                finished = e
+        raise finished
+
+
+def can_start_early(function):
+    """Is function an example of a coroutine test which it's OK to start
+    early? The final run of an example is always done on its own."""
+    return (
+        hasattr(function.test, u'hypothesis_coroutine_function') and
+        not function.options[u'is_final']
+    )
+
+
+class EventLoopExecutor(object):
+
+    """A runner for tests which are coroutines, which runs up to concurrency
+    examples at once on its event loop by starting on examples Hypothesis
+    is going to try next while it waits for the current one.
+
+    Use it as a mixin, e.g. class TestServer(EventLoopExecutor, TestCase).
+    Examples run concurrently must be independent of each other. Those
+    started early are run with arguments of their own, so the ones the
+    test is reported as being called with are equal to but not the same
+    objects. event_loop may be set to use a specific loop rather than the
+    shared one.
+
+    """
+
+    concurrency = 1
+    event_loop = None
+
+    @property
+    def prefetch_size(self):
+        return self.concurrency
+
+    def started_examples(self):
+        """Returns a dict mapping template ids to (template, task,
+        coroutine, context) for examples which have been started but not
+        yet asked for."""
+        started = getattr(self, u'_started_examples', None)
+        if started is None:
+            started = self._started_examples = {}
+        return started
+
+    def prefetch_examples(self, functions):
+        started = self.started_examples()
+        wanted = dict(
+            (id(f.template), f) for f in functions if can_start_early(f))
+        # Anything started that isn't wanted now never will be.
+        for key in list(started):
+            if key not in wanted:
+                self.finish_example(started.pop(key))
+        for key, function in wanted.items():
+            if key not in started:
+                started[key] = self.start_example(function)
+
+    def start_example(self, function):
+        context = BuildContext()
+        with context.local():
+            args, kwargs = function.search_strategy.reify(function.template)
+        coroutine = function.test.hypothesis_coroutine_function(
+            *args, **kwargs)
+        task = asyncio.ensure_future(
+            CoroutineInContext(coroutine, context),
+            loop=event_loop_for(self),
+        )
+        # The template is kept so that its id isn't reused.
+        return (function.template, task, coroutine, context)
+
+    def finish_example(self, started):
+        """Make sure a started example is no longer running and run its
+        cleanup, whether or not anything waited for it."""
+        _, task, coroutine, context = started
+        if not task.done():
+            task.cancel()
+            try:
+                event_loop_for(self).run_until_complete(task)
+            except BaseException:
+                pass
+        # If it was cancelled before it got going nothing else will.
+        coroutine.close()
+        if not task.cancelled():
+            # Otherwise asyncio complains that it was never retrieved.
+            task.exception()
+        context.close()
+
+    def execute_example(self, function):
+        started = None
+        if hasattr(function, u'template') and can_start_early(function):
+            started = self.started_examples().pop(id(function.template), None)
+        if started is None:
+            return function()
+        try:
+            with _started_example.with_value(started[1]):
+                return function()
+        finally:
+            self.finish_example(started)
@@ -42,6 +42,8 @@ class DateTimeTemplate(namedtuple('DateTimeTemplate', (
     'tzinfo'
 ))):
 
+    __slots__ = ()
+
     def replace(self, **kwargs):
         data = list(self)
         for k, v in kwargs.items():
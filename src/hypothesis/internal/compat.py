@@ -79,6 +79,7 @@ if PY3:
     integer_types = (int,)
     hunichr = chr
     from functools import reduce
+    from queue import Queue
 
     def unicode_safe_repr(x):
         return repr(x)
@@ -148,6 +149,7 @@ else:
     integer_types = (int, long)
     hunichr = unichr
     reduce = reduce
+    from Queue import Queue
 
     def escape_unicode_characters(s):
         return codecs.encode(s, 'string_escape')
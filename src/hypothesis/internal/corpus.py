@@ -0,0 +1,199 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+"""Coverage guided example generation.
+
+While a test runs, CoverageCorpus traces the arcs (pairs of consecutive
+lines) it executes in the packages it has been told to look at. Templates
+which execute arcs that no earlier example did are kept in a corpus, and
+new examples are often made by mutating one of those rather than by
+drawing from scratch, so that Hypothesis spends more of its time near
+inputs which reach unusual parts of the code.
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import sys
+from itertools import islice
+
+#: The least fraction of freshly drawn examples which are traced. While
+#: tracing keeps turning up new arcs every example is traced, and each one
+#: that doesn't makes the next less likely to be, down to this. Examples
+#: derived from the corpus are always traced.
+MIN_SAMPLE_RATE = 0.1
+SAMPLE_DECAY = 0.9
+
+#: How often a new example is derived from the corpus rather than drawn.
+DERIVE_PROBABILITY = 0.5
+
+
+class CoverageCorpus(object):
+
+    """Traces calls to a test and keeps the templates that covered
+    something new.
+
+    Only code in modules named in packages, or in submodules of them, is
+    traced. Tracing every line is slow, so calls to functions elsewhere
+    aren't traced into at all. If storage is given the corpus is saved to it
+    and loaded from it on the next run.
+
+    """
+
+    def __init__(
+        self, strategy, random, packages, storage=None, max_size=100,
+    ):
+        self.strategy = strategy
+        self.random = random
+        self.packages = tuple(packages)
+        self.storage = storage
+        self.max_size = max_size
+        self.arcs = set()
+        self.current = set()
+        self.templates = []
+        self.unexplored = []
+        self.replayed = set()
+        self.must_trace = {}
+        self.sample_rate = 1.0
+        self.in_scope = {}
+
+    def __len__(self):
+        return len(self.templates)
+
+    def stored_templates(self):
+        """Templates saved to storage by an earlier run. Each is traced when
+        it is run, and dropped from storage if it no longer covers anything
+        new."""
+        if self.storage is None:
+            return
+        for template in list(self.storage.fetch(self.strategy)):
+            self.replayed.add(id(template))
+            self.must_trace[id(template)] = template
+            yield template
+
+    def derive(self, random):
+        """Returns a new template made by mutating one from the corpus, or
+        None if a fresh one should be drawn instead.
+
+        Every mutator is tried in turn on the newest template whose
+        neighbours haven't all been tried yet, and once there are none of
+        those a random mutation of a random template is made.
+
+        """
+        if not self.templates or random.random() >= DERIVE_PROBABILITY:
+            return None
+        template = self.mutate(random)
+        if template is not None:
+            self.must_trace[id(template)] = template
+        return template
+
+    def mutate(self, random):
+        while self.unexplored:
+            for template in self.unexplored[-1]:
+                return template
+            self.unexplored.pop()
+        # Later templates tend to be the ones which got furthest, so they
+        # are picked more often.
+        n = len(self.templates)
+        parent = self.templates[max(random.randrange(n), random.randrange(n))]
+        mutators = list(self.strategy.mutators(random, parent))
+        if not mutators:
+            return None
+        for template in random.choice(mutators)(random, parent):
+            return template
+        return None
+
+    def neighbours(self, template):
+        mutators = list(self.strategy.mutators(self.random, template))
+        self.random.shuffle(mutators)
+        for mutate in mutators:
+            for neighbour in islice(mutate(self.random, template), 10):
+                yield neighbour
+
+    def should_trace(self, template):
+        return (
+            id(template) in self.must_trace or
+            self.random.random() < self.sample_rate
+        )
+
+    def is_in_scope(self, frame):
+        module = frame.f_globals.get(u'__name__') or u''
+        return not module.startswith(u'hypothesis.') and any(
+            module == package or module.startswith(package + u'.')
+            for package in self.packages
+        )
+
+    def trace_call(self, frame, event, arg):
+        if event != u'call':
+            return None
+        code = frame.f_code
+        in_scope = self.in_scope.get(code)
+        if in_scope is None:
+            in_scope = self.in_scope[code] = self.is_in_scope(frame)
+        if not in_scope:
+            return None
+        filename = code.co_filename
+        current = self.current
+        last = [-code.co_firstlineno]
+
+        def trace_lines(frame, event, arg):
+            if event == u'line':
+                current.add((filename, last[0], frame.f_lineno))
+                last[0] = frame.f_lineno
+            elif event == u'return':
+                current.add((filename, last[0], -code.co_firstlineno))
+            return trace_lines
+        return trace_lines
+
+    def run(self, function, *args, **kwargs):
+        """Call function, tracing the arcs it executes."""
+        self.current = set()
+        previous = sys.gettrace()
+        sys.settrace(self.trace_call)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            sys.settrace(previous)
+
+    def record(self, template):
+        """Add template to the corpus if its traced run covered any arcs
+        that no earlier one did."""
+        new_arcs = self.current - self.arcs
+        self.current = set()
+        derived = self.must_trace.pop(id(template), None) is not None
+        replayed = derived and id(template) in self.replayed
+        self.replayed.discard(id(template))
+        if new_arcs:
+            self.arcs |= new_arcs
+            self.sample_rate = 1.0
+            self.templates.append(template)
+            self.unexplored.append(self.neighbours(template))
+            if self.storage is not None and not replayed:
+                self.storage.save(template, self.strategy)
+            if len(self.templates) > self.max_size:
+                dropped = self.templates.pop(0)
+                if self.storage is not None:
+                    self.storage.delete(dropped, self.strategy)
+        else:
+            if not derived:
+                self.sample_rate = max(
+                    MIN_SAMPLE_RATE, self.sample_rate * SAMPLE_DECAY)
+            if replayed and self.storage is not None:
+                self.storage.delete(template, self.strategy)
+
+    def describe_statistics(self):
+        return u'%d templates in the corpus covering %d arcs' % (
+            len(self.templates), len(self.arcs))
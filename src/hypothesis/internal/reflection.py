@@ -125,15 +125,19 @@ def convert_keyword_arguments(function, args, kwargs):
     return tuple(new_args), kwargs
 
 
-def convert_positional_arguments(function, args, kwargs):
+def convert_positional_arguments(function, args, kwargs, argspec=None):
     """Return a tuple (new_args, new_kwargs) where all possible arguments have
     been moved to kwargs.
 
     new_args will only be non-empty if function has a
     variadic argument.
 
+    If the caller already has function's argspec it can pass it in to save
+    recalculating it.
+
     """
-    argspec = getargspec(function)
+    if argspec is None:
+        argspec = getargspec(function)
     kwargs = dict(kwargs)
     if not argspec.keywords:
         for k in kwargs.keys():
@@ -305,10 +309,11 @@ def nicerepr(v):
         return unicode_safe_repr(v)
 
 
-def arg_string(f, args, kwargs):
-    args, kwargs = convert_positional_arguments(f, args, kwargs)
+def arg_string(f, args, kwargs, argspec=None):
+    if argspec is None:
+        argspec = getargspec(f)
 
-    argspec = getargspec(f)
+    args, kwargs = convert_positional_arguments(f, args, kwargs, argspec)
 
     bits = []
 
@@ -0,0 +1,102 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+from hypothesis.internal.compat import text_type, integer_types
+
+
+def pass_key(simplify, depth=3):
+    """A key identifying a simplification pass from one round of shrinking
+    to the next, when the pass itself is usually a freshly built bound method
+    or closure.
+
+    Many passes are closures which share a __name__ (or whose names don't
+    say which strategy they came from), so this uses the type of the object a
+    method is bound to, the code it runs and what its closure captured:
+    recursively for captured passes, and by type for captured strategies.
+
+    """
+    owner = getattr(simplify, u'__self__', None)
+    function = getattr(simplify, u'__func__', simplify)
+    parts = [
+        getattr(simplify, u'__name__', None),
+        getattr(function, u'__code__', None),
+        None if owner is None else type(owner),
+    ]
+    for cell in getattr(function, u'__closure__', None) or ():
+        try:
+            value = cell.cell_contents
+        except ValueError:
+            continue
+        if isinstance(value, integer_types + (text_type, bool)):
+            parts.append(value)
+        elif depth > 0 and (
+            hasattr(value, u'__code__') or hasattr(value, u'__func__')
+        ):
+            parts.append(pass_key(value, depth - 1))
+        else:
+            parts.append(type(value))
+    return tuple(parts)
+
+
+class SimplifierStats(object):
+
+    """Keeps track of how well each simplification pass has worked during a
+    shrink, keyed off pass_key.
+
+    This is used to skip passes which have been tried many times without
+    ever succeeding, and to report how much each pass did.
+
+    """
+
+    def __init__(self, skip_after=20):
+        self.skip_after = skip_after
+        self.attempts = {}
+        self.successes = {}
+        self.runtime = {}
+        self.names = {}
+
+    def key(self, simplify):
+        """Returns the key that statistics for simplify are recorded
+        under."""
+        key = pass_key(simplify)
+        self.names.setdefault(key, simplify.__name__)
+        return key
+
+    def record(self, key, success, runtime):
+        self.attempts[key] = self.attempts.get(key, 0) + 1
+        self.successes[key] = self.successes.get(key, 0) + (
+            1 if success else 0)
+        self.runtime[key] = self.runtime.get(key, 0.0) + runtime
+
+    def should_skip(self, key):
+        return (
+            self.attempts.get(key, 0) >= self.skip_after and
+            not self.successes.get(key, 0)
+        )
+
+    def describe_statistics(self):
+        lines = []
+        for key in sorted(
+            self.attempts,
+            key=lambda key: (-self.attempts[key], self.names.get(key, u'')),
+        ):
+            lines.append(u'%s: %d/%d successful in %.2fs' % (
+                self.names.get(key, key), self.successes[key],
+                self.attempts[key], self.runtime[key],
+            ))
+        return u'\n'.join(lines)
@@ -0,0 +1,50 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+import heapq
+
+
+class SlowExamples(object):
+
+    """Keeps track of the n examples of a test which took longest to run, so
+    that inputs which are pathologically slow for the code under test can be
+    reported."""
+
+    def __init__(self, n=5):
+        self.n = n
+        self.count = 0
+        self.total = 0.0
+        self.slowest = []
+
+    def record(self, runtime, description):
+        self.count += 1
+        self.total += runtime
+        # The count breaks ties, so descriptions never get compared.
+        entry = (runtime, self.count, description)
+        if len(self.slowest) < self.n:
+            heapq.heappush(self.slowest, entry)
+        elif entry > self.slowest[0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def describe_slowest(self):
+        lines = [u'%d runs took %.2fms (%.2fms on average)' % (
+            self.count, self.total * 1000, self.total * 1000 / self.count,
+        )]
+        for runtime, _, description in sorted(self.slowest, reverse=True):
+            lines.append(u'%.2fms: %s' % (runtime * 1000, description))
+        return u'\n'.join(lines)
@@ -0,0 +1,92 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+from itertools import islice
+from collections import namedtuple
+
+Best = namedtuple(u'Best', (u'score', u'template', u'description'))
+
+
+class TargetScores(object):
+
+    """Keeps track of the highest score seen for each label passed to
+    target(), and the template which got it."""
+
+    def __init__(self):
+        self.labels = []
+        self.best = {}
+
+    def __len__(self):
+        return len(self.labels)
+
+    def record(self, template, scores, description=None):
+        for label, score in scores.items():
+            current = self.best.get(label)
+            if current is None:
+                self.labels.append(label)
+            elif score <= current.score:
+                continue
+            self.best[label] = Best(score, template, description)
+
+    def describe_best(self):
+        lines = []
+        for label in self.labels:
+            best = self.best[label]
+            lines.append(u'%s%r from %s' % (
+                u'%s: ' % (label,) if label else u'', best.score,
+                best.description,
+            ))
+        return u'\n'.join(lines)
+
+
+def hill_climb(search_strategy, random, targets, tries_per_mutator=10):
+    """Yield templates near the highest scoring one for each label in
+    targets, moving on from it as soon as something beats it.
+
+    Running a template is what records its score, so this must only be
+    resumed once the last template it yielded has been run. It stops when
+    no mutation tried of any label's best template improved on it.
+
+    """
+    # Maps labels to the best template we could not improve on. If anything
+    # else beats that, climbing starts again from the new one.
+    stuck = {}
+    while True:
+        climbing = [
+            label for label in targets.labels
+            if stuck.get(label) is not targets.best[label]
+        ]
+        if not climbing:
+            return
+        for label in climbing:
+            best = targets.best[label]
+            mutators = list(search_strategy.mutators(random, best.template))
+            random.shuffle(mutators)
+            improved = False
+            for mutate in mutators:
+                for template in islice(
+                    mutate(random, best.template), tries_per_mutator
+                ):
+                    yield template
+                    if targets.best[label] is not best:
+                        improved = True
+                        break
+                if improved:
+                    break
+            if not improved:
+                stuck[label] = best
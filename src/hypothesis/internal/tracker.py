@@ -20,7 +20,8 @@ import hashlib
 import collections
 
 import marshal
-from hypothesis.internal.compat import text_type, binary_type
+from hypothesis.internal.compat import text_type, binary_type, \
+    integer_types
 
 
 def flatten(o):
@@ -78,3 +79,87 @@ class Tracker(object):
         else:
             self.contents.add(k)
             return 1
+
+
+ATOMIC_VALUE_TYPES = (
+    bool, float, complex, text_type, binary_type, type(None),
+) + integer_types
+
+COLLECTION_VALUE_TYPES = (tuple, list, frozenset, set)
+
+
+def value_key(value):
+    """Return a key such that any two values with the same key are
+    indistinguishable to a test, or None if that can't be cheaply determined.
+
+    Only values built entirely out of builtin data types get a key. Anything
+    else (e.g. instances of user classes, or infinite streams) gets None.
+
+    """
+    stack = [value]
+    while stack:
+        t = stack.pop()
+        typ = type(t)
+        if typ in ATOMIC_VALUE_TYPES:
+            continue
+        elif typ in COLLECTION_VALUE_TYPES:
+            stack.extend(t)
+        elif typ is dict:
+            stack.extend(t.keys())
+            stack.extend(t.values())
+        else:
+            return None
+    try:
+        return object_to_tracking_key(value)
+    except ValueError:
+        return None
+
+
+class OutcomeCache(object):
+
+    """Remembers the outcome of running a test on a value, so that templates
+    which reify to equal values (e.g. because a map collapses them) don't
+    cause the test to be run again.
+
+    Outcomes are looked up by key(value), which should return None for
+    values that can't be cached.
+
+    """
+
+    def __init__(self, key=value_key):
+        self.key = key
+        self.outcomes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.outcomes)
+
+    def lookup(self, key):
+        """Return the recorded outcome for this key, or None if there isn't
+        one."""
+        if key is None:
+            return None
+        try:
+            result = self.outcomes[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def record(self, key, outcome):
+        if key is not None:
+            self.outcomes[key] = outcome
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        if not lookups:
+            return 0.0
+        return self.hits / lookups
+
+    def describe_statistics(self):
+        return u'%d hits, %d misses (%.0f%% hit rate)' % (
+            self.hits, self.misses, 100 * self.hit_rate,
+        )
@@ -115,6 +115,10 @@ class BasicStrategy(object):
 
 class BasicTemplate(object):
 
+    # BasicSearchStrategy caches reified values in a WeakKeyDictionary keyed
+    # by template, so these need to support weak references.
+    __slots__ = (u'tracking_id', u'__weakref__')
+
     def __init__(self, tracking_id):
         self.tracking_id = tracking_id
 
@@ -140,6 +144,8 @@ def add_int_to_hasher(hasher, i):
 
 class Generated(BasicTemplate):
 
+    __slots__ = (u'template_seed', u'parameter_seed', u'depth')
+
     def __init__(self, template_seed, parameter_seed):
         hasher = hashlib.sha1()
         add_int_to_hasher(hasher, template_seed)
@@ -152,6 +158,8 @@ class Generated(BasicTemplate):
 
 class Simplified(BasicTemplate):
 
+    __slots__ = (u'seed', u'iteration', u'source', u'depth')
+
     def __init__(self, seed, iteration, source):
         hasher = hashlib.sha1()
         hasher.update(source.tracking_id)
@@ -19,6 +19,7 @@ from __future__ import division, print_function, absolute_import
 import math
 from copy import deepcopy
 from random import Random
+from itertools import islice
 from collections import namedtuple
 
 import hypothesis.internal.distributions as dist
@@ -29,7 +30,7 @@ from hypothesis.utils.size import clamp
 from hypothesis.internal.compat import hrange, OrderedDict, integer_types
 from hypothesis.searchstrategy.strategies import BadData, check_type, \
     check_length, SearchStrategy, check_data_type, one_of_strategies, \
-    EFFECTIVELY_INFINITE, MappedSearchStrategy
+    ReifyCache, EFFECTIVELY_INFINITE, MappedSearchStrategy
 
 
 def safe_mul(x, y):
@@ -39,6 +40,28 @@ def safe_mul(x, y):
     return result
 
 
+def deletion_chunks(length, min_size=0, smallest=1):
+    """Yield (start, end) pairs of contiguous blocks to try deleting from a
+    sequence of this length, in the style of delta debugging: First halves,
+    then quarters, and so on down to blocks of size smallest.
+
+    Blocks whose removal would leave fewer than min_size elements are
+    skipped. Because a successful deletion restarts the pass on the smaller
+    sequence, this gets a long list down to a short one in a logarithmic
+    number of steps for typical failures.
+
+    """
+    max_deletion = length - min_size
+    k = length // 2
+    while k >= max(smallest, 1):
+        if k <= max_deletion:
+            for start in hrange(0, length, k):
+                end = min(start + k, length)
+                if end - start <= max_deletion:
+                    yield start, end
+        k //= 2
+
+
 class TupleStrategy(SearchStrategy):
 
     """A strategy responsible for fixed length tuples based on heterogenous
@@ -58,8 +81,15 @@ class TupleStrategy(SearchStrategy):
         for e in self.element_strategies:
             self.template_upper_bound = safe_mul(
                 e.template_upper_bound, self.template_upper_bound)
+        if any(e.pure_reify for e in self.element_strategies):
+            self.reify_cache = ReifyCache()
+        else:
+            self.reify_cache = None
 
     def reify(self, value):
+        if self.reify_cache is not None:
+            return self.newtuple(self.reify_cache.reify_all(
+                zip(self.element_strategies, value)))
         return self.newtuple([
             e.reify(v) for e, v in zip(self.element_strategies, value)
         ])
@@ -122,6 +152,12 @@ class TupleStrategy(SearchStrategy):
             for simplifier in strat.simplifiers(random, template[i]):
                 yield self.simplifier_for_index(i, simplifier)
 
+    def mutators(self, random, template):
+        for i in hrange(len(self.element_strategies)):
+            strat = self.element_strategies[i]
+            for mutate in strat.mutators(random, template[i]):
+                yield self.simplifier_for_index(i, mutate)
+
     def to_basic(self, value):
         return [
             f.to_basic(v)
@@ -168,8 +204,18 @@ class ListStrategy(SearchStrategy):
         else:
             self.element_strategy = None
             self.template_upper_bound = 1
+        if (
+            self.element_strategy is not None and
+            self.element_strategy.pure_reify
+        ):
+            self.reify_cache = ReifyCache()
+        else:
+            self.reify_cache = None
 
     def reify(self, value):
+        if self.reify_cache is not None:
+            return self.reify_cache.reify_all(
+                (self.element_strategy, v) for v in value)
         if self.element_strategy is not None:
             return list(map(self.element_strategy.reify, value))
         else:
@@ -225,6 +271,7 @@ class ListStrategy(SearchStrategy):
             return
 
         # yield self.simplify_to_mid
+        yield self.simplify_with_chunk_deletes
         yield self.simplify_with_random_discards
         yield self.simplify_with_example_cloning
         yield self.simplify_arrange_by_pivot
@@ -239,6 +286,55 @@ class ListStrategy(SearchStrategy):
             yield self.simplifier_for_index(
                 len(template) - i - 1, self.element_strategy.full_simplify)
 
+    def mutators(self, random, template):
+        if not self.element_strategy:
+            return
+        if self.has_room(len(template) + 1):
+            yield self.mutate_by_drawing
+            if template:
+                yield self.mutate_by_cloning
+        if template:
+            yield self.mutate_elements
+            yield self.simplify_with_single_deletes
+
+    def has_room(self, size):
+        return self.max_size is None or size <= self.max_size
+
+    def insert_at_random(self, random, x, element):
+        i = random.randint(0, len(x))
+        return x[:i] + (element,) + x[i:]
+
+    def mutate_by_drawing(self, random, x):
+        for _ in hrange(10):
+            try:
+                element = self.element_strategy.draw_and_produce(random)
+            except BadTemplateDraw:
+                continue
+            yield self.insert_at_random(random, x, element)
+
+    def mutate_by_cloning(self, random, x):
+        # Copies of whole chunks let lists grow quickly, but by no more than
+        # a typical list's length at a time so that they don't get huge.
+        most = min(len(x), max(1, int(self.average_length)))
+        if self.max_size is not None:
+            most = min(most, self.max_size - len(x))
+        for _ in hrange(10):
+            size = random.randint(1, most)
+            start = random.randint(0, len(x) - size)
+            i = random.randint(0, len(x))
+            yield x[:i] + x[start:start + size] + x[i:]
+
+    def mutate_elements(self, random, x):
+        indices = list(hrange(len(x)))
+        random.shuffle(indices)
+        for j in hrange(10):
+            i = indices[j % len(indices)]
+            mutators = list(self.element_strategy.mutators(random, x[i]))
+            if not mutators:
+                continue
+            for y in islice(random.choice(mutators)(random, x[i]), 1):
+                yield x[:i] + (y,) + x[i + 1:]
+
     def simplifier_for_index(self, i, simplify):
         def accept(random, template):
             if i >= len(template):
@@ -335,6 +431,14 @@ class ListStrategy(SearchStrategy):
                 result[i] = x[i]
                 yield tuple(result)
 
+    def simplify_with_chunk_deletes(self, random, x):
+        assert isinstance(x, tuple)
+        if len(x) <= self.min_size + 1:
+            return
+        # Single deletes are handled by simplify_with_single_deletes.
+        for start, end in deletion_chunks(len(x), self.min_size, smallest=2):
+            yield x[:start] + x[end:]
+
     def simplify_with_random_discards(self, random, x):
         assert isinstance(x, tuple)
         if len(x) <= 3:
@@ -461,6 +565,11 @@ class SingleElementListStrategy(MappedSearchStrategy):
 
 class UniqueListTemplate(object):
 
+    __slots__ = (
+        u'size', u'parameter_seed', u'parameter', u'template_seed',
+        u'created_as_seed', u'values',
+    )
+
     def __init__(
         self, size, parameter_seed, parameter, template_seed, values
     ):
@@ -630,6 +739,7 @@ class UniqueListStrategy(SearchStrategy):
 
     def simplifiers(self, random, template):
         if template.values:
+            yield self.delete_chunks
             yield self.simplify_to_subsets
             yield self.reduce_size
             for i in hrange(template.size):
@@ -660,6 +770,24 @@ class UniqueListStrategy(SearchStrategy):
                 values=values
             )
 
+    def delete_chunks(self, random, template):
+        if not template.values:
+            return
+        if template.size <= self.min_size + 1:
+            return
+        # Single deletes are handled by reduce_size.
+        for start, end in deletion_chunks(
+            template.size, self.min_size, smallest=2
+        ):
+            values = template.values[:start] + template.values[end:]
+            yield UniqueListTemplate(
+                size=len(values),
+                parameter_seed=template.parameter_seed,
+                parameter=template.parameter,
+                template_seed=template.template_seed,
+                values=values
+            )
+
     def simplify_index(self, i):
         def accept(random, template):
             if i >= template.size:
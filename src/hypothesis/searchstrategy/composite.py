@@ -0,0 +1,250 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+from random import Random
+
+from hypothesis.errors import BadTemplateDraw
+from hypothesis.internal.compat import hrange, integer_types
+from hypothesis.searchstrategy.strategies import BadData, check_length, \
+    SearchStrategy, check_data_type
+
+
+def same_strategy(x, y):
+    """Can templates for x be used as templates for y?
+
+    Composite strategies typically construct new strategy objects on every
+    call, so this needs to be cheaper than comparing reprs where possible.
+
+    """
+    if x is y:
+        return True
+    x_definition = getattr(x, u'definition', None)
+    y_definition = getattr(y, u'definition', None)
+    if x_definition is not None and y_definition is not None:
+        return same_arguments(x_definition, y_definition)
+    return repr(x) == repr(y)
+
+
+def same_arguments(x, y):
+    if isinstance(x, SearchStrategy) and isinstance(y, SearchStrategy):
+        return same_strategy(x, y)
+    if type(x) is not type(y):
+        return False
+    if isinstance(x, (list, tuple)):
+        return len(x) == len(y) and all(
+            same_arguments(u, v) for u, v in zip(x, y))
+    if isinstance(x, dict):
+        return set(x) == set(y) and all(
+            same_arguments(x[k], y[k]) for k in x)
+    try:
+        return bool(x == y)
+    except Exception:
+        return False
+
+
+class CompositeTemplate(object):
+
+    """A template for a composite strategy is a record of the strategies that
+    were drawn from and the templates that were used for them.
+
+    Each entry in draws is a pair (strategy, template), or (None, basic) for
+    entries which were loaded from the database and have not yet been drawn
+    again. Draws beyond the end of this are made from seeds derived from
+    template_seed, so reifying a template always draws the same things.
+
+    Templates are never modified, as they're shared between the tracker,
+    the database and simplification, and may be reified from several
+    threads at once. Instead, reify records the draws it actually made in
+    drawn, as a new tuple, for simplification to work from. This is only a
+    cache: it isn't part of the template's identity.
+
+    """
+
+    __slots__ = (
+        u'parameter_seed', u'template_seed', u'draws', u'drawn', u'seeds')
+
+    def __init__(self, parameter_seed, template_seed, draws=(), seeds=()):
+        self.parameter_seed = parameter_seed
+        self.template_seed = template_seed
+        self.draws = tuple(draws)
+        self.drawn = None
+        self.seeds = seeds
+
+    def known_draws(self):
+        """The draws made the last time this was reified, or the ones it was
+        created with if it hasn't been."""
+        drawn = self.drawn
+        return self.draws if drawn is None else drawn
+
+    def seed_for(self, i):
+        seeds = self.seeds
+        if i >= len(seeds):
+            random = Random(self.template_seed)
+            seeds = tuple(
+                random.getrandbits(64)
+                for _ in hrange(max(i + 1, 2 * len(seeds))))
+            self.seeds = seeds
+        return seeds[i]
+
+    def with_draws(self, draws):
+        return CompositeTemplate(
+            self.parameter_seed, self.template_seed, draws,
+            seeds=self.seeds,
+        )
+
+    def template_for(self, draws, i, strategy):
+        """Return a template for strategy to use for the i'th draw, recording
+        it in draws (a list of the draws made so far) if it wasn't already
+        the one there."""
+        if i < len(draws):
+            recorded, value = draws[i]
+            if recorded is not None and same_strategy(recorded, strategy):
+                return value
+            if recorded is not None:
+                value = recorded.to_basic(value)
+            try:
+                template = strategy.from_basic(value)
+            except BadData:
+                template = self.fresh_template(i, strategy)
+            draws[i] = (strategy, template)
+        else:
+            assert i == len(draws)
+            template = self.fresh_template(i, strategy)
+            draws.append((strategy, template))
+        return template
+
+    def fresh_template(self, i, strategy):
+        parameter_random = Random(self.parameter_seed)
+        template_random = Random(self.seed_for(i))
+        while True:
+            try:
+                parameter = strategy.draw_parameter(parameter_random)
+                return strategy.draw_template(template_random, parameter)
+            except BadTemplateDraw:
+                pass
+
+    def __eq__(self, other):
+        return isinstance(other, CompositeTemplate) and (
+            self.parameter_seed == other.parameter_seed and
+            self.template_seed == other.template_seed and
+            self.__trackas__() == other.__trackas__()
+        )
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.parameter_seed) ^ hash(self.template_seed)
+
+    def __trackas__(self):
+        return [
+            u'CompositeTemplate', self.parameter_seed, self.template_seed,
+            [value for _, value in self.draws],
+        ]
+
+    def __repr__(self):
+        return u'CompositeTemplate(%d, %d, %r)' % (
+            self.parameter_seed, self.template_seed,
+            [value for _, value in self.draws],
+        )
+
+
+class CompositeStrategy(SearchStrategy):
+
+    """A strategy which builds values by calling a function with a draw
+    argument, recording each strategy drawn from and its template so they
+    can be simplified directly."""
+
+    def __init__(self, definition, args, kwargs):
+        super(CompositeStrategy, self).__init__()
+        self.definition = definition
+        self.args = args
+        self.kwargs = kwargs
+
+    def draw_parameter(self, random):
+        return random.getrandbits(64)
+
+    def draw_template(self, random, parameter):
+        return CompositeTemplate(parameter, random.getrandbits(64))
+
+    def reify(self, template):
+        draws = list(template.known_draws())
+        index = [0]
+
+        def draw(strategy):
+            i = index[0]
+            index[0] += 1
+            return strategy.reify(template.template_for(draws, i, strategy))
+        try:
+            return self.definition(*((draw,) + self.args), **self.kwargs)
+        finally:
+            # Anything past what we drew this time is no longer relevant.
+            template.drawn = tuple(draws[:index[0]])
+
+    def strictly_simpler(self, x, y):
+        x_draws = x.known_draws()
+        y_draws = y.known_draws()
+        for (s, u), (t, v) in zip(x_draws, y_draws):
+            if s is None or t is None or not same_strategy(s, t):
+                return False
+            if s.strictly_simpler(u, v):
+                return True
+            if s.strictly_simpler(v, u):
+                return False
+        return len(x_draws) < len(y_draws)
+
+    def simplifiers(self, random, template):
+        for i, (strategy, value) in enumerate(template.known_draws()):
+            if strategy is None:
+                continue
+            for simplify in strategy.simplifiers(random, value):
+                yield self.simplifier_for_draw(strategy, simplify, i)
+
+    def simplifier_for_draw(self, strategy, simplify, i):
+        def accept(random, template):
+            known = template.known_draws()
+            if i >= len(known):
+                return
+            recorded, value = known[i]
+            if recorded is None or not same_strategy(recorded, strategy):
+                return
+            for simpler in simplify(random, value):
+                draws = list(known)
+                draws[i] = (strategy, simpler)
+                yield template.with_draws(draws)
+        accept.__name__ = str(
+            u'simplifier_for_draw(%d, %s)' % (i, simplify.__name__)
+        )
+        return accept
+
+    def to_basic(self, template):
+        return [
+            template.parameter_seed, template.template_seed, [
+                value if strategy is None else strategy.to_basic(value)
+                for strategy, value in template.draws
+            ]
+        ]
+
+    def from_basic(self, data):
+        check_data_type(list, data)
+        check_length(3, data)
+        check_data_type(integer_types, data[0])
+        check_data_type(integer_types, data[1])
+        check_data_type(list, data[2])
+        return CompositeTemplate(
+            data[0], data[1], [(None, basic) for basic in data[2]])
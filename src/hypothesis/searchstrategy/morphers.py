@@ -28,6 +28,12 @@ from hypothesis.searchstrategy.strategies import BadData, check_length, \
 
 class Morpher(object):
 
+    __slots__ = (
+        u'parameter_seed', u'template_seed', u'data', u'current_template',
+        u'current_index', u'current_strategy', u'a_strategy', u'installed',
+        u'rejected',
+    )
+
     def __init__(self, parameter_seed, template_seed, data=None):
         self.parameter_seed = parameter_seed
         self.template_seed = template_seed
@@ -36,6 +42,28 @@ class Morpher(object):
         self.current_index = -1
         self.current_strategy = None
         self.a_strategy = None
+        # Maps id(strategy) to (strategy, index, template) for the data entry
+        # and template last used when that strategy was installed.
+        self.installed = {}
+        # Maps indices into data to the strategies whose from_basic has
+        # rejected the entry there, so we don't keep retrying them.
+        self.rejected = {}
+
+    def forget(self, index):
+        """Drop anything we know about data[index], because it's changed.
+
+        Strategies always use the first entry they can read, so this also
+        invalidates anything installed from a later entry.
+
+        """
+        self.rejected.pop(index, None)
+        for key, (_, i, _) in list(self.installed.items()):
+            if i >= index:
+                del self.installed[key]
+
+    def compatible(self, strategy, index):
+        return not any(
+            strategy is s for s in self.rejected.get(index, ()))
 
     def clear(self):
         self.flush()
@@ -45,8 +73,13 @@ class Morpher(object):
 
     def flush(self):
         if self.current_index >= 0:
-            self.data[self.current_index] = self.current_strategy.to_basic(
-                self.current_template
+            basic = self.current_strategy.to_basic(self.current_template)
+            if basic != self.data[self.current_index]:
+                self.data[self.current_index] = basic
+                self.forget(self.current_index)
+            self.installed[id(self.current_strategy)] = (
+                self.current_strategy, self.current_index,
+                self.current_template,
             )
 
     def install(self, strategy):
@@ -55,13 +88,21 @@ class Morpher(object):
                 u'Cannot install multiple strategies into a morpher')
         self.a_strategy = strategy
         self.current_strategy = strategy
+        cached = self.installed.get(id(strategy))
+        if cached is not None and cached[0] is strategy:
+            _, self.current_index, self.current_template = cached
+            return
         for i, data in enumerate(self.data):
+            if not self.compatible(strategy, i):
+                continue
             try:
                 self.current_template = strategy.from_basic(data)
                 self.current_index = i
+                self.installed[id(strategy)] = (
+                    strategy, i, self.current_template)
                 return
             except BadData:
-                pass
+                self.rejected.setdefault(i, []).append(strategy)
         parameter_random = Random(self.parameter_seed)
         template_random = Random(self.template_seed)
         while True:
@@ -76,6 +117,24 @@ class Morpher(object):
         self.data.append(basic)
         self.current_template = strategy.from_basic(basic)
         self.current_index = len(self.data) - 1
+        self.installed[id(strategy)] = (
+            strategy, self.current_index, self.current_template)
+
+    def promote(self, template):
+        """Replace the currently installed template with template and move
+        it to the front of data, so it is the first thing other strategies
+        will try."""
+        i = self.current_index
+        assert i >= 0
+        d = self.data
+        d[i] = self.current_strategy.to_basic(template)
+        d[i], d[0] = d[0], d[i]
+        self.installed.clear()
+        self.rejected.clear()
+        self.current_index = 0
+        self.current_template = template
+        self.installed[id(self.current_strategy)] = (
+            self.current_strategy, 0, template)
 
     def become(self, strategy):
         self.install(strategy)
@@ -185,13 +244,7 @@ class MorpherStrategy(SearchStrategy):
             template = target.current_template
             for simpler in simplifier(random, template):
                 new_template = copy(target)
-                i = new_template.current_index
-                assert i >= 0
-                d = new_template.data
-                d[i] = strategy.to_basic(simpler)
-                d[i], d[0] = d[0], d[i]
-                new_template.current_index = 0
-                new_template.current_template = simpler
+                new_template.promote(simpler)
                 yield new_template
         accept.__name__ = str(
             u'convert_simplifier(..., %s)' % (simplifier.__name__,)
@@ -37,6 +37,33 @@ def integer_or_bad(data):
         raise BadData(u'Invalid integer %r' % (data,))
 
 
+def nearby_integers(random, x, lower=None, upper=None):
+    """Yield integers in [lower, upper] which are a power of two away from x,
+    up to about twice as far as x is from zero.
+
+    The furthest ones come first, so that repeatedly moving to the first
+    improvement grows x exponentially, and the rest come in random order.
+
+    """
+    candidates = []
+    step = 1
+    while True:
+        for y in (x - step, x + step):
+            if (
+                (lower is None or y >= lower) and
+                (upper is None or y <= upper)
+            ):
+                candidates.append(y)
+        if step > abs(x):
+            break
+        step *= 2
+    furthest = candidates[-2:]
+    rest = candidates[:-2]
+    random.shuffle(rest)
+    for y in furthest + rest:
+        yield y
+
+
 class IntStrategy(SearchStrategy):
 
     """A generic strategy for integer types that provides the basic methods
@@ -60,6 +87,12 @@ class IntStrategy(SearchStrategy):
             yield self.try_shrink(i, 2 * i)
             i *= 2
 
+    def mutators(self, random, template):
+        yield self.nudge
+
+    def nudge(self, random, x):
+        return nearby_integers(random, x)
+
     def reify(self, template):
         return int(template)
 
@@ -163,6 +196,12 @@ class IntegersFromStrategy(SearchStrategy):
             yield self.try_shrink(i)
             i *= 2
 
+    def mutators(self, random, template):
+        yield self.nudge
+
+    def nudge(self, random, x):
+        return nearby_integers(random, x, lower=0)
+
     def from_basic(self, data):
         data = integer_or_bad(data)
         if data < 0:
@@ -270,6 +309,12 @@ class BoundedIntStrategy(SearchStrategy):
     def draw_template(self, random, parameter):
         return random.choice(parameter)
 
+    def mutators(self, random, template):
+        yield self.nudge
+
+    def nudge(self, random, x):
+        return nearby_integers(random, x, self.start, self.end)
+
     def basic_simplify(self, random, x):
         if x == self.start:
             return
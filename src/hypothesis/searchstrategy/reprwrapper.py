@@ -28,11 +28,15 @@ class ReprWrapperStrategy(WrapperStrategy):
 
     Its parameter and distribution come from that other strategy.
 
+    If given, definition is a tuple (function, args, kwargs) recording the
+    call that produced this strategy.
+
     """
 
-    def __init__(self, strategy, representation):
+    def __init__(self, strategy, representation, definition=None):
         super(ReprWrapperStrategy, self).__init__(strategy)
         self.representation = representation
+        self.definition = definition
 
     def __repr__(self):
         if inspect.isfunction(self.representation):
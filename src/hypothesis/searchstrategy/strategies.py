@@ -16,11 +16,12 @@
 
 from __future__ import division, print_function, absolute_import
 
+import threading
 from random import Random
 from collections import namedtuple
 
 from hypothesis.errors import BadData, NoExamples, WrongFormat, \
-    BadTemplateDraw, UnsatisfiedAssumption
+    BadTemplateDraw, InvalidArgument, UnsatisfiedAssumption
 from hypothesis.control import assume, BuildContext
 from hypothesis.internal.compat import hrange, integer_types
 from hypothesis.internal.chooser import chooser
@@ -166,15 +167,65 @@ class SearchStrategy(object):
             u'Could not find any valid examples in 100 tries'
         )
 
-    def map(self, pack):
+    def stream_examples(
+        self, seed=None, n=None, batch_size=100, processes=None
+    ):
+        """Returns an iterator over values from this strategy, for when you
+        want a lot of data quickly, e.g. for fixtures or as synthetic traffic.
+
+        This skips everything Hypothesis does to find good examples for
+        tests: values are drawn in batches of batch_size which share a
+        parameter, and there is no attempt to avoid duplicates. seed makes
+        the stream reproducible and n limits how many values it has,
+        otherwise it goes on forever.
+
+        This only saves the fixed cost of each call to example(), so how
+        much faster it is depends on how much work the strategy does per
+        value: around 6x for integers(), 2-3x for text() and barely any
+        for lists(integers()), where drawing the elements is most of it.
+
+        If processes is given, batches are drawn in that many worker
+        processes at once. This needs os.fork and values which can be
+        pickled, and gives the same values for the same seed as drawing
+        them here.
+
+        This method is part of the public API.
+
+        """
+        if batch_size <= 0:
+            raise InvalidArgument(
+                u'batch_size=%r must be positive' % (batch_size,))
+        random = Random(seed)
+
+        def jobs():
+            remaining = n
+            while remaining is None or remaining > 0:
+                size = batch_size
+                if remaining is not None:
+                    size = min(size, remaining)
+                    remaining -= size
+                yield (random.getrandbits(64), size)
+
+        if processes is None:
+            batches = (draw_batch(self, *job) for job in jobs())
+        else:
+            batches = _draw_batches_in_pool(self, jobs(), processes)
+        return (value for batch in batches for value in batch)
+
+    def map(self, pack, pure=False):
         """Returns a new strategy that generates values by generating a value
         from this strategy and then calling pack() on the result, giving that.
 
+        If pure is True, you are promising that pack always gives an
+        equivalent result for equivalent input and that its results are never
+        mutated. Hypothesis may then reuse results between examples rather
+        than calling pack again, which helps if it's expensive.
+
         This method is part of the public API.
 
         """
         return MappedSearchStrategy(
-            pack=pack, strategy=self
+            pack=pack, strategy=self, pure=pure,
         )
 
     def flatmap(self, expand):
@@ -276,6 +327,12 @@ class SearchStrategy(object):
     #: lead to the same value.
     template_upper_bound = Infinity
 
+    #: If True, reifying the same template always produces an equivalent
+    #: value, and that value is safe to share between examples. Collections
+    #: use this to reuse the values of elements whose templates didn't change
+    #: between one reify and the next (see ReifyCache).
+    pure_reify = False
+
     def __init__(self):
         pass
 
@@ -361,6 +418,31 @@ class SearchStrategy(object):
         """
         return iter(())
 
+    def mutators(self, random, template):
+        """Yield a sequence of functions which each take a Random object and a
+        single template and produce a generator over templates "near" it.
+
+        These are used to hill climb towards templates which get higher
+        scores from target(). Unlike simplifiers they may, and should where
+        possible, produce more complex templates: if the best score needs a
+        bigger value than has been seen, a strategy that can only simplify
+        will never find it.
+
+        By default this is the simplifiers, and replacing the template with
+        a freshly drawn one.
+
+        """
+        for simplify in self.simplifiers(random, template):
+            yield simplify
+        yield self.mutate_by_redrawing
+
+    def mutate_by_redrawing(self, random, template):
+        for _ in hrange(10):
+            try:
+                yield self.draw_and_produce(random)
+            except BadTemplateDraw:
+                pass
+
 
 class LazyParameter(object):
 
@@ -383,6 +465,61 @@ class LazyParameter(object):
         return self.__value
 
 
+def draw_batch(strategy, seed, size):
+    """Draw size values from strategy using seed for the randomness, or fewer
+    if too many of the templates drawn turn out to be invalid."""
+    random = Random(seed)
+    parameter = strategy.draw_parameter(random)
+    result = []
+    tries = 0
+    with BuildContext():
+        while len(result) < size and tries < size + 100:
+            tries += 1
+            try:
+                template = strategy.draw_template(random, parameter)
+                result.append(strategy.reify(template))
+            except (BadTemplateDraw, UnsatisfiedAssumption):
+                pass
+    if not result:
+        raise NoExamples(
+            u'Could not find any valid examples in %d tries' % (tries,))
+    return result
+
+
+_pool_strategy = None
+
+
+def _set_pool_strategy(strategy):
+    global _pool_strategy
+    _pool_strategy = strategy
+
+
+def _draw_pool_batch(job):
+    return draw_batch(_pool_strategy, *job)
+
+
+def _draw_batches_in_pool(strategy, jobs, processes):
+    import multiprocessing
+    from collections import deque
+
+    # Workers get the strategy by being forked with it in place, so it
+    # doesn't need to be picklable.
+    pool = multiprocessing.Pool(
+        processes, initializer=_set_pool_strategy, initargs=(strategy,))
+    try:
+        # Enough batches are kept going to keep every worker busy, but not so
+        # many that an infinite stream builds up values nobody asked for.
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.apply_async(_draw_pool_batch, (job,)))
+            if len(pending) >= 2 * processes:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        pool.terminate()
+
+
 class OneOfStrategy(SearchStrategy):
 
     """Implements a union of strategies. Given a number of strategies this
@@ -409,6 +546,7 @@ class OneOfStrategy(SearchStrategy):
         for e in self.element_strategies:
             self.template_upper_bound += e.template_upper_bound
         self.template_upper_bound = infinitish(self.template_upper_bound)
+        self.pure_reify = all(e.pure_reify for e in self.element_strategies)
 
     def __repr__(self):
         return u' | '.join(map(repr, self.element_strategies))
@@ -468,6 +606,11 @@ class OneOfStrategy(SearchStrategy):
         for simplify in self.element_strategies[i].simplifiers(random, value):
             yield self.element_simplifier(i, simplify)
 
+    def mutators(self, random, template):
+        i, value = template
+        for mutate in self.element_strategies[i].mutators(random, value):
+            yield self.element_simplifier(i, mutate)
+
     def redraw_simplifier(self, child):
         def accept(random, template):
             i, value = template
@@ -505,6 +648,58 @@ class OneOfStrategy(SearchStrategy):
         return (i, self.element_strategies[i].from_basic(value))
 
 
+class ReifyCache(object):
+
+    """Remembers what each child template was reified to by the most recent
+    reify of a collection, so the next reify can reuse the values of children
+    which are the very same template object.
+
+    Shrinking mostly produces candidates which differ from the current best
+    in only a few children, so this saves reifying the rest of them again.
+    Only children whose strategy has pure_reify set are cached.
+
+    Strategies are shared, so several threads may be reifying with the same
+    cache at once. Each reify builds a new dict rather than changing the one
+    it looked in, and the lock is only held to fetch and replace that, so
+    reifies of children (which may use this very cache again, if the
+    strategy is recursive) never happen under it.
+
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def __reduce__(self):
+        # Locks can't be copied, and a copy of a strategy doesn't need the
+        # values its original reified to.
+        return (ReifyCache, ())
+
+    def reify_all(self, strategies_and_templates):
+        with self.lock:
+            previous = self.values
+        values = {}
+        result = []
+        for strategy, template in strategies_and_templates:
+            if strategy.pure_reify:
+                key = id(template)
+                hit = previous.get(key)
+                if (
+                    hit is not None and hit[0] is template and
+                    hit[1] is strategy
+                ):
+                    value = hit[2]
+                else:
+                    value = strategy.reify(template)
+                values[key] = (template, strategy, value)
+            else:
+                value = strategy.reify(template)
+            result.append(value)
+        with self.lock:
+            self.values = values
+        return result
+
+
 class MappedSearchStrategy(SearchStrategy):
 
     """A strategy which is defined purely by conversion to and from another
@@ -514,10 +709,11 @@ class MappedSearchStrategy(SearchStrategy):
 
     """
 
-    def __init__(self, strategy, pack=None):
+    def __init__(self, strategy, pack=None, pure=False):
         SearchStrategy.__init__(self)
         self.mapped_strategy = strategy
         self.template_upper_bound = self.mapped_strategy.template_upper_bound
+        self.pure_reify = pure
         if pack is not None:
             self.pack = pack
 
@@ -547,6 +743,9 @@ class MappedSearchStrategy(SearchStrategy):
     def simplifiers(self, random, template):
         return self.mapped_strategy.simplifiers(random, template)
 
+    def mutators(self, random, template):
+        return self.mapped_strategy.mutators(random, template)
+
     def strictly_simpler(self, x, y):
         return self.mapped_strategy.strictly_simpler(x, y)
 
@@ -25,10 +25,13 @@ from hypothesis.utils.show import show
 from hypothesis.internal.compat import hrange, integer_types
 from hypothesis.searchstrategy.strategies import check_length, \
     SearchStrategy, check_data_type
+from hypothesis.searchstrategy.collections import deletion_chunks
 
 
 class StreamTemplate(object):
 
+    __slots__ = (u'seed', u'parameter_seed', u'changed', u'stream')
+
     def __init__(self, seed, parameter, generator, changed=0):
         self.seed = seed
         self.parameter_seed = parameter
@@ -107,10 +110,20 @@ class StreamStrategy(SearchStrategy):
                 yield self.source_strategy.draw_template(random, parameter)
         return StreamTemplate(seed, parameter_seed, templates())
 
+    def template_with_prefix(self, seed, parameter_seed, prefix):
+        """Produce a template for this seed whose stream starts with prefix
+        and then carries on exactly as the seed would from that point."""
+        template = self.new_template(seed, parameter_seed)
+        return StreamTemplate(
+            seed, parameter_seed,
+            template.stream.with_values(enumerate(prefix)), len(prefix),
+        )
+
     def simplifiers(self, random, template):
+        yield self.stream_delete_chunks
         yield self.stream_simplify_with_example_cloning
         yield self.stream_shared_simplification
-        for i in hrange(len(template.stream.fetched)):
+        for i in hrange(template.stream._thunked()):
             for s in self.source_strategy.simplifiers(
                 random, template.stream[i]
             ):
@@ -139,14 +152,42 @@ class StreamStrategy(SearchStrategy):
         )
         return accept
 
+    def stream_delete_chunks(self, random, template):
+        # Positions in a stream matter, so deleting a block shifts later
+        # values down and regenerates the tail from the seed. We only delete
+        # from the part of the stream that simplification has touched, and
+        # only keep results which are strictly simpler, so that this can't
+        # cycle with the per-index simplifiers.
+        simpler = self.source_strategy.strictly_simpler
+        changed = list(template.stream[:template.changed])
+        n = len(changed)
+        seeded = self.new_template(template.seed, template.parameter_seed)
+        for start, end in deletion_chunks(n):
+            shift = end - start
+            for i in hrange(start, n):
+                if i + shift < n:
+                    u = changed[i + shift]
+                else:
+                    u = seeded.stream[i]
+                v = changed[i]
+                if simpler(u, v):
+                    yield self.template_with_prefix(
+                        template.seed, template.parameter_seed,
+                        changed[:start] + changed[end:],
+                    )
+                    break
+                if simpler(v, u):
+                    break
+
     def stream_simplify_with_example_cloning(self, random, x):
         if x.changed <= 1:
             return
 
-        for pivot in x.stream.fetched:
+        fetched = x.stream.fetched
+        for pivot in fetched:
             indices = [
-                j for j in hrange(len(x.stream.fetched))
-                if self.source_strategy.strictly_simpler(pivot, x.stream[j])]
+                j for j in hrange(len(fetched))
+                if self.source_strategy.strictly_simpler(pivot, fetched[j])]
             if not indices:
                 continue
             random.shuffle(indices)
@@ -201,11 +242,6 @@ class StreamStrategy(SearchStrategy):
         check_length(3, data)
         check_data_type(integer_types, data[0])
         check_data_type(integer_types, data[1])
-        template = self.new_template(data[0], data[1])
         check_data_type(list, data[2])
         changed = list(map(self.source_strategy.from_basic, data[2]))
-        template.stream._thunk_to(len(changed))
-        assert len(template.stream.fetched) == len(changed)
-        template.changed = len(changed)
-        template.stream.fetched = changed
-        return template
+        return self.template_with_prefix(data[0], data[1], changed)
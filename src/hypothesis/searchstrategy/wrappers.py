@@ -32,6 +32,7 @@ class WrapperStrategy(SearchStrategy):
         SearchStrategy.__init__(self)
         self.wrapped_strategy = strategy
         self.template_upper_bound = self.wrapped_strategy.template_upper_bound
+        self.pure_reify = self.wrapped_strategy.pure_reify
 
     def __repr__(self):
         return u'%s(%r)' % (type(self).__name__, self.wrapped_strategy)
@@ -48,6 +49,9 @@ class WrapperStrategy(SearchStrategy):
     def simplifiers(self, random, template):
         return self.wrapped_strategy.simplifiers(random, template)
 
+    def mutators(self, random, template):
+        return self.wrapped_strategy.mutators(random, template)
+
     def strictly_simpler(self, x, y):
         return self.wrapped_strategy.strictly_simpler(x, y)
 
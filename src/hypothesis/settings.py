@@ -396,6 +396,52 @@ applied.
 """
 )
 
+Settings.define_setting(
+    u'shrink_timeout',
+    default=0,
+    description="""
+Once this many seconds have been spent shrinking a falsifying example,
+Hypothesis will stop and report the simplest example found so far, even if
+the overall timeout has not been reached. Like timeout this is a soft limit.
+If this value is <= 0 then only the overall timeout applies.
+"""
+)
+
+Settings.define_setting(
+    u'deadline',
+    default=0,
+    description="""
+If a call to the test takes more than this many milliseconds, not counting the
+time taken to generate its arguments, it fails with DeadlineExceeded and
+Hypothesis will look for the simplest input which is this slow. Examples have
+to take a quarter as long again to count as too slow while searching, so that
+ones which are only just over the deadline don't make a test flaky. If this
+value is <= 0 then there is no deadline.
+"""
+)
+
+Settings.define_setting(
+    u'coverage_guided',
+    default=False,
+    description="""
+If set to True, @given traces which lines of code each example runs, keeps
+the examples that run code no earlier one did, and generates many of its new
+examples by changing those. The corpus is saved in the example database so
+later runs can start from it. Tracing makes tests slower, so only some
+examples are traced once new coverage stops turning up.
+"""
+)
+
+Settings.define_setting(
+    u'coverage_packages',
+    default=(),
+    description="""
+The names of the modules and packages to trace when coverage_guided is True.
+Calls to code anywhere else are not traced into, which keeps the overhead
+down. If this is empty, only the module the test is defined in is traced.
+"""
+)
+
 Settings.define_setting(
     u'derandomize',
     default=False,
@@ -26,21 +26,29 @@ execution to date.
 
 from __future__ import division, print_function, absolute_import
 
+import hashlib
 import inspect
+import threading
 import traceback
 from random import Random
 from unittest import TestCase
 from collections import namedtuple
 
 from hypothesis.core import find
-from hypothesis.errors import Flaky, NoSuchExample, InvalidDefinition, \
-    UnsatisfiedAssumption
-from hypothesis.control import BuildContext
+from hypothesis.errors import Flaky, NoSuchExample, InvalidArgument, \
+    InvalidDefinition, UnsatisfiedAssumption
+from hypothesis.control import BuildContext, current_build_context
 from hypothesis.settings import Settings, Verbosity
-from hypothesis.reporting import report, verbose_report, current_verbosity
-from hypothesis.internal.compat import hrange, integer_types
-from hypothesis.searchstrategy.misc import JustStrategy, \
-    SampledFromStrategy
+from hypothesis.reporting import report, with_reporter, verbose_report, \
+    current_reporter, current_verbosity
+from hypothesis.internal.compat import Queue, hrange, OrderedDict, \
+    integer_types
+from hypothesis.internal.tracker import object_to_tracking_key
+from hypothesis.searchstrategy.misc import JustStrategy
+from hypothesis.executors.coroutines import wait_for, when_done, \
+    wait_for_any, let_tasks_run, run_coroutine, new_event_loop, \
+    with_event_loop, start_coroutine, call_on_event_loop, \
+    is_coroutine_function
 from hypothesis.internal.strategymethod import strategy
 from hypothesis.searchstrategy.strategies import BadData, check_length, \
     SearchStrategy, check_data_type, one_of_strategies
@@ -63,9 +71,11 @@ class TestCaseProperty(object):  # pragma: no cover
 
 
 def find_breaking_runner(state_machine_factory, settings=None):
+    snapshots = SnapshotCache()
+
     def is_breaking_run(runner):
         try:
-            runner.run(state_machine_factory())
+            runner.run(state_machine_factory(), snapshots=snapshots)
             return False
         except (InvalidDefinition, UnsatisfiedAssumption):
             raise
@@ -78,7 +88,10 @@ def find_breaking_runner(state_machine_factory, settings=None):
         except AttributeError:
             settings = Settings.default
 
-    search_strategy = StateMachineSearchStrategy(settings)
+    search_strategy = getattr(
+        state_machine_factory, u'_search_strategy',
+        StateMachineSearchStrategy,
+    )(settings)
     if settings.database is not None:
         storage = settings.database.storage(
             getattr(
@@ -140,9 +153,28 @@ class GenericStateMachine(object):
         raise NotImplementedError(u'%r.steps()' % (self,))
 
     def execute_step(self, step):
-        """Execute a step that has been previously drawn from self.steps()"""
+        """Execute a step that has been previously drawn from self.steps()
+
+        This may be a coroutine function, in which case it is run to
+        completion on an event loop.
+
+        """
         raise NotImplementedError(u'%r.execute_steps()' % (self,))
 
+    def start_step(self, step):
+        """Start executing a step, returning None if it has already finished
+        or an asyncio future which is done when it has.
+
+        This is only used instead of execute_step when steps may run
+        concurrently, e.g. in an InterleavedStateMachine using tasks. By
+        default it calls execute_step, starting it as a task if it is a
+        coroutine function.
+
+        """
+        if is_coroutine_function(self.execute_step):
+            return start_coroutine(self.execute_step(step))
+        self.execute_step(step)
+
     def print_step(self, step):
         """Print a step to the current reporter.
 
@@ -156,11 +188,61 @@ class GenericStateMachine(object):
         """Called after a run has finished executing to clean up any necessary
         state.
 
-        Does nothing by default
+        Does nothing by default. Like execute_step, this may be a coroutine
+        function.
 
         """
         pass
 
+    def step_references(self, step):
+        """Return a pair (produced, used) of collections of keys identifying
+        the values that executing step produced and the values it used, or
+        None if that isn't known.
+
+        Simplification uses this to try deleting steps whose values nothing
+        went on to use. Returns None by default.
+
+        """
+        return None
+
+    def steps_key(self):
+        """Return a hashable value identifying what steps() would currently
+        return, or None if there isn't one.
+
+        A template drawn from steps() on one machine may be executed on any
+        other machine whose steps_key() returned the same value, without
+        going back through the basic format. This lets a later run, which
+        uses a fresh machine, replay steps recorded by an earlier one cheaply.
+        Returns None by default, in which case templates are only reused
+        with the very strategy they were drawn from.
+
+        """
+        return None
+
+    def snapshot(self):
+        """Return a value from which restore() can recreate the current state
+        of the machine, or None if that isn't possible.
+
+        If this is implemented then when a program being run shares a prefix
+        with one run previously, Hypothesis will restore the state after that
+        prefix instead of executing its steps again. This is worth doing when
+        steps are expensive, as most of the programs tried while simplifying
+        differ from each other only towards the end.
+
+        The snapshot must not be affected by steps executed afterwards, so it
+        will usually need to be a copy of any mutable state.
+
+        Returns None by default, which disables snapshots.
+
+        """
+        return None
+
+    def restore(self, snapshot):
+        """Called on a freshly created machine to put it into the state it was
+        in when snapshot was taken. The same snapshot may be restored many
+        times, so it must not be modified."""
+        raise NotImplementedError(u'%r.restore()' % (self,))
+
     _test_case_cache = {}
 
     TestCase = TestCaseProperty()
@@ -206,6 +288,137 @@ def seeds(starting, n_steps):
 # Sentinel value used to mark entries as deleted.
 TOMBSTONE = [object(), [u'TOMBSTONE FOR STATEFUL TESTING']]
 
+# Sentinel value for a Step whose basic data has not been calculated yet.
+NOT_SERIALIZED = object()
+
+
+class Step(object):
+
+    """An entry in a StateMachineRunner's record.
+
+    This keeps the strategy a step was drawn from and the live template for
+    it, so that replaying the step or simplifying it doesn't need to go via
+    the basic format. The basic form of the template is only calculated when
+    it's first needed (for tracking or saving to the database) and is then
+    cached. Apart from filling in that cache, Steps are never modified after
+    they're created, so they can be freely shared between runners. Anything
+    learned by executing a step belongs to the runner that executed it.
+
+    history contains basic data for templates that were previously used at
+    this position with other strategies, most recent last. If the strategy
+    for this position changes it gets tried in turn.
+
+    steps_key is what the state machine's steps_key returned when the
+    template was drawn or checked by from_basic, so the template can be
+    reused by any machine which returns the same key. It is None for
+    templates that came from simplification.
+
+    Steps loaded from the database have no strategy or template, only basic
+    data.
+
+    """
+
+    __slots__ = (
+        u'strategy', u'template', u'history', u'steps_key', u'_basic',
+        u'_key',
+    )
+
+    def __init__(
+        self, strategy, template, history=(), basic=NOT_SERIALIZED,
+        steps_key=None,
+    ):
+        self.strategy = strategy
+        self.template = template
+        self.history = tuple(history)
+        self.steps_key = steps_key
+        self._basic = basic
+        self._key = None
+
+    def basic(self):
+        if self._basic is NOT_SERIALIZED:
+            self._basic = self.strategy.to_basic(self.template)
+        return self._basic
+
+    def data(self):
+        """All basic data recorded for this position, the current template's
+        last."""
+        return list(self.history) + [self.basic()]
+
+    def __trackas__(self):
+        if self._key is None:
+            self._key = object_to_tracking_key(self.data())
+        return self._key
+
+    def __repr__(self):
+        return u'Step(%r)' % (self.basic(),)
+
+
+class SnapshotCache(object):
+
+    """Remembers snapshots of the state machines run during a search, keyed
+    by the program prefix that led to them, so that later runs can skip
+    straight past a prefix that has already been executed.
+
+    A prefix is identified by a hash of the record entries executed for it.
+    Replaying an entry in the state it was executed in always executes the
+    same step again, so two runs with the same prefix key (of a
+    deterministic machine) will be in the same state afterwards. Each key
+    maps to the snapshot taken after its last position, the entry executed
+    there and the references the state machine reported for it, which a
+    resuming runner copies into its own record.
+
+    The least recently used snapshots are discarded once there are more than
+    max_size of them.
+
+    """
+
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self.snapshots = OrderedDict()
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def prefix_key(self, prefix, entry):
+        if entry is TOMBSTONE:
+            entry_key = TOMBSTONE[1][0]
+        else:
+            entry_key = entry.__trackas__()
+        return object_to_tracking_key([prefix, entry_key])
+
+    def resume(self, runner, state_machine):
+        """Restore state_machine to the state after the longest prefix of
+        runner's program that has been seen before, updating runner's record
+        for it.
+
+        Returns the number of positions skipped, the prefix key for them and
+        the snapshot restored, if any.
+
+        """
+        prefix = None
+        found = None
+        for i in hrange(min(runner.n_steps, len(runner.record))):
+            key = self.prefix_key(prefix, runner.record[i])
+            try:
+                snapshot, entry, references = self.snapshots.pop(key)
+            except KeyError:
+                break
+            self.snapshots[key] = (snapshot, entry, references)
+            runner.record[i] = entry
+            runner.references[i] = references
+            prefix = key
+            found = snapshot
+        else:
+            i = min(runner.n_steps, len(runner.record))
+        if found is not None:
+            state_machine.restore(found)
+        return i, prefix, found
+
+    def save(self, key, snapshot, entry, references=None):
+        self.snapshots[key] = (snapshot, entry, references)
+        while len(self.snapshots) > self.max_size:
+            self.snapshots.popitem(last=False)
+
 
 class StateMachineRunner(object):
 
@@ -215,6 +428,11 @@ class StateMachineRunner(object):
 
     """
 
+    __slots__ = (
+        u'parameter_seed', u'template_seed', u'n_steps', u'templates',
+        u'record', u'references', u'next_chunk',
+    )
+
     def __init__(
         self, parameter_seed, template_seed, n_steps,
         record=None, templates=None,
@@ -227,6 +445,13 @@ class StateMachineRunner(object):
         self.templates = templates or seeds(template_seed, n_steps)
         assert len(self.templates) >= n_steps
         self.record = list(record or ())
+        # What the state machine's step_references returned for each
+        # position when this runner executed it. This lives here rather than
+        # on the Steps because those are shared with other runners.
+        self.references = {}
+        # Where StateMachineSearchStrategy.delete_chunks should carry on from
+        # if this runner came from it: a pair (chunk size, first chunk).
+        self.next_chunk = None
 
     def __eq__(self, other):
         return isinstance(other, StateMachineRunner) and (
@@ -250,7 +475,10 @@ class StateMachineRunner(object):
             StateMachineRunner,
             self.parameter_seed, self.template_seed,
             self.n_steps,
-            [data[1] for data in self.record],
+            [
+                TOMBSTONE[1] if step is TOMBSTONE else step
+                for step in self.record
+            ],
         )
 
     def __repr__(self):
@@ -261,57 +489,120 @@ class StateMachineRunner(object):
             )
         )
 
-    def run(self, state_machine, print_steps=None):
-        if print_steps is None:
-            print_steps = current_verbosity() >= Verbosity.debug
+    def replay_step(self, step, strategy, steps_key, parameters, seed):
+        """Return a Step for strategy to use in place of step, which may be
+        None if nothing has been recorded for this position yet.
+
+        If step was drawn when the state machine had the same steps_key its
+        template is used as it is. Otherwise the most recent basic data that
+        strategy accepts is used if there is any, and failing that a new
+        template is drawn.
 
+        """
+        if (
+            step is not None and steps_key is not None and
+            step.steps_key == steps_key
+        ):
+            return Step(
+                strategy, step.template, step.history, basic=step._basic,
+                steps_key=steps_key,
+            )
+        data = step.data() if step is not None else []
+        for data_index in hrange(len(data) - 1, -1, -1):
+            try:
+                template = strategy.from_basic(data[data_index])
+            except BadData:
+                continue
+            data[data_index], data[-1] = data[-1], data[data_index]
+            return Step(
+                strategy, template, data[:-1], basic=data[-1],
+                steps_key=steps_key,
+            )
         try:
-            for i in hrange(self.n_steps):
-                strategy = state_machine.steps()
+            parameter_strategy, parameter = parameters[id(strategy)]
+        except KeyError:
+            parameter_strategy = None
+        if parameter_strategy is not strategy:
+            parameter = strategy.draw_parameter(Random(self.parameter_seed))
+            parameters[id(strategy)] = (strategy, parameter)
+        template = strategy.draw_template(Random(seed), parameter)
+        return Step(strategy, template, data, steps_key=steps_key)
+
+    def step_at(self, i, strategy, steps_key, parameters):
+        """Return the Step to execute at position i, which isn't a tombstone,
+        given what the state machine's steps() and steps_key() returned,
+        updating the record if what was recorded there can't be used as it
+        is."""
+        step = self.record[i] if i < len(self.record) else None
+        if (
+            step is None or step.strategy is not strategy or
+            step.steps_key != steps_key
+        ):
+            step = self.replay_step(
+                step, strategy, steps_key, parameters, self.templates[i])
+            if i < len(self.record):
+                self.record[i] = step
+            else:
+                self.record.append(step)
+        return step
 
-                template_set = False
-                if i < len(self.record):
-                    if self.record[i] is TOMBSTONE:
-                        continue
-                    _, data = self.record[i]
-                    data = list(data)
-                    for data_index in hrange(len(data) - 1, -1, -1):
-                        try:
-                            template = strategy.from_basic(data[data_index])
-                            template_set = True
-                            break
-                        except BadData:
-                            pass
-                    if template_set:
-                        data[data_index], data[-1] = (
-                            data[-1], data[data_index]
-                        )
-                else:
-                    data = []
-                if not template_set:
-                    parameter = strategy.draw_parameter(Random(
-                        self.parameter_seed
-                    ))
-                    template = strategy.draw_template(
-                        Random(self.templates[i]), parameter)
-                    data.append(strategy.to_basic(template))
-
-                new_record = (
-                    strategy, data,
-                )
-                if i < len(self.record):
-                    self.record[i] = new_record
-                else:
-                    self.record.append(new_record)
+    def run(self, state_machine, print_steps=None, snapshots=None):
+        """Execute the program this runner describes on state_machine,
+        drawing new steps for any positions past the end of the record.
 
-                strategy.from_basic(self.record[i][1][-1])
-                value = strategy.reify(template)
+        If snapshots is a SnapshotCache and state_machine supports snapshots,
+        any prefix of the program found in the cache is skipped by restoring
+        the machine's state instead, and the state after each step executed
+        is added to it.
+
+        """
+        if print_steps is None:
+            print_steps = current_verbosity() >= Verbosity.debug
+        if print_steps:
+            snapshots = None
+        if snapshots is not None:
+            snapshot = state_machine.snapshot()
+            if snapshot is None:
+                snapshots = None
+
+        # Drawing a parameter is deterministic given the seed, so when
+        # steps() hands back a strategy we've already seen this run we reuse
+        # the parameter we drew for it. Values keep hold of the strategy so
+        # that its id can't be reused by another one.
+        parameters = {}
+        try:
+            start = 0
+            if snapshots is not None:
+                start, prefix, restored = snapshots.resume(
+                    self, state_machine)
+                if restored is not None:
+                    snapshot = restored
+            for i in hrange(start, self.n_steps):
+                if i < len(self.record) and self.record[i] is TOMBSTONE:
+                    if snapshots is not None:
+                        prefix = snapshots.prefix_key(prefix, TOMBSTONE)
+                        snapshots.save(prefix, snapshot, TOMBSTONE)
+                    continue
+                strategy = state_machine.steps()
+                step = self.step_at(
+                    i, strategy, state_machine.steps_key(), parameters)
+                value = strategy.reify(step.template)
 
                 if print_steps:
                     state_machine.print_step(value)
-                state_machine.execute_step(value)
+                call_on_event_loop(state_machine.execute_step, value)
+                references = state_machine.step_references(value)
+                self.references[i] = references
+
+                if snapshots is not None:
+                    snapshot = state_machine.snapshot()
+                    if snapshot is None:
+                        snapshots = None
+                    else:
+                        prefix = snapshots.prefix_key(prefix, step)
+                        snapshots.save(prefix, snapshot, step, references)
         finally:
-            state_machine.teardown()
+            call_on_event_loop(state_machine.teardown)
 
 
 class StateMachineSearchStrategy(SearchStrategy):
@@ -344,9 +635,9 @@ class StateMachineSearchStrategy(SearchStrategy):
             template.template_seed,
             template.n_steps,
             [
-                [data[1]]
-                if data != TOMBSTONE else None
-                for data in template.record
+                [step.basic()]
+                if step is not TOMBSTONE else None
+                for step in template.record
             ]
         ]
 
@@ -375,7 +666,7 @@ class StateMachineSearchStrategy(SearchStrategy):
             else:
                 check_data_type(list, record_data)
                 check_length(1, record_data)
-                record.append((None, record_data[0]))
+                record.append(Step(None, None, basic=record_data[0]))
         return StateMachineRunner(
             parameter_seed=data[0], template_seed=data[1],
             n_steps=data[2],
@@ -384,31 +675,32 @@ class StateMachineSearchStrategy(SearchStrategy):
 
     def simplifiers(self, random, template):
         yield self.cut_steps
-        yield self.random_discards
-        yield self.delete_elements
+        yield self.delete_unused_steps
+        yield self.delete_chunks
         for i in hrange(len(template.record)):
-            if template.record[i] != TOMBSTONE:
-                strategy, data = template.record[i]
-                if strategy is None:
-                    continue
-                child_template = strategy.from_basic(data[-1])
-                for simplifier in strategy.simplifiers(random, child_template):
-                    yield self.convert_simplifier(strategy, simplifier, i)
+            step = template.record[i]
+            if step is not TOMBSTONE and step.strategy is not None:
+                for simplifier in step.strategy.simplifiers(
+                    random, step.template
+                ):
+                    yield self.convert_simplifier(
+                        step.strategy, simplifier, i)
 
     def convert_simplifier(self, strategy, simplifier, i):
         def accept(random, template):
             if i >= len(template.record):
                 return
-            if template.record[i][0] is not strategy:
+            step = template.record[i]
+            if step is TOMBSTONE or step.strategy is not strategy:
                 return
 
-            reconstituted = strategy.from_basic(template.record[i][1][-1])
-
-            for t in simplifier(random, reconstituted):
+            for t in simplifier(random, step.template):
                 new_record = list(template.record)
-                existing = new_record[i]
-                new_record[i] = (existing[0], list(existing[1]))
-                new_record[i][1][-1] = strategy.to_basic(t)
+                # The simplified template wasn't drawn in the state
+                # steps_key describes (simplifiers may look at the machine
+                # as it was at the end of the run), so it doesn't get the
+                # key and is checked by from_basic when next replayed.
+                new_record[i] = Step(strategy, t, step.history)
                 yield StateMachineRunner(
                     parameter_seed=template.parameter_seed,
                     template_seed=template.template_seed,
@@ -421,27 +713,73 @@ class StateMachineSearchStrategy(SearchStrategy):
         ))
         return accept
 
-    def random_discards(self, random, template):
-        live = len([
-            r for r in template.record if r != TOMBSTONE
-        ])
-        if live < 10:
+    def with_deleted(self, template, indices):
+        new_record = list(template.record)
+        for i in indices:
+            new_record[i] = TOMBSTONE
+        return StateMachineRunner(
+            parameter_seed=template.parameter_seed,
+            template_seed=template.template_seed,
+            templates=template.templates,
+            n_steps=template.n_steps,
+            record=new_record,
+        )
+
+    def delete_unused_steps(self, random, template):
+        """Try deleting steps that produced values which no later step used,
+        first all together and then one at a time from the end.
+
+        A step which only used values from deleted steps counts as unused
+        too. Steps whose references aren't known (because the state machine
+        doesn't report them or this runner hasn't executed them) are left
+        alone.
+
+        """
+        used = set()
+        unused = []
+        n = min(template.n_steps, len(template.record))
+        for i in hrange(n - 1, -1, -1):
+            references = template.references.get(i)
+            if template.record[i] is TOMBSTONE or references is None:
+                continue
+            produced, uses = references
+            if produced and used.isdisjoint(produced):
+                unused.append(i)
+            else:
+                used.update(uses)
+        if not unused:
             return
+        yield self.with_deleted(template, unused)
+        if len(unused) > 1:
+            for i in unused:
+                yield self.with_deleted(template, (i,))
 
-        for k in hrange(1, 8):
-            for _ in hrange(10):
-                new_record = list(template.record)
-                for i in hrange(len(template.record)):
-                    if new_record[i] != TOMBSTONE:
-                        if random.randint(0, 9) <= k:
-                            new_record[i] = TOMBSTONE
-                yield StateMachineRunner(
-                    parameter_seed=template.parameter_seed,
-                    template_seed=template.template_seed,
-                    templates=template.templates,
-                    n_steps=template.n_steps,
-                    record=new_record,
-                )
+    def delete_chunks(self, random, template):
+        """Delta debugging style deletion: try deleting each half of the live
+        steps, then each quarter, and so on down to single steps.
+
+        When a deletion succeeds the next call carries on with chunks of the
+        same size, starting from where the deleted chunk was, rather than
+        going back to halves.
+
+        """
+        live = [
+            i for i in hrange(min(template.n_steps, len(template.record)))
+            if template.record[i] is not TOMBSTONE
+        ]
+        if template.next_chunk is not None:
+            size, first = template.next_chunk
+        else:
+            size, first = len(live) // 2, 0
+        while size >= 1:
+            starts = list(hrange(0, len(live), size))
+            first = min(first, len(starts))
+            for start in starts[first:] + starts[:first]:
+                result = self.with_deleted(template, live[start:start + size])
+                result.next_chunk = (size, start // size)
+                yield result
+            size //= 2
+            first = 0
 
     def cut_steps(self, random, template):
         if len(template.record) < template.n_steps:
@@ -476,25 +814,6 @@ class StateMachineSearchStrategy(SearchStrategy):
                 record=new_record,
             )
 
-    def delete_elements(self, random, template):
-        deletes = 0
-        indices = list(hrange(len(template.record)))
-        random.shuffle(indices)
-        for i in indices:
-            if deletes >= 10:
-                break
-            if template.record[i] != TOMBSTONE:
-                deletes += 1
-                new_record = list(template.record)
-                new_record[i] = TOMBSTONE
-                yield StateMachineRunner(
-                    parameter_seed=template.parameter_seed,
-                    template_seed=template.template_seed,
-                    templates=template.templates,
-                    n_steps=template.n_steps,
-                    record=new_record,
-                )
-
 
 Rule = namedtuple(
     u'Rule',
@@ -520,6 +839,9 @@ def rule(targets=(), target=None, **kwargs):
     been produced for that bundle will be provided, if they are anything else
     it will be turned into a strategy and values from that will be provided.
 
+    The function may be a coroutine function, in which case it is run to
+    completion on an event loop and what it returns is the end result.
+
     """
     if target is not None:
         targets += (target,)
@@ -542,16 +864,95 @@ def rule(targets=(), target=None, **kwargs):
     return accept
 
 
-VarReference = namedtuple(u'VarReference', (u'name',))
+VarReference = namedtuple(u'VarReference', (u'name', u'key'))
+
 
+class StepKeyStrategy(SearchStrategy):
 
-class SimpleSampledFromStrategy(SampledFromStrategy):
+    """Draws the key that identifies the value produced by a step.
+
+    Keys are just random numbers and never simplified. They only need to be
+    distinct from the keys of other steps in the same program.
+
+    """
+
+    def __repr__(self):
+        return u'StepKeyStrategy()'
 
     def draw_parameter(self, random):
         return None
 
     def draw_template(self, random, parameter_value):
-        return random.randint(0, len(self.elements) - 1)
+        return random.getrandbits(64)
+
+    def reify(self, template):
+        return template
+
+    def simplifiers(self, random, template):
+        return iter(())
+
+    def to_basic(self, template):
+        return template
+
+    def from_basic(self, data):
+        check_data_type(integer_types, data)
+        return data
+
+
+class BundleReferenceStrategy(SearchStrategy):
+
+    """Draws references to values in one of a machine's bundles.
+
+    Templates are the keys of the steps which produced the values rather
+    than positions in the bundle, so a reference stays valid when steps that
+    produced other values are deleted. The bundle is read when the strategy
+    is used rather than when it is created, so the strategy can be reused
+    from one step to the next.
+
+    """
+
+    def __init__(self, machine, name):
+        super(BundleReferenceStrategy, self).__init__()
+        self.machine = machine
+        self.name = name
+
+    def __repr__(self):
+        return u'BundleReferenceStrategy(%r)' % (self.name,)
+
+    def positions(self):
+        return self.machine.bundle_positions.setdefault(self.name, {})
+
+    def draw_parameter(self, random):
+        return None
+
+    def draw_template(self, random, parameter_value):
+        return random.choice(self.machine.bundle(self.name)).key
+
+    def reify(self, template):
+        bundle = self.machine.bundle(self.name)
+        return bundle[self.positions()[template]]
+
+    def strictly_simpler(self, x, y):
+        positions = self.positions()
+        return positions.get(x, 0) < positions.get(y, 0)
+
+    def simplifiers(self, random, template):
+        yield self.earlier_values
+
+    def earlier_values(self, random, template):
+        bundle = self.machine.bundle(self.name)
+        for reference in bundle[:self.positions().get(template, 0)]:
+            yield reference.key
+
+    def to_basic(self, template):
+        return template
+
+    def from_basic(self, data):
+        check_data_type(integer_types, data)
+        if data not in self.positions():
+            raise BadData(u'No value with key %d in bundle %s' % (
+                data, self.name))
+        return data
 
 
 class RuleBasedStateMachine(GenericStateMachine):
@@ -575,8 +976,20 @@ class RuleBasedStateMachine(GenericStateMachine):
                 type(self).__name__,
             ))
         self.bundles = {}
+        self.bundle_positions = {}
+        # A digest of every (bundle, key) pair added so far. Two machines of
+        # the same class with equal digests have the same references in
+        # their bundles, so can execute each other's templates.
+        self.bundle_state = b''
+        self.step_strategies = {}
         self.name_counter = 1
         self.names_to_values = {}
+        # Names given out by print_step to steps which haven't started yet,
+        # by step key.
+        self.printed_names = {}
+        # Held while reading or updating the above, as an interleaved run
+        # executes steps on several threads at once.
+        self.bookkeeping_lock = threading.Lock()
 
     def __repr__(self):
         return u'%s(%s)' % (
@@ -627,6 +1040,16 @@ class RuleBasedStateMachine(GenericStateMachine):
         )
 
     def steps(self):
+        # Which rules are applicable depends only on which bundles are
+        # non-empty, and bundle sampling reads the bundle lazily, so the
+        # strategy for a given set of non-empty bundles can be reused.
+        with self.bookkeeping_lock:
+            key = frozenset(
+                name for name, bundle in self.bundles.items() if bundle)
+        try:
+            return self.step_strategies[key]
+        except KeyError:
+            pass
         strategies = []
         for rule in self.rules():
             converted_arguments = {}
@@ -638,21 +1061,76 @@ class RuleBasedStateMachine(GenericStateMachine):
                         valid = False
                         break
                     else:
-                        v = SimpleSampledFromStrategy(bundle)
+                        v = BundleReferenceStrategy(self, v.name)
                 converted_arguments[k] = v
             if valid:
                 strategies.append(TupleStrategy((
                     JustStrategy(rule),
-                    FixedKeysDictStrategy(converted_arguments)
+                    FixedKeysDictStrategy(converted_arguments),
+                    StepKeyStrategy() if rule.targets else JustStrategy(None),
                 ), tuple))
         if not strategies:
             raise InvalidDefinition(
                 u'No progress can be made from state %r' % (self,)
             )
-        return one_of_strategies(strategies)
+        result = one_of_strategies(strategies)
+        self.step_strategies[key] = result
+        return result
+
+    def steps_key(self):
+        return (type(self), self.bundle_state)
+
+    def snapshot(self):
+        state = self.snapshot_state()
+        if state is None:
+            return None
+        return (
+            dict(
+                (name, list(bundle)) for name, bundle in self.bundles.items()
+            ),
+            dict(
+                (name, dict(positions))
+                for name, positions in self.bundle_positions.items()
+            ),
+            self.bundle_state, dict(self.names_to_values), self.name_counter,
+            state,
+        )
+
+    def restore(self, snapshot):
+        (
+            bundles, bundle_positions, self.bundle_state, names_to_values,
+            self.name_counter, state,
+        ) = snapshot
+        self.bundles = dict(
+            (name, list(bundle)) for name, bundle in bundles.items()
+        )
+        self.bundle_positions = dict(
+            (name, dict(positions))
+            for name, positions in bundle_positions.items()
+        )
+        self.names_to_values = dict(names_to_values)
+        self.restore_state(state)
+
+    def snapshot_state(self):
+        """Return a value from which restore_state() can recreate the current
+        state of the machine, or None if that isn't possible.
+
+        This is snapshot() for rule based machines: snapshot() saves the
+        bundles itself and includes this for everything else. The values in
+        the bundles are not copied, so rules must not mutate them if this is
+        implemented. Returns None by default, which disables snapshots.
+
+        """
+        return None
+
+    def restore_state(self, state):
+        """Called on a freshly created machine, after its bundles have been
+        restored, to put it into the state it was in when snapshot_state()
+        returned state."""
+        raise NotImplementedError(u'%r.restore_state()' % (self,))
 
     def print_step(self, step):
-        rule, data = step
+        rule, data, key = step
         data_repr = {}
         for k, v in data.items():
             if isinstance(v, VarReference):
@@ -660,22 +1138,537 @@ class RuleBasedStateMachine(GenericStateMachine):
             else:
                 data_repr[k] = repr(v)
         self.step_count = getattr(self, u'step_count', 0) + 1
+        if rule.targets:
+            with self.bookkeeping_lock:
+                name = self.printed_names[key] = self.new_name()
         report(u'Step #%d: %s%s(%s)' % (
             self.step_count,
-            u'%s = ' % (self.upcoming_name(),) if rule.targets else u'',
+            u'%s = ' % (name,) if rule.targets else u'',
             rule.function.__name__,
             u', '.join(u'%s=%s' % kv for kv in data_repr.items())
         ))
 
     def execute_step(self, step):
-        rule, data = step
+        future = self.start_step(step)
+        if future is not None:
+            run_coroutine(future)
+
+    def start_step(self, step):
+        rule, data, key = step
         data = dict(data)
-        for k, v in data.items():
-            if isinstance(v, VarReference):
-                data[k] = self.names_to_values[v.name]
-        result = rule.function(self, **data)
-        if rule.targets:
-            name = self.new_name()
+        with self.bookkeeping_lock:
+            for k, v in data.items():
+                if isinstance(v, VarReference):
+                    data[k] = self.names_to_values[v.name]
+            # Names are handed out in the order steps start, even if a
+            # coroutine started later finishes first. Steps running on
+            # other threads may start in a different order to the one
+            # they're printed in, so they get the name that was printed.
+            if rule.targets:
+                name = self.printed_names.pop(key, None) or self.new_name()
+            else:
+                name = None
+        if is_coroutine_function(rule.function):
+            return when_done(
+                rule.function(self, **data),
+                lambda result: self.add_result(rule, key, name, result))
+        self.add_result(rule, key, name, rule.function(self, **data))
+
+    def add_result(self, rule, key, name, result):
+        if not rule.targets:
+            return
+        with self.bookkeeping_lock:
             self.names_to_values[name] = result
+            reference = VarReference(name, key)
             for target in rule.targets:
-                self.bundle(target).append(VarReference(name))
+                bundle = self.bundle(target)
+                self.bundle_positions.setdefault(
+                    target, {})[key] = len(bundle)
+                bundle.append(reference)
+                self.bundle_state = hashlib.sha1(
+                    self.bundle_state +
+                    (u'%s:%d' % (target, key)).encode(u'utf-8')
+                ).digest()
+
+    def step_references(self, step):
+        rule, data, key = step
+        return (
+            (key,) if rule.targets else (),
+            tuple(
+                v.key for v in data.values() if isinstance(v, VarReference)
+            ),
+        )
+
+
+class ThreadWorkers(object):
+
+    """A fixed number of threads, each of which runs the functions it is
+    given one after another, concurrently with the others.
+
+    Each thread runs coroutines on an event loop of its own. Exceptions are
+    kept until finish, which waits for every thread to be idle and then
+    raises the first of them.
+
+    """
+
+    def __init__(self, n):
+        self.requests = [None] * n
+        self.threads = []
+        self.finished = Queue()
+        self.busy = 0
+        self.failures = []
+
+    def start(self, i, function):
+        """Have thread i run function. The thread must be idle."""
+        if self.requests[i] is None:
+            self.requests[i] = Queue()
+            thread = threading.Thread(
+                target=self.serve, args=(i, self.requests[i]))
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+        self.busy += 1
+        self.requests[i].put(function)
+
+    def serve(self, i, requests):
+        loop = new_event_loop()
+        try:
+            while True:
+                function = requests.get()
+                if function is None:
+                    return
+                try:
+                    with_event_loop(lambda f: f(), loop)(function)
+                    self.finished.put((i, None))
+                except BaseException as e:
+                    self.finished.put((i, e))
+        finally:
+            if loop is not None:
+                loop.close()
+
+    def wait(self):
+        """Wait for a thread to finish what it's running and return which
+        one it was. There must be one running something."""
+        i, error = self.finished.get()
+        self.busy -= 1
+        if error is not None:
+            self.failures.append(error)
+        return i
+
+    def finish(self):
+        while self.busy:
+            self.wait()
+        if self.failures:
+            raise self.failures[0]
+
+    def close(self):
+        while self.busy:
+            self.wait()
+        for requests in self.requests:
+            if requests is not None:
+                requests.put(None)
+        for thread in self.threads:
+            thread.join()
+
+
+class TaskWorkers(object):
+
+    """The same interface as ThreadWorkers, but with asyncio tasks on the
+    current event loop instead of threads.
+
+    A step is started by calling a function which returns None if it has
+    already finished, or a future for it. The event loop is run for an
+    iteration after each one is started, so a coroutine step runs until it
+    first has to wait before anything else starts.
+
+    """
+
+    def __init__(self, n):
+        self.running = [None] * n
+        self.done = []
+        self.failures = []
+
+    def start(self, i, start):
+        try:
+            future = start()
+        except Exception as e:
+            self.failures.append(e)
+            future = None
+        if future is None:
+            self.done.append(i)
+            return
+        self.running[i] = future
+        future.add_done_callback(lambda future: self.finished(i, future))
+        let_tasks_run()
+
+    def finished(self, i, future):
+        self.running[i] = None
+        if not future.cancelled() and future.exception() is not None:
+            self.failures.append(future.exception())
+        self.done.append(i)
+
+    @property
+    def busy(self):
+        return len(self.done) + sum(f is not None for f in self.running)
+
+    def wait(self):
+        while not self.done:
+            wait_for_any([f for f in self.running if f is not None])
+        return self.done.pop(0)
+
+    def finish(self):
+        while self.busy:
+            self.wait()
+        if self.failures:
+            raise self.failures[0]
+
+    def close(self):
+        running = [f for f in self.running if f is not None]
+        for future in running:
+            future.cancel()
+        if running:
+            wait_for(running)
+
+
+class InterleavedStateMachine(GenericStateMachine):
+
+    """A state machine which runs programs for another on several workers
+    at once. Set state_machine_class to the (no argument) factory for the
+    machine to run, or use interleaved().
+
+    Each worker has its own independently generated program, and the
+    workers run their programs concurrently against the one machine, on
+    workers threads or, if use_tasks is set, asyncio tasks. It is run by an
+    InterleavedRunner rather than a StateMachineRunner: see that for how
+    runs are recorded and replayed.
+
+    With tasks, a coroutine step runs until it first has to wait before the
+    next step is started. Rules and execute_step should then be coroutine
+    functions or return without using the event loop. With threads, each
+    thread runs coroutine steps on an event loop of its own.
+
+    """
+
+    state_machine_class = None
+    workers = 2
+    use_tasks = False
+
+    def __init__(self):
+        self.state_machine = self.state_machine_class()
+        self.worker_labels = {}
+        self.pool = None
+
+    def __repr__(self):
+        return u'%s(%r)' % (type(self).__name__, self.state_machine)
+
+    @classmethod
+    def _search_strategy(cls, settings=None):
+        return InterleavedSearchStrategy(cls.workers, settings)
+
+    def worker_label(self, worker):
+        """The number worker is printed as. Workers are numbered in the order
+        they are first used, so programs which only differ in which workers
+        are which print the same."""
+        return self.worker_labels.setdefault(worker, len(self.worker_labels))
+
+    def workers_pool(self):
+        if self.pool is None:
+            if self.use_tasks:
+                self.pool = TaskWorkers(self.workers)
+            else:
+                self.pool = ThreadWorkers(self.workers)
+        return self.pool
+
+    def print_worker_step(self, worker, step):
+        label = self.worker_label(worker)
+        reporter = current_reporter()
+        with with_reporter(
+            lambda line: reporter(u'[worker %d] %s' % (label, line))
+        ):
+            self.state_machine.print_step(step)
+
+    def start_worker_step(self, worker, step):
+        """Start step running on worker, which must be idle."""
+        if self.use_tasks:
+            self.workers_pool().start(
+                worker, lambda: self.state_machine.start_step(step))
+            return
+        reporter = current_reporter()
+        try:
+            context = current_build_context()
+        except InvalidArgument:
+            context = BuildContext()
+
+        def execute():
+            with with_reporter(reporter):
+                with context.local():
+                    call_on_event_loop(self.state_machine.execute_step, step)
+        self.workers_pool().start(worker, execute)
+
+    def teardown(self):
+        try:
+            if self.pool is not None:
+                try:
+                    self.pool.finish()
+                finally:
+                    self.pool.close()
+        finally:
+            call_on_event_loop(self.state_machine.teardown)
+
+
+class InterleavedRunner(object):
+
+    """A description of how to run an InterleavedStateMachine: a
+    StateMachineRunner for each worker's program, and the schedule the
+    workers' steps were started to when it was last run, if it has been.
+
+    The schedule is a list with an entry for each position of a worker's
+    program that was reached, in the order they were reached. Each entry is
+    a pair (worker, waits), where waits[j] is how many of worker j's
+    positions had finished at the time. A run with a schedule starts each
+    position only once all of those have finished again, so every step that
+    had finished before another started still has. Past the end of the
+    schedule, each worker is given its next step as soon as it is idle, and
+    the schedule followed is recorded either way.
+
+    """
+
+    __slots__ = (u'runners', u'schedule')
+
+    def __init__(self, runners, schedule=None):
+        self.runners = list(runners)
+        self.schedule = list(schedule) if schedule is not None else None
+
+    def __eq__(self, other):
+        return isinstance(other, InterleavedRunner) and (
+            self.runners == other.runners and
+            self.schedule == other.schedule
+        )
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(tuple(self.runners))
+
+    def __trackas__(self):
+        return (
+            InterleavedRunner,
+            [runner.__trackas__() for runner in self.runners],
+            self.schedule,
+        )
+
+    def __repr__(self):
+        return u'InterleavedRunner(%s)' % (
+            u', '.join(repr(runner) for runner in self.runners),
+        )
+
+    def with_runner(self, worker, runner):
+        runners = list(self.runners)
+        runners[worker] = runner
+        return InterleavedRunner(runners, self.schedule)
+
+    def run(self, state_machine, print_steps=None, snapshots=None):
+        """Run the workers' programs concurrently on state_machine, an
+        InterleavedStateMachine, raising the first exception any step did
+        once every worker has stopped.
+
+        Steps are drawn and printed on this thread, in the order they are
+        started. snapshots is accepted for compatibility with
+        StateMachineRunner but not used, as the state after a prefix of a
+        concurrent run depends on more than the steps in it.
+
+        """
+        if print_steps is None:
+            print_steps = current_verbosity() >= Verbosity.debug
+        machine = state_machine.state_machine
+        pool = state_machine.workers_pool()
+        n = len(self.runners)
+        lengths = [runner.n_steps for runner in self.runners]
+        reached = [0] * n
+        finished = [0] * n
+        idle = [True] * n
+        running = [None] * n
+        parameters = [{} for _ in hrange(n)]
+        schedule = []
+        replaying = list(reversed(self.schedule or ()))
+
+        def wait():
+            worker = pool.wait()
+            runner = self.runners[worker]
+            i, value = running[worker]
+            runner.references[i] = machine.step_references(value)
+            running[worker] = None
+            finished[worker] += 1
+            idle[worker] = True
+
+        try:
+            while not pool.failures:
+                if replaying:
+                    worker, waits = replaying.pop()
+                    if worker >= n or reached[worker] >= lengths[worker]:
+                        continue
+                    while not idle[worker] or any(
+                        finished[j] < min(waits[j], lengths[j])
+                        for j in hrange(min(n, len(waits)))
+                    ):
+                        if all(idle):
+                            # Nothing we're waiting for will ever happen,
+                            # e.g. because simplification deleted it.
+                            break
+                        wait()
+                    if pool.failures:
+                        break
+                else:
+                    free = [
+                        j for j in hrange(n)
+                        if idle[j] and reached[j] < lengths[j]
+                    ]
+                    if not free:
+                        if all(idle):
+                            break
+                        wait()
+                        continue
+                    worker = free[0]
+
+                runner = self.runners[worker]
+                i = reached[worker]
+                reached[worker] += 1
+                schedule.append((worker, tuple(finished)))
+                if i < len(runner.record) and runner.record[i] is TOMBSTONE:
+                    finished[worker] += 1
+                    continue
+                # The machine may be being changed by steps running
+                # elsewhere, so steps_key isn't used: it may not match the
+                # strategy steps() returned.
+                strategy = machine.steps()
+                step = runner.step_at(i, strategy, None, parameters[worker])
+                value = strategy.reify(step.template)
+                if print_steps:
+                    state_machine.print_worker_step(worker, value)
+                idle[worker] = False
+                running[worker] = (i, value)
+                state_machine.start_worker_step(worker, value)
+            while not all(idle):
+                wait()
+        finally:
+            self.schedule = schedule
+            call_on_event_loop(state_machine.teardown)
+
+
+class InterleavedSearchStrategy(SearchStrategy):
+
+    """Searches for InterleavedRunners for a number of workers, sharing
+    stateful_step_count steps between them."""
+
+    def __init__(self, workers, settings=None):
+        self.workers = workers
+        self.runner_strategy = StateMachineSearchStrategy(settings)
+        self.program_size = (
+            self.runner_strategy.program_size + workers - 1) // workers
+
+    def __repr__(self):
+        return u'InterleavedSearchStrategy(%d)' % (self.workers,)
+
+    def reify(self, template):
+        return template
+
+    def draw_parameter(self, random):
+        return random.getrandbits(64)
+
+    def draw_template(self, random, parameter_value):
+        return InterleavedRunner([
+            StateMachineRunner(
+                parameter_value, random.getrandbits(64),
+                n_steps=self.program_size,
+            )
+            for _ in hrange(self.workers)
+        ])
+
+    def to_basic(self, template):
+        return [
+            [self.runner_strategy.to_basic(r) for r in template.runners],
+            None if template.schedule is None else [
+                [worker, list(waits)] for worker, waits in template.schedule
+            ],
+        ]
+
+    def from_basic(self, data):
+        check_data_type(list, data)
+        check_length(2, data)
+        check_data_type(list, data[0])
+        check_length(self.workers, data[0])
+        runners = [self.runner_strategy.from_basic(d) for d in data[0]]
+        if data[1] is None:
+            return InterleavedRunner(runners)
+        check_data_type(list, data[1])
+        schedule = []
+        for entry in data[1]:
+            check_data_type(list, entry)
+            check_length(2, entry)
+            check_data_type(integer_types, entry[0])
+            check_data_type(list, entry[1])
+            check_length(self.workers, entry[1])
+            for waits in entry[1]:
+                check_data_type(integer_types, waits)
+            if not (0 <= entry[0] < self.workers):
+                raise BadData(u'Invalid worker %d' % (entry[0],))
+            schedule.append((entry[0], tuple(entry[1])))
+        return InterleavedRunner(runners, schedule)
+
+    def simplifiers(self, random, template):
+        yield self.without_workers
+        yield self.in_order
+        for worker, runner in enumerate(template.runners):
+            for simplifier in self.runner_strategy.simplifiers(
+                random, runner
+            ):
+                yield self.convert_simplifier(simplifier, worker)
+
+    def convert_simplifier(self, simplifier, worker):
+        def accept(random, template):
+            for runner in simplifier(random, template.runners[worker]):
+                yield template.with_runner(worker, runner)
+        accept.__name__ = str(u'convert_simplifier(%s, %d)' % (
+            simplifier.__name__, worker
+        ))
+        return accept
+
+    def without_workers(self, random, template):
+        """Try giving each worker, other than the last one with anything to
+        do, nothing to do."""
+        busy = [
+            worker for worker, runner in enumerate(template.runners)
+            if runner.n_steps
+        ]
+        for worker in busy[:-1]:
+            runner = template.runners[worker]
+            yield template.with_runner(worker, StateMachineRunner(
+                runner.parameter_seed, runner.template_seed, 0,
+                templates=runner.templates,
+            ))
+
+    def in_order(self, random, template):
+        """Try starting each step only once every step started before it
+        has finished, so the workers take turns."""
+        if template.schedule is None:
+            return
+        reached = [0] * self.workers
+        schedule = []
+        for worker, _ in template.schedule:
+            schedule.append((worker, tuple(reached)))
+            reached[worker] += 1
+        if schedule != template.schedule:
+            yield InterleavedRunner(template.runners, schedule)
+
+
+def interleaved(state_machine_class, workers=2, use_tasks=False):
+    """Returns an InterleavedStateMachine subclass running programs for
+    state_machine_class on workers threads or tasks, e.g. for use as
+    interleaved(MyMachine, workers=4).TestCase."""
+    name = u'Interleaved' + state_machine_class.__name__
+    return type(str(name), (InterleavedStateMachine,), {
+        u'state_machine_class': state_machine_class,
+        u'workers': workers,
+        u'use_tasks': use_tasks,
+    })
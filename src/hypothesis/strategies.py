@@ -70,7 +70,10 @@ def defines_strategy(strategy_definition):
                 strategy_definition.__name__,
                 arg_string(strategy_definition, _args, kwargs_for_repr)
             )
-        return ReprWrapperStrategy(result, calc_repr)
+        return ReprWrapperStrategy(
+            result, calc_repr,
+            definition=(strategy_definition, args, kwargs),
+        )
     return accept
 
 
@@ -729,7 +732,7 @@ def composite(f):
 
     """
 
-    from hypothesis.searchstrategy.morphers import MorpherStrategy
+    from hypothesis.searchstrategy.composite import CompositeStrategy
     from hypothesis.internal.reflection import copy_argspec
     argspec = getargspec(f)
 
@@ -750,20 +753,10 @@ def composite(f):
         keywords=argspec.keywords, defaults=argspec.defaults
     )
 
-    base_strategy = streaming(MorpherStrategy())
-
     @defines_strategy
     @copy_argspec(f.__name__, new_argspec)
     def accept(*args, **kwargs):
-        def call_with_draw(morphers):
-            index = [0]
-
-            def draw(strategy):
-                i = index[0]
-                index[0] += 1
-                return morphers[i].become(strategy)
-            return f(*((draw,) + args), **kwargs)
-        return base_strategy.map(call_with_draw)
+        return CompositeStrategy(f, args, kwargs)
     return accept
 
 
@@ -360,6 +360,16 @@ def strategy_test_suite(
             for s in islice(strat.full_simplify(rnd, template), 100):
                 assert not strat.strictly_simpler(template, s)
 
+        @specifier_test
+        def test_mutations_are_valid_templates(self, template, rnd):
+            for mutate in strat.mutators(rnd, template):
+                for t in islice(mutate(rnd, template), 10):
+                    assert strat.to_basic(
+                        strat.from_basic(strat.to_basic(t))
+                    ) == strat.to_basic(t)
+                    with BuildContext():
+                        strat.reify(t)
+
         @given(randoms(), settings=Settings(settings, max_examples=100))
         def test_can_create_templates(self, random):
             parameter = strat.draw_parameter(random)
@@ -18,12 +18,16 @@ from __future__ import division, print_function, absolute_import
 
 import os
 import pickle
+import signal
 import traceback
+import multiprocessing
+from weakref import WeakValueDictionary
 from unittest import TestCase
 from collections import namedtuple
 
 from hypothesis.errors import AbnormalExit
 from hypothesis.reporting import with_reporter, current_reporter
+from hypothesis.internal.tracker import object_to_tracking_key
 
 try:
     os.fork
@@ -36,6 +40,8 @@ except AttributeError:  # pragma: no cover
 
 Report = namedtuple(u'Report', (u'data',))
 Error = namedtuple(u'Error', (u'exception',))
+Done = namedtuple(u'Done', ())
+Task = namedtuple(u'Task', (u'data', u'options'))
 
 
 def report_to(w):  # pragma: no cover
@@ -55,7 +61,10 @@ class ForkingTestCase(TestCase):
     program.
 
     Note that this will not work correctly with coverage. This might be fixable
-    but it's not currently obvious how.
+    but it's not currently obvious how. Anything else recorded while running
+    an example is lost with the child process too. This includes outcomes
+    kept to avoid rerunning equal examples, the slowest runs, scores passed
+    to target() and the coverage used by the coverage_guided setting.
 
     """
 
@@ -103,3 +112,351 @@ class ForkingTestCase(TestCase):
         _, exitstatus = os.waitpid(pid, 0)
         if exitstatus:
             raise AbnormalExit()
+
+
+def serve_examples(
+    requests, responses, search_strategy, test
+):  # pragma: no cover
+    """Run in a forked worker: read Tasks from requests, run the examples
+    they describe and write the result of each to responses.
+
+    Only the options in a Task get here, so the outcome cache, timings,
+    target scores and coverage corpus that the example was made with in the
+    parent are not used. See the docs on forking for what that means.
+
+    """
+    from hypothesis.core import reify_and_execute
+    while True:
+        try:
+            task = pickle.load(requests)
+        except EOFError:
+            os._exit(0)
+        try:
+            with with_reporter(report_to(responses)):
+                reify_and_execute(
+                    search_strategy, search_strategy.from_basic(task.data),
+                    test, **task.options
+                )()
+            message = Done()
+        except BaseException as e:
+            message = Error(e)
+        try:
+            data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+        except:
+            traceback.print_exc()
+            os._exit(1)
+        responses.write(data)
+        responses.flush()
+
+
+#: The workers this process has forked which are still running, by id.
+#: Forked processes close their copies of these workers' pipes, as otherwise
+#: a worker would never see the end of its input while its siblings were
+#: alive. (This isn't a WeakSet because Python 2.6 doesn't have one.)
+live_workers = WeakValueDictionary()
+
+
+class ForkedWorker(object):
+
+    """A child process which runs examples for a single run of a test, so
+    that the cost of forking is paid once rather than for every example.
+
+    It is forked when the first example is run, so it has its own copies
+    of the search strategy and test function. Later examples are sent to it
+    as the to_basic form of their template.
+
+    """
+
+    def __init__(self, function):
+        self.search_strategy = function.search_strategy
+        self.test = function.test
+        self.parent = os.getpid()
+        requests_r, requests_w = os.pipe()
+        responses_r, responses_w = os.pipe()
+        self.pid = os.fork()
+        if not self.pid:  # pragma: no cover
+            try:
+                for worker in list(live_workers.values()):
+                    worker.close_pipes()
+                os.close(requests_w)
+                os.close(responses_r)
+                serve_examples(
+                    os.fdopen(requests_r, u'rb'),
+                    os.fdopen(responses_w, u'wb'),
+                    self.search_strategy, self.test,
+                )
+            finally:
+                os._exit(1)
+        os.close(requests_r)
+        os.close(responses_w)
+        self.requests = os.fdopen(requests_w, u'wb')
+        self.responses = os.fdopen(responses_r, u'rb')
+        live_workers[id(self)] = self
+
+    def accepts(self, function):
+        """Can this worker run function? It can if it's an example for the
+        same run of the same test as the one the worker was forked for."""
+        return (
+            getattr(function, u'search_strategy', None) is
+            self.search_strategy and
+            getattr(function, u'test', None) is self.test
+        )
+
+    def submit(self, function):
+        try:
+            pickle.dump(Task(
+                self.search_strategy.to_basic(function.template),
+                function.options,
+            ), self.requests, pickle.HIGHEST_PROTOCOL)
+            self.requests.flush()
+        except (IOError, OSError):
+            self.close()
+            raise AbnormalExit()
+
+    def result(self, reporter=None):
+        """Wait for the example that was last submitted to finish. Reports
+        from it are passed to reporter (the current reporter by default), and
+        any exception it raised is raised here. If the worker died instead,
+        raises AbnormalExit and the worker can't be used again."""
+        reporter = reporter or current_reporter()
+        while True:
+            try:
+                message = pickle.load(self.responses)
+            except EOFError:
+                self.close()
+                raise AbnormalExit()
+            if isinstance(message, Report):
+                reporter(message.data)
+            elif isinstance(message, Error):
+                raise message.exception
+            else:
+                assert isinstance(message, Done)
+                return
+
+    def run(self, function):
+        self.submit(function)
+        self.result()
+
+    def close_pipes(self):
+        for f in (self.requests, self.responses):
+            try:
+                f.close()
+            except (IOError, OSError):  # pragma: no cover
+                pass
+
+    def close(self, kill=False):
+        """Stop the worker. It will finish any example it is running first
+        unless kill is True."""
+        # Forked processes inherit this object, but only the process which
+        # created the worker can wait for it.
+        if self.pid is None or os.getpid() != self.parent:
+            return
+        live_workers.pop(id(self), None)
+        if kill:
+            os.kill(self.pid, signal.SIGKILL)
+        self.close_pipes()
+        os.waitpid(self.pid, 0)
+        self.pid = None
+
+    def __del__(self):
+        self.close()
+
+
+class PersistentForkingTestCase(ForkingTestCase):
+
+    """A ForkingTestCase which runs all the examples of a test in one forked
+    worker rather than forking for each example. A new worker is forked
+    whenever the previous one died, e.g. by segfaulting.
+
+    This is much faster when forking is expensive compared to the test, but
+    examples are no longer isolated from each other: anything one example
+    does to global state in the worker will be seen by the next.
+
+    Examples which did not come from Hypothesis (e.g. explicit examples
+    given with @example) are still run in a fork of their own.
+
+    """
+
+    worker = None
+
+    def execute_example(self, function):
+        if not hasattr(function, u'search_strategy'):
+            return super(PersistentForkingTestCase, self).execute_example(
+                function)
+        if self.worker is None or not self.worker.accepts(function):
+            if self.worker is not None:
+                self.worker.close()
+            self.worker = ForkedWorker(function)
+        try:
+            self.worker.run(function)
+        except AbnormalExit:
+            self.worker = None
+            raise
+
+    def tearDown(self):
+        if self.worker is not None:
+            self.worker.close()
+            self.worker = None
+        super(PersistentForkingTestCase, self).tearDown()
+
+
+class ParallelForkingTestCase(PersistentForkingTestCase):
+
+    """A PersistentForkingTestCase which keeps several workers busy at once,
+    by starting on examples that Hypothesis is going to try next while it
+    waits for the result of the current one.
+
+    processes is the number of workers to use, defaulting to the number of
+    CPUs. As with PersistentForkingTestCase, examples run in the same worker
+    are not isolated from each other, and which examples share a worker is
+    not predictable.
+
+    """
+
+    processes = None
+
+    @property
+    def prefetch_size(self):
+        return self.processes or multiprocessing.cpu_count()
+
+    def worker_pool(self, function):
+        """Returns the list of workers for the test that function is an
+        example of, shutting down any workers for a previous test."""
+        pool = getattr(self, u'pool', None)
+        if pool is None or not pool.accepts(function):
+            if pool is not None:
+                pool.close()
+            pool = self.pool = WorkerPool(function, self.prefetch_size)
+        return pool
+
+    def prefetch_examples(self, functions):
+        self.worker_pool(functions[0]).prefetch(functions)
+
+    def execute_example(self, function):
+        if not hasattr(function, u'search_strategy'):
+            return super(PersistentForkingTestCase, self).execute_example(
+                function)
+        reports, exception = self.worker_pool(function).outcome(function)
+        reporter = current_reporter()
+        for data in reports:
+            reporter(data)
+        if exception is not None:
+            raise exception
+
+    def tearDown(self):
+        pool = getattr(self, u'pool', None)
+        if pool is not None:
+            pool.close()
+            self.pool = None
+        super(ParallelForkingTestCase, self).tearDown()
+
+
+def example_key(function):
+    """Identifies an example by its template's basic form rather than its id,
+    which may be reused once the template is garbage collected."""
+    return (
+        object_to_tracking_key(
+            function.search_strategy.to_basic(function.template)),
+        tuple(sorted(function.options.items())),
+    )
+
+
+class WorkerPool(object):
+
+    """Up to size ForkedWorkers all running examples of the same test.
+
+    Examples can be started ahead of time with prefetch. Their results are
+    held on to, reports and all, until someone asks for that example's
+    outcome, or until they're evidently not going to be.
+
+    """
+
+    def __init__(self, function, size):
+        self.search_strategy = function.search_strategy
+        self.test = function.test
+        self.size = size
+        self.workers = []
+        # Maps example keys to workers for examples which are being run,
+        # and to (reports, exception) for ones which have finished.
+        self.running = {}
+        self.finished = {}
+
+    def accepts(self, function):
+        return (
+            function.search_strategy is self.search_strategy and
+            function.test is self.test
+        )
+
+    def idle_worker(self, function):
+        """Returns a worker which isn't running anything, forking a new one
+        if there is room for it, or None if all of them are busy."""
+        busy = set(id(w) for w in self.running.values())
+        for worker in self.workers:
+            if id(worker) not in busy:
+                return worker
+        if len(self.workers) < self.size:
+            worker = ForkedWorker(function)
+            self.workers.append(worker)
+            return worker
+        return None
+
+    def start(self, key, function):
+        """Start running function on an idle worker, first waiting for one to
+        become free if necessary."""
+        worker = self.idle_worker(function)
+        if worker is None:
+            self.collect(next(iter(self.running)))
+            worker = self.idle_worker(function)
+        try:
+            worker.submit(function)
+        except AbnormalExit as e:
+            self.workers.remove(worker)
+            self.finished[key] = ([], e)
+            return
+        self.running[key] = worker
+
+    def collect(self, key):
+        """Wait for the example with this key to finish and record how it
+        went."""
+        worker = self.running.pop(key)
+        reports = []
+        exception = None
+        try:
+            worker.result(reports.append)
+        except BaseException as e:
+            exception = e
+            if isinstance(e, AbnormalExit):
+                self.workers.remove(worker)
+        self.finished[key] = (reports, exception)
+
+    def prefetch(self, functions):
+        keys = [example_key(f) for f in functions]
+        # Anything finished that isn't wanted now never will be.
+        wanted = set(keys)
+        for key in list(self.finished):
+            if key not in wanted:
+                del self.finished[key]
+        for key, function in zip(keys, functions):
+            if key in self.running or key in self.finished:
+                continue
+            if self.idle_worker(function) is None:
+                break
+            self.start(key, function)
+
+    def outcome(self, function):
+        """Returns (reports, exception) for running function, using the
+        result of an earlier prefetch if there was one."""
+        key = example_key(function)
+        if key not in self.running and key not in self.finished:
+            self.start(key, function)
+        if key in self.running:
+            self.collect(key)
+        return self.finished.pop(key)
+
+    def close(self):
+        busy = set(id(w) for w in self.running.values())
+        for worker in self.workers:
+            worker.close(kill=id(worker) in busy)
+        self.workers = []
+        self.running.clear()
+        self.finished.clear()
@@ -0,0 +1,366 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+"""Benchmarks for the speed of the built in strategies.
+
+Run this as python -m hypothesis.tools.bench. For every strategy it measures
+how many parameter and template draws, reifies, to_basic/from_basic round
+trips and tracker keys it can do per second, how many bytes a drawn template
+takes up (on Pythons with tracemalloc), and how many simplification steps it
+takes to shrink a drawn template to a minimal one.
+
+Results can be written out as JSON with --output, and compared against a
+previously saved file with --baseline, in which case the exit code is 1 if
+anything got slower (or took more steps to shrink) by more than --tolerance.
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import sys
+import json
+import time
+import optparse
+from random import Random
+
+import hypothesis.strategies as st
+from hypothesis.errors import BadTemplateDraw, UnsatisfiedAssumption
+from hypothesis.control import BuildContext
+from hypothesis.internal.compat import OrderedDict
+from hypothesis.internal.tracker import Tracker, object_to_tracking_key
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None
+
+#: Metrics where a bigger number is better. Everything else is assumed to be
+#: a count where smaller is better.
+RATES = (
+    u'draws_per_second', u'reifies_per_second', u'round_trips_per_second',
+    u'tracker_keys_per_second',
+)
+
+
+def standard_benchmarks():
+    """Returns an OrderedDict mapping names to functions which build the
+    strategy to benchmark.
+
+    Strategies are built lazily so that a strategy which can't be built in
+    this environment only loses its own benchmark.
+
+    """
+    benchmarks = OrderedDict()
+
+    def bench(name, build):
+        benchmarks[name] = build
+
+    bench(u'just', lambda: st.just(1))
+    bench(u'none', st.none)
+    bench(u'booleans', st.booleans)
+    bench(u'integers', st.integers)
+    bench(u'integers(bounded)', lambda: st.integers(0, 1000))
+    bench(u'floats', st.floats)
+    bench(u'floats(bounded)', lambda: st.floats(0.0, 1.0))
+    bench(u'complex_numbers', st.complex_numbers)
+    bench(u'fractions', st.fractions)
+    bench(u'decimals', st.decimals)
+    bench(u'text', st.text)
+    bench(u'binary', st.binary)
+    bench(u'uuids', st.uuids)
+    bench(u'randoms', st.randoms)
+    bench(u'sampled_from', lambda: st.sampled_from(range(10)))
+    bench(u'one_of', lambda: st.one_of(st.integers(), st.text()))
+    bench(u'tuples', lambda: st.tuples(st.integers(), st.booleans()))
+    bench(u'lists', lambda: st.lists(st.integers()))
+    bench(u'lists(unique)', lambda: st.lists(st.integers(), unique=True))
+    bench(u'sets', lambda: st.sets(st.integers()))
+    bench(u'frozensets', lambda: st.frozensets(st.integers()))
+    bench(u'dictionaries', lambda: st.dictionaries(st.integers(), st.text()))
+    bench(u'fixed_dictionaries', lambda: st.fixed_dictionaries({
+        u'a': st.integers(), u'b': st.text()}))
+    bench(u'streaming', lambda: st.streaming(st.integers()))
+    bench(u'permutations', lambda: st.permutations(list(range(10))))
+    bench(u'builds', lambda: st.builds(complex, st.floats(), st.floats()))
+    bench(u'map', lambda: st.integers().map(str))
+    bench(u'filter', lambda: st.integers().filter(lambda x: x % 2))
+    bench(u'flatmap', lambda: st.integers(0, 10).flatmap(
+        lambda n: st.lists(st.integers(), min_size=n, max_size=n)))
+    bench(u'recursive', lambda: st.recursive(
+        st.booleans(), lambda x: st.lists(x, average_size=2)))
+    bench(u'composite', lambda: composite_pairs())
+    bench(u'shared', lambda: st.shared(st.integers()))
+    bench(u'choices', st.choices)
+    bench(u'basic', lambda: st.basic(
+        generate=lambda random, _: random.randint(0, 1000),
+        simplify=lambda random, x: range(x)))
+
+    def datetimes():
+        from hypothesis.extra.datetime import datetimes
+        return datetimes()
+    bench(u'extra.datetime.datetimes', datetimes)
+
+    def dates():
+        from hypothesis.extra.datetime import dates
+        return dates()
+    bench(u'extra.datetime.dates', dates)
+
+    def times():
+        from hypothesis.extra.datetime import times
+        return times()
+    bench(u'extra.datetime.times', times)
+
+    def fake_factory():
+        from hypothesis.extra.fakefactory import fake_factory
+        return fake_factory(u'name')
+    bench(u'extra.fakefactory.fake_factory', fake_factory)
+
+    def arrays():
+        from hypothesis.extra.numpy import arrays
+        return arrays(u'int32', (5, 5))
+    bench(u'extra.numpy.arrays', arrays)
+
+    return benchmarks
+
+
+def composite_pairs():
+    @st.composite
+    def pairs(draw):
+        x = draw(st.integers())
+        return (x, draw(st.integers(min_value=x)))
+    return pairs()
+
+
+def draw_template(strategy, random):
+    while True:
+        try:
+            parameter = strategy.draw_parameter(random)
+            return strategy.draw_template(random, parameter)
+        except BadTemplateDraw:
+            pass
+
+
+def reify(strategy, template):
+    """Reify template, returning whether it satisfied any assumptions made
+    along the way (e.g. by filter)."""
+    try:
+        with BuildContext():
+            strategy.reify(template)
+        return True
+    except UnsatisfiedAssumption:
+        return False
+
+
+def rate(f, values, duration):
+    """Call f on values, cycling through them until duration seconds have
+    passed, and return the number of calls per second."""
+    calls = 0
+    start = time.time()
+    while True:
+        for v in values:
+            f(v)
+        calls += len(values)
+        elapsed = time.time() - start
+        if elapsed >= duration:
+            return calls / elapsed
+
+
+def bytes_per_template(strategy, seed, templates=200):
+    """Returns the average number of bytes allocated and still alive per
+    template when drawing many templates, or None if we can't measure
+    that."""
+    if tracemalloc is None or tracemalloc.is_tracing():  # pragma: no cover
+        return None
+    random = Random(seed)
+    # Warm up any caches on the strategy so they aren't counted.
+    draw_template(strategy, random)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        drawn = [draw_template(strategy, random) for _ in range(templates)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert len(drawn) == templates
+    return (after - before) / templates
+
+
+def shrink_steps(strategy, random, max_candidates=5000):
+    """Repeatedly replace a template with the first simpler one that reifies
+    successfully until there are none left, like a test which always fails
+    would. Returns the number of replacements made and the number of
+    candidates that were tried to find them."""
+    tracker = Tracker()
+    template = draw_template(strategy, random)
+    tracker.track(template)
+    reify(strategy, template)
+    steps = 0
+    candidates = 0
+    while candidates < max_candidates:
+        for simpler in strategy.full_simplify(random, template):
+            candidates += 1
+            if candidates >= max_candidates:
+                break
+            if tracker.track(simpler) > 1:
+                continue
+            if not reify(strategy, simpler):
+                continue
+            template = simpler
+            steps += 1
+            break
+        else:
+            break
+    return steps, candidates
+
+
+def benchmark_strategy(strategy, duration=0.2, seed=0, templates=20):
+    random = Random(seed)
+    drawn = [draw_template(strategy, random) for _ in range(templates)]
+    basics = [strategy.to_basic(t) for t in drawn]
+
+    steps, candidates = shrink_steps(strategy, Random(seed))
+    return OrderedDict([
+        (u'draws_per_second', rate(
+            lambda r: draw_template(strategy, r), [random], duration)),
+        (u'reifies_per_second', rate(
+            lambda t: reify(strategy, t), drawn, duration)),
+        (u'round_trips_per_second', rate(
+            lambda b: strategy.to_basic(strategy.from_basic(b)), basics,
+            duration)),
+        (u'tracker_keys_per_second', rate(
+            object_to_tracking_key, drawn, duration)),
+        (u'bytes_per_template', bytes_per_template(strategy, seed)),
+        (u'shrink_steps', steps),
+        (u'shrink_candidates', candidates),
+    ])
+
+
+def run_benchmarks(benchmarks=None, names=None, duration=0.2, seed=0):
+    """Returns an OrderedDict mapping each benchmark name to its results.
+
+    Benchmarks whose strategy could not be built (usually because an
+    optional dependency is missing) map to a dict with an 'error' key
+    instead.
+
+    """
+    if benchmarks is None:
+        benchmarks = standard_benchmarks()
+    results = OrderedDict()
+    for name, build in benchmarks.items():
+        if names and not any(n in name for n in names):
+            continue
+        try:
+            strategy = build()
+        except ImportError as e:
+            results[name] = {u'error': u'%s' % (e,)}
+            continue
+        results[name] = benchmark_strategy(
+            strategy, duration=duration, seed=seed)
+    return results
+
+
+def compare(
+    baseline, results, tolerance=0.2, higher_is_better=RATES,
+    informational=(),
+):
+    """Returns a list of (name, metric, old, new) for every metric in results
+    which is worse than in baseline by more than a factor of
+    1 + tolerance.
+
+    Metrics named in higher_is_better get worse by going down, all others
+    by going up. Metrics named in informational are never regressions.
+
+    """
+    regressions = []
+    for name, metrics in results.items():
+        old_metrics = baseline.get(name)
+        if not old_metrics or u'error' in old_metrics or u'error' in metrics:
+            continue
+        for metric, new in metrics.items():
+            old = old_metrics.get(metric)
+            if old is None or new is None or metric in informational:
+                continue
+            if metric in higher_is_better:
+                worse = new * (1 + tolerance) < old
+            else:
+                worse = new > old * (1 + tolerance)
+            if worse:
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def format_results(results):
+    lines = [u'%-32s %10s %10s %10s %10s %8s %7s' % (
+        u'strategy', u'draws/s', u'reifies/s', u'basic/s', u'keys/s',
+        u'bytes', u'shrink')]
+    for name, metrics in results.items():
+        if u'error' in metrics:
+            lines.append(u'%-32s skipped: %s' % (name, metrics[u'error']))
+            continue
+        size = metrics[u'bytes_per_template']
+        lines.append(u'%-32s %10.0f %10.0f %10.0f %10.0f %8s %7d' % (
+            name,
+            metrics[u'draws_per_second'],
+            metrics[u'reifies_per_second'],
+            metrics[u'round_trips_per_second'],
+            metrics[u'tracker_keys_per_second'],
+            u'-' if size is None else u'%.0f' % (size,),
+            metrics[u'shrink_steps'],
+        ))
+    return u'\n'.join(lines)
+
+
+def main(argv=None):
+    # optparse rather than argparse, as argparse isn't in the standard
+    # library on Python 2.6.
+    parser = optparse.OptionParser(
+        prog=u'python -m hypothesis.tools.bench',
+        usage=u'%prog [options] [names...]',
+        description=u'Benchmark the built in Hypothesis strategies.')
+    parser.add_option(
+        u'--duration', type=u'float', default=0.2,
+        help=u'Seconds to spend on each measurement.')
+    parser.add_option(u'--seed', type=u'int', default=0)
+    parser.add_option(
+        u'--output', help=u'Write the results as JSON to this file.')
+    parser.add_option(
+        u'--baseline', help=u'Compare against results saved with --output.')
+    parser.add_option(
+        u'--tolerance', type=u'float', default=0.2,
+        help=u'How much worse than the baseline counts as a regression.')
+    args, names = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        names=names, duration=args.duration, seed=args.seed)
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, u'w') as o:
+            json.dump(results, o, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as i:
+            baseline = json.load(i)
+        regressions = compare(baseline, results, tolerance=args.tolerance)
+        for name, metric, old, new in regressions:
+            print(u'%s: %s went from %.2f to %.2f' % (name, metric, old, new))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == u'__main__':
+    sys.exit(main())
@@ -0,0 +1,369 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+"""A corpus of failing predicates for measuring how well and how cheaply
+find() shrinks.
+
+Run this as python -m hypothesis.tools.shrinkbench. For every problem in the
+corpus it runs find() with a few different seeds and records the number of
+times the predicate was called, how long it took, how big the final example
+was and how often that example was the known minimal one.
+
+Each run stops once the predicate has been called --max-calls times,
+keeping the smallest example found so far, rather than being cut off by a
+timeout. Some problems (the stateful ones in particular) can take many
+thousands of calls to shrink fully, and stopping after a fixed number of
+calls keeps the results the same from one run to the next where a time
+limit wouldn't.
+
+As with hypothesis.tools.bench, results can be saved with --output and
+compared against a saved baseline with --baseline, in which case the exit
+code is 1 if the number of calls or the final size got worse by more than
+--tolerance, or the minimal rate went down. These only depend on the seeds
+and --max-calls, so are reliable to gate on. --timeout is only there as a
+backstop: a run which hits it makes the results depend on how fast the
+machine is. How long things took is too noisy to gate on and is only
+reported.
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import sys
+import json
+import time
+import optparse
+from random import Random
+from collections import namedtuple
+
+import hypothesis.strategies as st
+from hypothesis import find, Settings
+from hypothesis.errors import Timeout, NoSuchExample
+from hypothesis.stateful import TOMBSTONE, rule, Bundle, \
+    RuleBasedStateMachine, StateMachineSearchStrategy
+from hypothesis.tools.bench import compare
+from hypothesis.internal.compat import OrderedDict
+from hypothesis.internal.reflection import get_pretty_function_description
+
+#: A single entry in the corpus. strategy is a function returning the
+#: strategy to pass to find, so that building the corpus is cheap. expected
+#: is the minimal example if there is a unique one, and size is a function
+#: measuring how big an example is (len of its repr if None).
+ShrinkProblem = namedtuple(
+    u'ShrinkProblem', (u'strategy', u'condition', u'expected', u'size'))
+
+#: Metrics where a bigger number is better.
+HIGHER_IS_BETTER = (u'minimal_rate',)
+
+#: Metrics which are reported but never count as a regression.
+INFORMATIONAL = (u'seconds',)
+
+#: How many times each run of find() may call its predicate.
+MAX_CALLS = 1000
+
+
+class CallBudgetExhausted(Exception):
+
+    """Raised from inside find() to stop it once it has called the predicate
+    as many times as it's allowed to."""
+
+
+def sorts_away_duplicates(xs):
+    return sorted(set(xs)) != sorted(xs)
+
+
+def bubble_sort_makes_one_pass(xs):
+    xs = list(xs)
+    result = list(xs)
+    for i in range(len(result) - 1):
+        if result[i] > result[i + 1]:
+            result[i], result[i + 1] = result[i + 1], result[i]
+    return result != sorted(xs)
+
+
+def tree_depth(tree):
+    if isinstance(tree, list):
+        return 1 + max([tree_depth(t) for t in tree] or [0])
+    return 0
+
+
+class LeakyStack(RuleBasedStateMachine):
+
+    """A stack which loses elements once it has more than three in it."""
+
+    values = Bundle(u'values')
+
+    def __init__(self):
+        super(LeakyStack, self).__init__()
+        self.model = []
+        self.stack = []
+
+    @rule(target=values, value=st.integers())
+    def value(self, value):
+        return value
+
+    @rule(value=values)
+    def push(self, value):
+        self.model.append(value)
+        if len(self.stack) < 3:
+            self.stack.append(value)
+
+    @rule()
+    def pop(self):
+        if self.model:
+            assert self.stack.pop() == self.model.pop()
+
+
+class LeakyQueue(RuleBasedStateMachine):
+
+    """A queue which drops values pushed while it holds ten.
+
+    The smallest failing program pushes eleven values and pops them all
+    again, but random programs only fail once they are long, so this mostly
+    measures how quickly irrelevant steps get deleted.
+
+    """
+
+    values = Bundle(u'values')
+
+    def __init__(self):
+        super(LeakyQueue, self).__init__()
+        self.model = []
+        self.queue = []
+
+    @rule(target=values, value=st.booleans())
+    def value(self, value):
+        return value
+
+    @rule(value=values)
+    def push(self, value):
+        self.model.append(value)
+        if len(self.queue) < 10:
+            self.queue.append(value)
+
+    @rule()
+    def pop(self):
+        if self.model:
+            assert self.queue.pop(0) == self.model.pop(0)
+
+    @rule(value=values)
+    def inspect(self, value):
+        pass
+
+
+def breaks_state_machine(factory):
+    def condition(runner):
+        try:
+            runner.run(factory())
+            return False
+        except AssertionError:
+            return True
+        except IndexError:
+            return True
+    return condition
+
+
+def program_size(runner):
+    return len([step for step in runner.record if step is not TOMBSTONE])
+
+
+def standard_corpus():
+    corpus = OrderedDict()
+    corpus[u'sum_of_list'] = ShrinkProblem(
+        lambda: st.lists(st.integers()),
+        lambda xs: sum(xs) > 1000, [1001], None)
+    corpus[u'three_positive_in_a_row'] = ShrinkProblem(
+        lambda: st.lists(st.integers(), average_size=100),
+        lambda xs: any(
+            xs[i] > 0 and xs[i + 1] > 0 and xs[i + 2] > 0
+            for i in range(len(xs) - 2)),
+        [1, 1, 1], None)
+    corpus[u'sort_drops_duplicates'] = ShrinkProblem(
+        lambda: st.lists(st.integers()),
+        sorts_away_duplicates, [0, 0], None)
+    corpus[u'sort_makes_one_pass'] = ShrinkProblem(
+        lambda: st.lists(st.integers()),
+        bubble_sort_makes_one_pass, None, None)
+    corpus[u'large_pair'] = ShrinkProblem(
+        lambda: st.tuples(st.integers(), st.integers()),
+        lambda x: x[0] + x[1] > 100 and x[0] < x[1], (0, 101), None)
+    corpus[u'text_with_non_ascii'] = ShrinkProblem(
+        lambda: st.text(),
+        lambda s: any(ord(c) > 127 for c in s), None, None)
+    corpus[u'dictionary_with_three_keys'] = ShrinkProblem(
+        lambda: st.dictionaries(st.integers(), st.text()),
+        lambda d: len(d) >= 3, None, None)
+    corpus[u'deep_tree'] = ShrinkProblem(
+        lambda: st.recursive(
+            st.booleans(), lambda x: st.lists(x, average_size=3)),
+        lambda t: tree_depth(t) >= 4, [[[[]]]], None)
+    corpus[u'stateful_leaky_stack'] = ShrinkProblem(
+        lambda: StateMachineSearchStrategy(),
+        breaks_state_machine(LeakyStack), None, program_size)
+    corpus[u'stateful_long_program'] = ShrinkProblem(
+        lambda: StateMachineSearchStrategy(Settings(stateful_step_count=200)),
+        breaks_state_machine(LeakyQueue), None, program_size)
+    return corpus
+
+
+def run_problem(
+    problem, seed, max_shrinks=5000, max_calls=MAX_CALLS, timeout=60
+):
+    calls = [0]
+    found = []
+
+    def condition(x):
+        if calls[0] >= max_calls:
+            raise CallBudgetExhausted()
+        calls[0] += 1
+        if problem.condition(x):
+            # find only ever moves on to examples which satisfy the
+            # condition, so the last of these is the best it has.
+            found[:] = [x]
+            return True
+        return False
+
+    settings = Settings(
+        database=None, max_examples=5000, max_shrinks=max_shrinks,
+        timeout=timeout, min_satisfying_examples=0,
+    )
+    start = time.time()
+    try:
+        result = find(
+            problem.strategy(), condition, settings=settings,
+            random=Random(seed))
+    except CallBudgetExhausted:
+        if not found:
+            raise NoSuchExample(
+                get_pretty_function_description(problem.condition),
+                u' in %d calls' % (max_calls,))
+        result = found[0]
+    runtime = time.time() - start
+    size = (problem.size or (lambda x: len(repr(x))))(result)
+    return result, calls[0], runtime, size
+
+
+def run_corpus(
+    corpus=None, names=None, seeds=3, max_calls=MAX_CALLS, timeout=60
+):
+    """Returns an OrderedDict mapping each problem name to its results
+    averaged over the given number of seeds.
+
+    Problems for which no failing example was found in time map to a dict
+    with an 'error' key instead.
+
+    """
+    if corpus is None:
+        corpus = standard_corpus()
+    results = OrderedDict()
+    for name, problem in corpus.items():
+        if names and not any(n in name for n in names):
+            continue
+        calls = []
+        runtimes = []
+        sizes = []
+        minimal = 0
+        try:
+            for seed in range(seeds):
+                result, c, runtime, size = run_problem(
+                    problem, seed, max_calls=max_calls, timeout=timeout)
+                calls.append(c)
+                runtimes.append(runtime)
+                sizes.append(size)
+                if problem.expected is not None and result == \
+                        problem.expected:
+                    minimal += 1
+        except (Timeout, NoSuchExample) as e:
+            results[name] = {u'error': u'%s' % (e,)}
+            continue
+        metrics = OrderedDict([
+            (u'calls', sum(calls) / seeds),
+            (u'seconds', sum(runtimes) / seeds),
+            (u'size', max(sizes)),
+        ])
+        if problem.expected is not None:
+            metrics[u'minimal_rate'] = minimal / seeds
+        results[name] = metrics
+    return results
+
+
+def format_results(results):
+    lines = [u'%-32s %10s %10s %8s %8s' % (
+        u'problem', u'calls', u'seconds', u'size', u'minimal')]
+    for name, metrics in results.items():
+        if u'error' in metrics:
+            lines.append(u'%-32s failed: %s' % (name, metrics[u'error']))
+            continue
+        if u'minimal_rate' in metrics:
+            minimal = u'%.0f%%' % (100 * metrics[u'minimal_rate'],)
+        else:
+            minimal = u'-'
+        lines.append(u'%-32s %10.1f %10.3f %8d %8s' % (
+            name, metrics[u'calls'], metrics[u'seconds'], metrics[u'size'],
+            minimal,
+        ))
+    return u'\n'.join(lines)
+
+
+def main(argv=None):
+    # optparse rather than argparse, as argparse isn't in the standard
+    # library on Python 2.6.
+    parser = optparse.OptionParser(
+        prog=u'python -m hypothesis.tools.shrinkbench',
+        usage=u'%prog [options] [names...]',
+        description=u'Measure how well find() shrinks a corpus of problems.')
+    parser.add_option(
+        u'--seeds', type=u'int', default=3,
+        help=u'How many times to run each problem.')
+    parser.add_option(
+        u'--max-calls', type=u'int', default=MAX_CALLS,
+        help=u'How many times each run of find() may call its predicate.')
+    parser.add_option(
+        u'--timeout', type=u'float', default=60,
+        help=u'Timeout for each run of find().')
+    parser.add_option(
+        u'--output', help=u'Write the results as JSON to this file.')
+    parser.add_option(
+        u'--baseline', help=u'Compare against results saved with --output.')
+    parser.add_option(
+        u'--tolerance', type=u'float', default=0.2,
+        help=u'How much worse than the baseline counts as a regression.')
+    args, names = parser.parse_args(argv)
+
+    results = run_corpus(
+        names=names, seeds=args.seeds, max_calls=args.max_calls,
+        timeout=args.timeout)
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, u'w') as o:
+            json.dump(results, o, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as i:
+            baseline = json.load(i)
+        regressions = compare(
+            baseline, results, tolerance=args.tolerance,
+            higher_is_better=HIGHER_IS_BETTER, informational=INFORMATIONAL)
+        for name, metric, old, new in regressions:
+            print(u'%s: %s went from %.2f to %.2f' % (name, metric, old, new))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == u'__main__':
+    sys.exit(main())
@@ -21,6 +21,7 @@ from random import Random
 from itertools import islice
 
 from hypothesis.errors import InvalidArgument
+from hypothesis.internal.compat import hrange
 
 
 class RandomWithSeed(Random):
@@ -49,6 +50,11 @@ class RandomWithSeed(Random):
         return u'RandomWithSeed(%s)' % (self.seed,)
 
 
+#: Values a stream has been modified at are stored in chunks of this many
+#: consecutive indices, so a modified stream only copies the chunk it changes.
+STREAM_CHUNK_SIZE = 32
+
+
 class Stream(object):
 
     """A stream is a possibly infinite list. You can index into it, and you can
@@ -64,26 +70,51 @@ class Stream(object):
 
     """
 
+    __slots__ = (u'generator', u'source', u'chunks', u'length')
+
     def __init__(self, generator=None):
+        if isinstance(generator, Stream):
+            # Share everything generator has evaluated rather than wrapping
+            # it. Streams never modify values in place, so this is safe.
+            self.generator = generator.generator
+            self.source = generator.source
+            self.chunks = generator.chunks
+            self.length = 0
+            return
         if generator is None:
             generator = iter(())
         elif not inspect.isgenerator(generator):
             generator = iter(generator)
         self.generator = generator
-        self.fetched = []
+        # Values produced by generator, shared with every stream derived from
+        # this one.
+        self.source = []
+        # Maps chunk numbers to lists of values which replace the ones from
+        # source for that chunk. Derived streams copy this mapping and
+        # replace only the chunks they change.
+        self.chunks = {}
+        # How much of this stream has been evaluated.
+        self.length = 0
+
+    @property
+    def fetched(self):
+        return [self._get(i) for i in hrange(self.length)]
 
     def map(self, f):
         return Stream(f(v) for v in self)
 
     def __iter__(self):
         i = 0
-        while i < len(self.fetched):
-            yield self.fetched[i]
-            i += 1
         while True:
-            v = next(self.generator)
-            self.fetched.append(v)
-            yield v
+            if i >= len(self.source):
+                try:
+                    self.source.append(next(self.generator))
+                except StopIteration:
+                    return
+            if i >= self.length:
+                self.length = i + 1
+            yield self._get(i)
+            i += 1
 
     def __getitem__(self, key):
         if isinstance(key, slice):
@@ -95,39 +126,60 @@ class Stream(object):
         if not isinstance(key, int):
             raise InvalidArgument(u'Cannot index stream with %s' % (
                 type(key).__name__,))
+        if key < 0:
+            if key + self.length < 0:
+                raise IndexError(u'Stream index %d out of range' % (key,))
+            return self._get(key + self.length)
         self._thunk_to(key + 1)
-        return self.fetched[key]
+        return self._get(key)
 
     def with_value(self, i, value):
-        s = Stream(self)
-        s._thunk_to(i + 1)
-        s.fetched[i] = value
-        return s
+        return self.with_values(((i, value),))
 
     def with_values(self, updates):
         s = Stream(self)
         for i, value in updates:
             s._thunk_to(i + 1)
-            s.fetched[i] = value
+            block, offset = divmod(i, STREAM_CHUNK_SIZE)
+            start = block * STREAM_CHUNK_SIZE
+            chunk = s.chunks.get(block)
+            if chunk is None or chunk is self.chunks.get(block):
+                chunk = [
+                    s._get(j) for j in hrange(
+                        start, min(start + STREAM_CHUNK_SIZE, len(s.source)))
+                ]
+                if s.chunks is self.chunks:
+                    s.chunks = dict(self.chunks)
+                s.chunks[block] = chunk
+            while len(chunk) <= offset:
+                chunk.append(s.source[start + len(chunk)])
+            chunk[offset] = value
         return s
 
+    def _get(self, i):
+        chunk = self.chunks.get(i // STREAM_CHUNK_SIZE)
+        if chunk is not None:
+            offset = i % STREAM_CHUNK_SIZE
+            if offset < len(chunk):
+                return chunk[offset]
+        return self.source[i]
+
     def _thunk_to(self, i):
-        it = iter(self)
-        try:
-            while len(self.fetched) < i:
-                next(it)
-        except StopIteration:
-            raise IndexError(
-                u'Index %d out of bounds for finite stream of length %d' % (
-                    i, len(self.fetched)
-                )
-            )
+        while len(self.source) < i:
+            try:
+                self.source.append(next(self.generator))
+            except StopIteration:
+                raise IndexError((
+                    u'Index %d out of bounds for finite stream of length %d'
+                ) % (i, len(self.source)))
+        if self.length < i:
+            self.length = i
 
     def _thunked(self):
-        return len(self.fetched)
+        return self.length
 
     def __repr__(self):
-        if not self.fetched:
+        if not self.length:
             return u'Stream(...)'
 
         return u'Stream(%s, ...)' % (
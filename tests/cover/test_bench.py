@@ -0,0 +1,110 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+import json
+
+import pytest
+
+import hypothesis.strategies as st
+from hypothesis.tools.bench import RATES, main, compare, run_benchmarks, \
+    format_results, standard_benchmarks
+
+
+def broken():
+    import hypothesis.this_module_does_not_exist  # noqa
+
+
+SMALL = dict(
+    integers=st.integers,
+    lists=lambda: st.lists(st.integers()),
+    filtered=lambda: st.integers().filter(lambda x: x % 2),
+    broken=broken,
+)
+
+
+def test_measures_every_metric():
+    results = run_benchmarks(SMALL, duration=0.001)
+    for name in (u'integers', u'lists', u'filtered'):
+        metrics = results[name]
+        for rate in RATES:
+            assert metrics[rate] > 0
+        assert metrics[u'shrink_steps'] <= metrics[u'shrink_candidates']
+        assert metrics[u'bytes_per_template'] is None or \
+            metrics[u'bytes_per_template'] >= 0
+
+
+def test_reports_strategies_that_cannot_be_built():
+    results = run_benchmarks(SMALL, duration=0.001)
+    assert u'error' in results[u'broken']
+    assert u'skipped' in format_results(results)
+
+
+def test_can_select_benchmarks_by_name():
+    results = run_benchmarks(SMALL, names=[u'int'], duration=0.001)
+    assert list(results) == [u'integers']
+
+
+def test_standard_benchmarks_cover_the_strategies_module():
+    names = set(standard_benchmarks())
+    for name in st.__all__ + [u'permutations', u'shared', u'choices']:
+        assert name in names
+
+
+def test_compare_only_reports_things_that_got_worse():
+    baseline = {
+        u'a': {u'draws_per_second': 100.0, u'shrink_steps': 10},
+        u'b': {u'error': u'no'},
+    }
+    results = {
+        u'a': {u'draws_per_second': 50.0, u'shrink_steps': 5},
+        u'b': {u'draws_per_second': 1.0},
+        u'c': {u'draws_per_second': 1.0},
+    }
+    assert compare(baseline, results) == [
+        (u'a', u'draws_per_second', 100.0, 50.0)]
+    results[u'a'] = {u'draws_per_second': 150.0, u'shrink_steps': 20}
+    assert compare(baseline, results) == [(u'a', u'shrink_steps', 10, 20)]
+    assert compare(baseline, results, tolerance=2) == []
+
+
+def test_main_saves_and_compares_json(tmpdir, capsys):
+    output = str(tmpdir.join(u'bench.json'))
+    assert main([u'booleans', u'--duration', u'0.001', u'--output', output]) \
+        == 0
+    with open(output) as i:
+        saved = json.load(i)
+    assert list(saved) == [u'booleans']
+
+    saved[u'booleans'][u'draws_per_second'] = float(u'inf')
+    with open(output, u'w') as o:
+        json.dump(saved, o)
+    assert main([
+        u'booleans', u'--duration', u'0.001', u'--baseline', output]) == 1
+    out, _ = capsys.readouterr()
+    assert u'booleans: draws_per_second went from inf' in out
+
+
+def test_main_accepts_options_before_names(capsys):
+    assert main([u'--duration', u'0.001', u'--seed', u'1', u'booleans']) == 0
+    out, _ = capsys.readouterr()
+    assert [line.split()[0] for line in out.splitlines()[1:]] == [u'booleans']
+
+
+def test_main_rejects_bad_options(capsys):
+    with pytest.raises(SystemExit):
+        main([u'--duration', u'soon'])
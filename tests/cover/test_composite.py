@@ -16,12 +16,17 @@
 
 from __future__ import division, print_function, absolute_import
 
+from random import Random
+
 import pytest
 
 import hypothesis.strategies as st
 from hypothesis import find, given, assume
 from hypothesis.errors import InvalidArgument
+from hypothesis.control import BuildContext
 from hypothesis.internal.compat import hrange
+from hypothesis.internal.debug import some_template
+from hypothesis.searchstrategy.composite import same_strategy
 
 
 @st.composite
@@ -94,3 +99,65 @@ def test_composite_of_lists():
         return draw(st.integers()) + draw(st.integers())
 
     assert find(st.lists(f()), lambda x: len(x) >= 10) == [0] * 10
+
+
+def test_records_draws_on_the_template():
+    strategy = badly_draw_lists()
+    template = some_template(strategy, Random(0))
+    with BuildContext():
+        value = strategy.reify(template)
+    assert len(template.known_draws()) == len(value) + 1
+
+
+def test_reify_does_not_change_the_template():
+    strategy = badly_draw_lists()
+    template = some_template(strategy, Random(0))
+    tracked = template.__trackas__()
+    basic = strategy.to_basic(template)
+    with BuildContext():
+        strategy.reify(template)
+    assert template.__trackas__() == tracked
+    assert strategy.to_basic(template) == basic
+
+
+def test_reifies_simplified_templates_consistently():
+    strategy = badly_draw_lists()
+    template = some_template(strategy, Random(2))
+    with BuildContext():
+        value = strategy.reify(template)
+        for simpler in strategy.full_simplify(Random(0), template):
+            result = strategy.reify(simpler)
+            assert strategy.reify(simpler) == result
+            copied = strategy.from_basic(strategy.to_basic(simpler))
+            assert strategy.reify(copied) == result
+        assert strategy.reify(template) == value
+
+
+def test_round_trips_draws_through_the_database():
+    strategy = badly_draw_lists()
+    template = some_template(strategy, Random(1))
+    with BuildContext():
+        value = strategy.reify(template)
+        copied = strategy.from_basic(strategy.to_basic(template))
+        assert strategy.reify(copied) == value
+
+
+def test_strategies_from_the_same_call_are_the_same():
+    assert same_strategy(
+        st.lists(st.integers(), min_size=1),
+        st.lists(st.integers(), min_size=1))
+    assert not same_strategy(
+        st.lists(st.integers(), min_size=1),
+        st.lists(st.integers(), min_size=2))
+    assert not same_strategy(st.integers(), st.text())
+
+
+@st.composite
+def bounded_lists(draw):
+    lower = draw(st.integers())
+    upper = draw(st.integers(min_value=lower))
+    return draw(st.lists(st.integers(min_value=lower, max_value=upper)))
+
+
+def test_simplifies_draws_from_dependent_strategies():
+    assert find(bounded_lists(), lambda x: len(x) >= 2) == [0, 0]
@@ -113,3 +113,35 @@ def test_does_not_leave_build_context_active_if_captured():
     with BuildContext(close_on_capture=False) as c:
         c.mark_captured()
     assert _current_build_context.value is None
+
+
+def test_context_is_reusable_only_if_nothing_used_it():
+    with BuildContext() as context:
+        pass
+    assert context.reusable()
+    with context:
+        cleanup(lambda: None)
+    assert not context.reusable()
+    with BuildContext() as context:
+        context.mark_captured()
+    assert not context.reusable()
+
+
+def test_given_runs_cleanup_for_every_example():
+    from hypothesis import given, Settings
+    from hypothesis.strategies import integers
+    contexts = []
+    cleaned = []
+
+    @given(integers(), settings=Settings(max_examples=20, database=None))
+    def test(x):
+        contexts.append(current_build_context())
+        if x % 2:
+            cleanup(lambda: cleaned.append(x))
+
+    test()
+    # A context stops being reused as soon as an example registers cleanup
+    # with it, so each one ran exactly one example's cleanup.
+    assert len(cleaned) == len(set(id(c) for c in contexts if c.tasks))
+    assert all(len(c.tasks) <= 1 for c in contexts)
+    assert len(set(map(id, contexts))) < len(contexts)
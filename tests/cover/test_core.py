@@ -17,13 +17,17 @@
 from __future__ import division, print_function, absolute_import
 
 import time
+from random import Random
 
 import pytest
 
 import hypothesis.strategies as s
 from hypothesis import find, given, assume, Settings
+from hypothesis.core import prefetching, reify_and_execute, \
+    best_satisfying_template
 from hypothesis.errors import NoSuchExample, Unsatisfiable
-from hypothesis.internal.tracker import Tracker
+from hypothesis.internal.tracker import Tracker, OutcomeCache
+from hypothesis.internal.strategymethod import strategy
 
 
 def test_stops_after_max_examples_if_satisfying():
@@ -76,6 +80,19 @@ def test_can_time_out_in_simplify():
     run_time = finish - start
     assert run_time <= 0.3
 
+
+def test_can_run_out_of_shrink_budget_before_timeout():
+    def slow_sum(xs):
+        time.sleep(0.01)
+        return sum(xs) >= 100
+    start = time.time()
+    result = find(
+        s.lists(s.integers(0, 10), min_size=50), slow_sum,
+        settings=Settings(timeout=10, shrink_timeout=0.1, database=None)
+    )
+    assert sum(result) >= 100
+    assert time.time() - start <= 2
+
 some_normal_settings = Settings()
 
 
@@ -92,3 +109,94 @@ def test_settings_are_default_in_find():
     find(
         s.booleans(), lambda x: Settings.default is some_normal_settings,
         settings=some_normal_settings)
+
+
+def test_does_not_rerun_test_on_equal_values():
+    calls = [0]
+
+    @given(s.integers().map(lambda x: x % 3), settings=Settings(
+        max_examples=100, database=None))
+    def test(x):
+        calls[0] += 1
+    test()
+    assert calls[0] <= 3
+
+
+def test_find_does_not_rerun_condition_on_equal_values():
+    calls = [0]
+
+    def condition(x):
+        calls[0] += 1
+        return False
+
+    with pytest.raises(NoSuchExample):
+        find(
+            s.integers().map(lambda x: x % 3), condition,
+            settings=Settings(max_examples=100, database=None))
+    assert calls[0] <= 3
+
+
+def test_reports_failure_for_cached_falsifying_values():
+    @given(s.lists(s.integers()).map(len), settings=Settings(database=None))
+    def test(x):
+        assert x < 3
+
+    with pytest.raises(AssertionError):
+        test()
+
+
+def test_prefetching_is_a_no_op_without_prefetch():
+    xs = iter([1, 2, 3])
+    assert prefetching(xs, lambda x: True) is xs
+
+
+def test_prefetching_announces_upcoming_templates():
+    batches = []
+
+    def condition(x):
+        return False
+    condition.prefetch = batches.append
+    condition.prefetch_size = 3
+
+    assert list(prefetching(iter(range(5)), condition)) == list(range(5))
+    assert batches == [[0, 1, 2], [1, 2, 3], [2, 3, 4], [3, 4], [4]]
+
+
+def test_every_template_is_prefetched_before_it_is_needed():
+    strategy = s.lists(s.integers()).wrapped_strategy
+    prefetched = []
+    checked = []
+
+    def condition(template):
+        assert any(t is template for t in prefetched)
+        checked.append(template)
+        return sum(strategy.reify(template)) >= 10
+    condition.prefetch = prefetched.extend
+    condition.prefetch_size = 4
+
+    result = best_satisfying_template(
+        strategy, Random(0), condition, Settings(database=None), None)
+    assert strategy.reify(result) == [10]
+    assert len(checked) > 1
+
+
+def test_cached_failures_are_reported_with_their_example():
+    search = strategy(
+        s.tuples(s.tuples(s.integers()), s.fixed_dictionaries({})))
+    template = search.draw_and_produce(Random(0))
+    cache = OutcomeCache()
+
+    def test(x):
+        raise ValueError(x)
+
+    for _ in range(2):
+        record_repr = [None]
+        with pytest.raises(ValueError):
+            reify_and_execute(
+                search, template, test, record_repr=record_repr,
+                outcome_cache=cache,
+            )()
+        assert record_repr[0] is not None
+    assert cache.hits == 1
+    for outcome in cache.outcomes.values():
+        assert getattr(outcome, u'__traceback__', None) is None
@@ -0,0 +1,130 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+import sys
+import json
+from random import Random
+
+import pytest
+import hypothesis.strategies as st
+from hypothesis import given, Settings
+from hypothesis.database import ExampleDatabase
+from tests.common.utils import capture_out
+from hypothesis.internal.corpus import MIN_SAMPLE_RATE, CoverageCorpus
+from hypothesis.database.backend import SQLiteBackend
+from hypothesis.internal.strategymethod import strategy
+
+integers = strategy(st.integers(min_value=-1000, max_value=1000))
+
+
+def branchy(x):
+    if x > 0:
+        return 1
+    return 0
+
+
+def parse(s):
+    if s[:1] == u'a':
+        if s[1:2] == u'b':
+            if s[2:3] == u'c':
+                raise ValueError(s)
+
+
+def make_corpus(storage=None, packages=(__name__,)):
+    return CoverageCorpus(integers, Random(0), packages, storage=storage)
+
+
+def run_and_record(corpus, x):
+    corpus.run(branchy, x)
+    corpus.record(x)
+
+
+def test_keeps_templates_which_cover_something_new():
+    corpus = make_corpus()
+    for x in [1, 2, -1, -2]:
+        run_and_record(corpus, x)
+    assert corpus.templates == [1, -1]
+
+
+def test_only_traces_code_in_the_given_packages():
+    corpus = make_corpus(packages=(u'json',))
+    corpus.run(branchy, 1)
+    assert not corpus.current
+    corpus.run(json.dumps, [1])
+    assert corpus.current
+    assert all(u'json' in filename for filename, _, _ in corpus.current)
+
+
+def test_restores_the_previous_trace_function():
+    previous = sys.gettrace()
+    with pytest.raises(ZeroDivisionError):
+        make_corpus().run(lambda: 1 / 0)
+    assert sys.gettrace() is previous
+
+
+def test_traces_fewer_examples_until_something_new_turns_up():
+    corpus = make_corpus()
+    for _ in range(100):
+        run_and_record(corpus, 1)
+    assert corpus.sample_rate == MIN_SAMPLE_RATE
+    run_and_record(corpus, -1)
+    assert corpus.sample_rate == 1.0
+
+
+def test_always_traces_templates_derived_from_the_corpus():
+    corpus = make_corpus()
+    run_and_record(corpus, 1)
+    corpus.sample_rate = 0.0
+    random = Random(0)
+    derived = [corpus.derive(random) for _ in range(20)]
+    derived = [t for t in derived if t is not None]
+    assert derived
+    assert all(corpus.should_trace(t) for t in derived)
+
+
+def test_saves_new_coverage_and_drops_stale_templates():
+    db = ExampleDatabase(backend=SQLiteBackend(u':memory:'))
+    try:
+        storage = db.storage(u'corpus')
+        corpus = make_corpus(storage)
+        for x in [1, -1]:
+            run_and_record(corpus, x)
+        assert sorted(storage.fetch(integers)) == [-1, 1]
+        storage.save(2, integers)
+
+        replay = make_corpus(storage)
+        for x in sorted(replay.stored_templates()):
+            assert replay.should_trace(x)
+            run_and_record(replay, x)
+        assert sorted(storage.fetch(integers)) == [-1, 1]
+    finally:
+        db.close()
+
+
+def test_finds_bugs_behind_nested_branches():
+    @given(st.text(alphabet=u'abcde'), settings=Settings(
+        database=None, coverage_guided=True, max_examples=1000,
+        max_iterations=2000,
+    ))
+    def test_parse(s):
+        parse(s)
+
+    with capture_out() as o:
+        with pytest.raises(ValueError):
+            test_parse()
+    assert u"test_parse(s='abc')" in o.getvalue()
@@ -17,15 +17,18 @@
 from __future__ import division, print_function, absolute_import
 
 import time
+from random import Random
 
 import pytest
 
+import hypothesis.core as core
 import hypothesis.settings as hs
 from hypothesis import given, assume
 from hypothesis.errors import Timeout, Unsatisfiable
-from hypothesis.database import ExampleDatabase
-from hypothesis.strategies import text, integers
+from hypothesis.database import ExampleDatabase, is_minimal_record
+from hypothesis.strategies import just, text, lists, integers
 from hypothesis.internal.compat import hrange, text_type, integer_types
+from hypothesis.internal.reflection import fully_qualified_name
 from hypothesis.database.backend import Backend, SQLiteBackend
 from hypothesis.database.formats import Format, JSONFormat
 
@@ -255,3 +258,132 @@ def test_can_handle_more_than_max_iterations_in_db():
         assert len(seen) == 2
     finally:
         db.close()
+
+
+def test_checkpoints_shrinking_so_interrupted_runs_resume(monkeypatch):
+    monkeypatch.setattr(core, u'SHRINK_CHECKPOINT_INTERVAL', 0.0)
+    db = ExampleDatabase()
+    try:
+        settings = hs.Settings(database=db, max_examples=200)
+        failing = []
+
+        @given(integers(), settings=settings)
+        def checkpointed(x):
+            if abs(x) >= 1000:
+                failing.append(x)
+                if len(failing) >= 3:
+                    raise KeyboardInterrupt()
+                assert False
+
+        with pytest.raises(KeyboardInterrupt):
+            checkpointed()
+        # Only the most recent checkpoint is kept around.
+        saved = list(db.backend.fetch(list(db.backend.keys())[0]))
+        assert len(saved) == 1
+
+        resumed_failing = []
+
+        @given(integers(), settings=settings)
+        def checkpointed(x):  # noqa: F811
+            if abs(x) >= 1000:
+                resumed_failing.append(x)
+                assert False
+
+        with pytest.raises(AssertionError):
+            checkpointed()
+        assert resumed_failing[0] == failing[1]
+    finally:
+        db.close()
+
+
+def test_does_not_reshrink_an_example_known_to_be_minimal():
+    db = ExampleDatabase()
+    try:
+        settings = hs.Settings(database=db)
+        calls = [0]
+
+        @given(lists(integers()), settings=settings)
+        def has_no_large_sums(xs):
+            calls[0] += 1
+            assert sum(xs) < 1000
+
+        with pytest.raises(AssertionError):
+            has_no_large_sums()
+        assert calls[0] > 2
+        calls[0] = 0
+        with pytest.raises(AssertionError):
+            has_no_large_sums()
+        # One call to replay the saved example and one to report it.
+        assert calls[0] == 2
+    finally:
+        db.close()
+
+
+def count_minimal_records(db, test):
+    return sum(
+        1 for data in db.backend.fetch(fully_qualified_name(test))
+        if is_minimal_record(db.format.deserialize_data(data))
+    )
+
+
+def test_does_not_reshrink_for_a_new_instance_of_a_test_class():
+    db = ExampleDatabase()
+    try:
+        calls = [0]
+
+        def has_no_large_sums(self, xs):
+            calls[0] += 1
+            assert sum(xs) < 1000
+
+        class TestSums(object):
+            test = given(
+                lists(integers()), settings=hs.Settings(database=db)
+            )(has_no_large_sums)
+
+        with pytest.raises(AssertionError):
+            TestSums().test()
+        calls[0] = 0
+        with pytest.raises(AssertionError):
+            TestSums().test()
+        assert calls[0] == 2
+        assert count_minimal_records(db, has_no_large_sums) == 1
+    finally:
+        db.close()
+
+
+def test_fingerprint_depends_on_the_test_not_the_strategy_object():
+    def test(self, xs):
+        pass
+
+    def other_test(self, xs):
+        return xs
+
+    def fingerprint(f, strategy):
+        arguments = [object(), core.HypothesisProvided(strategy)]
+        return core.given_fingerprint(
+            f, arguments, [just(arguments[0]), strategy], {}, {})
+
+    assert fingerprint(test, lists(integers())) == fingerprint(
+        test, lists(integers()))
+    assert fingerprint(test, lists(integers())) != fingerprint(
+        test, lists(text()))
+    assert fingerprint(test, lists(integers())) != fingerprint(
+        other_test, lists(integers()))
+
+
+def test_minimal_marks_are_specific_to_the_strategy():
+    db = ExampleDatabase()
+    try:
+        storage = db.storage(u'minimal')
+        strategy = integers()
+        template = strategy.draw_template(
+            Random(0), strategy.draw_parameter(Random(0)))
+        assert not storage.is_minimal(template, strategy)
+        storage.mark_minimal(template, strategy)
+        assert storage.is_minimal(template, strategy)
+        assert list(storage.fetch(strategy)) == []
+        assert not storage.is_minimal(template, integers(min_value=0))
+        storage.delete(template, strategy)
+        assert not storage.is_minimal(template, strategy)
+    finally:
+        db.close()
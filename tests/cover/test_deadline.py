@@ -0,0 +1,91 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+import time
+
+import pytest
+from hypothesis import given, Settings
+from hypothesis.core import check_deadline
+from hypothesis.errors import DeadlineExceeded
+from tests.common.utils import capture_out
+from hypothesis.settings import Verbosity
+from hypothesis.reporting import default as default_reporter
+from hypothesis.reporting import with_reporter
+from hypothesis.strategies import integers
+from hypothesis.internal.slowexamples import SlowExamples
+
+
+def test_slow_examples_fail_and_shrink_to_the_smallest_slow_input():
+    @given(integers(0, 1000), settings=Settings(deadline=50))
+    def test_parser(n):
+        if n >= 100:
+            time.sleep(0.1)
+
+    with capture_out() as o:
+        with pytest.raises(DeadlineExceeded):
+            test_parser()
+    assert u'test_parser(n=100)' in o.getvalue()
+
+
+def test_fast_examples_pass_with_a_deadline():
+    @given(integers(), settings=Settings(deadline=1000))
+    def test(x):
+        pass
+
+    test()
+
+
+def test_there_is_no_deadline_by_default():
+    @given(integers(), settings=Settings(max_examples=5))
+    def test(x):
+        time.sleep(0.01)
+
+    test()
+
+
+def test_deadline_has_slack_except_on_the_final_run():
+    check_deadline(0.011, 10, is_final=False)
+    with pytest.raises(DeadlineExceeded):
+        check_deadline(0.011, 10, is_final=True)
+    with pytest.raises(DeadlineExceeded):
+        check_deadline(0.013, 10, is_final=False)
+    check_deadline(100, 0, is_final=True)
+
+
+def test_reports_slowest_runs_when_verbose():
+    @given(integers(0, 10), settings=Settings(
+        max_examples=20, verbosity=Verbosity.verbose))
+    def test_sleepy(n):
+        time.sleep(0.001 * n)
+
+    with capture_out() as o:
+        with with_reporter(default_reporter):
+            test_sleepy()
+    out = o.getvalue()
+    assert u'Slowest runs:' in out
+    assert u'ms: test_sleepy(n=' in out
+
+
+def test_keeps_the_slowest_runs():
+    slow = SlowExamples(n=3)
+    for i in range(10):
+        slow.record(i, u'f(%d)' % (i,))
+    assert slow.count == 10
+    lines = slow.describe_slowest().splitlines()
+    assert lines[1:] == [u'9000.00ms: f(9)', u'8000.00ms: f(8)',
+                         u'7000.00ms: f(7)']
@@ -17,14 +17,16 @@
 from __future__ import division, print_function, absolute_import
 
 import os
+from random import Random
 
 import pytest
 
 import hypothesis.reporting as reporting
-from hypothesis import given, assume
+from hypothesis import given, assume, example
+from hypothesis.core import reify_and_execute
 from hypothesis.errors import AbnormalExit
 from tests.common.utils import capture_out
-from hypothesis.strategies import sets, booleans, integers
+from hypothesis.strategies import sets, lists, booleans, integers
 
 ForkingTestCase = pytest.importorskip(
     u'hypothesis.testrunners.forking'
@@ -124,3 +126,184 @@ def test_captures_output_from_child_under_abnormal_exit():
                 ).test_death()
         out = out.getvalue()
         assert u'Falsifying example: test_death' in out
+
+
+PersistentForkingTestCase = pytest.importorskip(
+    u'hypothesis.testrunners.forking'
+).PersistentForkingTestCase
+
+
+def test_persistent_worker_runs_every_example_in_one_child(tmpdir):
+    pids = tmpdir.join(u'pids')
+
+    class TestPersistent(PersistentForkingTestCase):
+
+        @given(integers())
+        def test_pids(self, x):
+            pids.write(u'%d\n' % (os.getpid(),), mode=u'a')
+
+    TestPersistent(u'test_pids').test_pids()
+    seen = pids.read().split()
+    assert len(seen) > 1
+    assert set(seen) == set([seen[0]])
+    assert int(seen[0]) != os.getpid()
+
+
+def test_persistent_worker_passes_exceptions_and_output_back():
+    class TestPersistent(PersistentForkingTestCase):
+
+        @given(integers())
+        def test_positive(self, x):
+            assert x > 0
+
+    with reporting.with_reporter(reporting.default):
+        with capture_out() as out:
+            with pytest.raises(AssertionError):
+                TestPersistent(u'test_positive').test_positive()
+    assert u'Falsifying example: test_positive' in out.getvalue()
+
+
+def test_persistent_worker_is_replaced_after_a_crash():
+    class TestPersistent(PersistentForkingTestCase):
+
+        @given(integers())
+        def test_death(self, x):
+            if x > 10:
+                os._exit(1)
+
+    with reporting.with_reporter(reporting.default):
+        with capture_out() as out:
+            with pytest.raises(AbnormalExit):
+                TestPersistent(u'test_death').test_death()
+    out = out.getvalue()
+    assert u'Falsifying example: test_death' in out
+    assert u'x=11)' in out
+
+
+def test_persistent_worker_handles_unpicklable_exceptions():
+    class Boo(Exception):
+
+        def __getstate__(self):
+            raise ValueError()
+
+    class TestBoo(PersistentForkingTestCase):
+
+        @given(integers())
+        def test_boo(self, x):
+            raise Boo()
+
+    with pytest.raises(AbnormalExit):
+        TestBoo(u'test_boo').test_boo()
+
+
+def test_persistent_worker_runs_explicit_examples_in_their_own_fork():
+    class TestPersistent(PersistentForkingTestCase):
+
+        @example(x=-1)
+        @given(integers())
+        def test_positive(self, x):
+            assert x > 0
+
+    with pytest.raises(AssertionError):
+        TestPersistent(u'test_positive').test_positive()
+
+
+def test_tear_down_closes_the_worker():
+    class TestPersistent(PersistentForkingTestCase):
+
+        @given(booleans())
+        def test_anything(self, x):
+            pass
+
+    case = TestPersistent(u'test_anything')
+    case.test_anything()
+    worker = case.worker
+    assert worker is not None
+    assert id(worker) in forking.live_workers
+    case.tearDown()
+    assert case.worker is None
+    assert worker.pid is None
+    assert id(worker) not in forking.live_workers
+
+
+ParallelForkingTestCase = pytest.importorskip(
+    u'hypothesis.testrunners.forking'
+).ParallelForkingTestCase
+
+forking = pytest.importorskip(u'hypothesis.testrunners.forking')
+
+
+def test_examples_are_keyed_by_value_not_identity():
+    search = lists(integers())
+
+    def example(template):
+        return reify_and_execute(search, template, lambda xs: None)
+
+    template = search.draw_and_produce(Random(0))
+    copied = search.from_basic(search.to_basic(template))
+    assert copied is not template
+    assert forking.example_key(example(template)) == forking.example_key(
+        example(copied))
+    other = search.from_basic([])
+    assert forking.example_key(example(template)) != forking.example_key(
+        example(other))
+
+
+def test_parallel_runs_examples_in_several_workers(tmpdir):
+    pids = tmpdir.join(u'pids')
+
+    class TestParallel(ParallelForkingTestCase):
+        processes = 3
+
+        @given(integers())
+        def test_pids(self, x):
+            pids.write(u'%d\n' % (os.getpid(),), mode=u'a')
+
+    case = TestParallel(u'test_pids')
+    case.test_pids()
+    assert 1 < len(set(pids.read().split())) <= 3
+    case.tearDown()
+
+
+def test_parallel_shrinks_and_reports_failures():
+    class TestParallel(ParallelForkingTestCase):
+        processes = 3
+
+        @given(integers())
+        def test_small(self, x):
+            assert x < 100
+
+    with reporting.with_reporter(reporting.default):
+        with capture_out() as out:
+            with pytest.raises(AssertionError):
+                TestParallel(u'test_small').test_small()
+    out = out.getvalue()
+    assert out.count(u'Falsifying example') == 1
+    assert u'x=100)' in out
+
+
+def test_parallel_attributes_abnormal_exits_to_the_right_example():
+    class TestParallel(ParallelForkingTestCase):
+        processes = 3
+
+        @given(integers())
+        def test_death(self, x):
+            if x >= 100:
+                os._exit(1)
+
+    with reporting.with_reporter(reporting.default):
+        with capture_out() as out:
+            with pytest.raises(AbnormalExit):
+                TestParallel(u'test_death').test_death()
+    assert u'x=100)' in out.getvalue()
+
+
+def test_parallel_can_assume():
+    class TestParallel(ParallelForkingTestCase):
+        processes = 2
+
+        @given(booleans())
+        def only_true(self, x):
+            assume(x)
+
+    TestParallel(u'only_true').only_true()
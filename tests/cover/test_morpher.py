@@ -147,3 +147,52 @@ def test_cannot_install_into_morpher_twice():
     m.install(s.integers())
     with pytest.raises(InvalidArgument):
         m.install(s.integers())
+
+
+def test_reinstalling_a_strategy_does_not_reread_data():
+    ints = s.integers()
+    texts = s.text()
+    m = Morpher(1, 1)
+    m.become(texts)
+    m.clear()
+    calls = [0]
+    from_basic = ints.from_basic
+
+    def counting_from_basic(data):
+        calls[0] += 1
+        return from_basic(data)
+    ints.from_basic = counting_from_basic
+    m.become(ints)
+    m.clear()
+    seen = calls[0]
+    m.become(ints)
+    m.clear()
+    assert calls[0] == seen
+
+
+def test_only_tries_reading_incompatible_data_once():
+    m = Morpher(1, 1)
+    m.become(s.text())
+    m.clear()
+    ints = s.integers()
+    m.become(ints)
+    m.clear()
+    assert any(ints is t for t in m.rejected[0])
+    m.installed.clear()
+    m.become(ints)
+    assert m.current_index == 1
+
+
+def test_changing_data_forgets_later_installs():
+    ints = s.integers()
+    source = Morpher(1, 1)
+    source.become(ints)
+    source.clear()
+    m = Morpher(1, 1, data=[[u'not an int'], source.data[0]])
+    m.become(ints)
+    assert m.current_index == 1
+    m.clear()
+    m.data[0] = source.data[0]
+    m.forget(0)
+    m.become(ints)
+    assert m.current_index == 0
@@ -105,3 +105,19 @@ def test_can_draw_sets_of_hard_to_find_elements(rnd):
     find(
         sets(rarebool, min_size=2), lambda x: True,
         random=rnd, settings=Settings(database=None))
+
+
+def test_unique_lists_delete_contiguous_chunks():
+    s = lists(integers(), unique=True, min_size=1)
+    for i in range(100):
+        t = s.draw_and_produce(Random(i))
+        s.reify(t)
+        if t.size >= 4:
+            break
+    deletes = list(s.wrapped_strategy.delete_chunks(Random(1), t))
+    assert deletes
+    half = t.size // 2
+    assert deletes[0].values == tuple(t.values[half:])
+    for d in deletes:
+        assert 1 <= d.size < t.size
+        assert len(d.values) == d.size
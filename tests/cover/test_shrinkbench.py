@@ -0,0 +1,125 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+import json
+
+import hypothesis.strategies as st
+from hypothesis.tools.shrinkbench import MAX_CALLS, ShrinkProblem, main, \
+    run_corpus, INFORMATIONAL, HIGHER_IS_BETTER, format_results, \
+    standard_corpus, bubble_sort_makes_one_pass
+from hypothesis.tools.bench import compare
+
+SMALL = dict(
+    sum=ShrinkProblem(
+        lambda: st.lists(st.integers()), lambda xs: sum(xs) > 10, [11],
+        None),
+    length=ShrinkProblem(
+        lambda: st.lists(st.booleans()), lambda xs: len(xs) >= 2, None,
+        len),
+    impossible=ShrinkProblem(st.booleans, lambda x: False, None, None),
+)
+
+
+def test_records_calls_time_and_size():
+    results = run_corpus(SMALL, seeds=2)
+    assert results[u'sum'][u'calls'] >= 1
+    assert results[u'sum'][u'seconds'] >= 0
+    assert results[u'sum'][u'size'] == len(u'[11]')
+    assert results[u'sum'][u'minimal_rate'] == 1
+    assert results[u'length'][u'size'] == 2
+    assert u'minimal_rate' not in results[u'length']
+
+
+def test_reports_problems_with_no_failing_example():
+    results = run_corpus(SMALL, names=[u'impossible'], seeds=1)
+    assert list(results) == [u'impossible']
+    assert u'error' in results[u'impossible']
+    assert u'failed' in format_results(results)
+
+
+def test_stops_at_the_call_budget_with_the_best_example_so_far():
+    results = run_corpus(SMALL, names=[u'sum'], seeds=1, max_calls=3)
+    assert results[u'sum'][u'calls'] <= 3
+    assert results[u'sum'][u'size'] >= len(u'[11]')
+
+
+def test_reports_running_out_of_calls_before_finding_anything():
+    results = run_corpus(SMALL, names=[u'impossible'], seeds=1, max_calls=1)
+    assert u'in 1 calls' in results[u'impossible'][u'error']
+
+
+def test_runs_the_whole_standard_corpus():
+    results = run_corpus(seeds=1)
+    assert list(results) == list(standard_corpus())
+    for name, metrics in results.items():
+        assert u'error' not in metrics, name
+        assert metrics[u'calls'] <= MAX_CALLS
+
+
+def test_stateful_problems_give_the_same_results_every_time():
+    def deterministic(results):
+        return [
+            (name, metrics[u'calls'], metrics[u'size'])
+            for name, metrics in results.items()
+        ]
+    first = run_corpus(names=[u'stateful'], seeds=1, max_calls=200)
+    second = run_corpus(names=[u'stateful'], seeds=1, max_calls=200)
+    assert deterministic(first) == deterministic(second)
+
+
+def test_corpus_predicates_hold_for_their_expected_values():
+    for name, problem in standard_corpus().items():
+        if problem.expected is not None:
+            assert problem.condition(problem.expected), name
+
+
+def test_one_pass_bubble_sort_is_only_wrong_for_three_or_more():
+    assert not bubble_sort_makes_one_pass([1, 0])
+    assert bubble_sort_makes_one_pass([1, 1, 0])
+
+
+def test_main_gates_on_minimal_rate(tmpdir, capsys):
+    output = str(tmpdir.join(u'shrink.json'))
+    assert main([u'sum_of_list', u'--seeds', u'1', u'--output', output]) == 0
+    with open(output) as i:
+        saved = json.load(i)
+    assert saved[u'sum_of_list'][u'minimal_rate'] == 1
+
+    saved[u'sum_of_list'][u'minimal_rate'] = 2
+    with open(output, u'w') as o:
+        json.dump(saved, o)
+    assert main([
+        u'sum_of_list', u'--seeds', u'1', u'--baseline', output]) == 1
+    out, _ = capsys.readouterr()
+    assert u'sum_of_list: minimal_rate went from 2.00 to 1.00' in out
+
+
+def test_only_gates_on_deterministic_metrics():
+    baseline = {u'a': {
+        u'calls': 10, u'seconds': 0.01, u'size': 3, u'minimal_rate': 1}}
+    slower = {u'a': {
+        u'calls': 10, u'seconds': 10.0, u'size': 3, u'minimal_rate': 1}}
+    worse = {u'a': {
+        u'calls': 20, u'seconds': 0.01, u'size': 6, u'minimal_rate': 0.5}}
+
+    def regressions(results):
+        return sorted(metric for _, metric, _, _ in compare(
+            baseline, results, higher_is_better=HIGHER_IS_BETTER,
+            informational=INFORMATIONAL))
+    assert regressions(slower) == []
+    assert regressions(worse) == [u'calls', u'minimal_rate', u'size']
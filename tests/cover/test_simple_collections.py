@@ -16,6 +16,8 @@
 
 from __future__ import division, print_function, absolute_import
 
+import threading
+from copy import deepcopy
 from random import Random
 from collections import namedtuple
 
@@ -26,7 +28,9 @@ from hypothesis import find, given, Settings
 from hypothesis.strategies import sets, text, lists, builds, tuples, \
     booleans, integers, frozensets, dictionaries, fixed_dictionaries
 from hypothesis.internal.debug import minimal
-from hypothesis.internal.compat import OrderedDict
+from hypothesis.internal.compat import hrange, OrderedDict
+from hypothesis.searchstrategy.collections import ListStrategy, \
+    deletion_chunks
 
 
 @pytest.mark.parametrize((u'col', u'strat'), [
@@ -271,3 +275,138 @@ def test_can_find_sets_unique_by_incomplete_data():
     assert sorted(list(map(max, ls))) == list(range(10))
     for v in ls:
         assert 0 in v
+
+
+def test_deletion_chunks_start_with_halves():
+    assert list(deletion_chunks(8))[:2] == [(0, 4), (4, 8)]
+    assert list(deletion_chunks(8))[-1] == (7, 8)
+
+
+def test_deletion_chunks_respect_min_size():
+    chunks = list(deletion_chunks(10, min_size=7))
+    assert chunks
+    assert all(end - start <= 3 for start, end in chunks)
+
+
+def test_deletion_chunks_stop_at_smallest():
+    assert all(
+        end - start >= 2 for start, end in deletion_chunks(8, smallest=2))
+
+
+def test_chunk_deletes_remove_contiguous_blocks():
+    strat = ListStrategy((integers(),))
+    x = tuple(range(8))
+    deletes = list(strat.simplify_with_chunk_deletes(Random(0), x))
+    assert deletes[0] == (4, 5, 6, 7)
+    assert deletes[1] == (0, 1, 2, 3)
+    assert (0, 1, 4, 5, 6, 7) in deletes
+    assert all(len(d) >= 6 for d in deletes[-4:])
+
+
+def test_shrinks_long_list_to_contiguous_failure():
+    xs = find(
+        lists(integers(), average_size=500),
+        lambda x: any(
+            x[i] > 0 and x[i + 1] > 0 and x[i + 2] > 0
+            for i in range(len(x) - 2)),
+        settings=Settings(
+            database=None, max_examples=2000, max_shrinks=2000, timeout=-1),
+    )
+    assert xs == [1, 1, 1]
+
+
+class Expensive(object):
+    calls = 0
+
+    def __init__(self, n):
+        Expensive.calls += 1
+        self.n = n
+
+
+def reify_twice(strat, change=lambda t: t):
+    random = Random(0)
+    template = strat.draw_template(random, strat.draw_parameter(random))
+    first = strat.reify(template)
+    second = strat.reify(change(template))
+    return first, second
+
+
+@pytest.mark.parametrize(u'pure', [False, True])
+def test_reuses_pure_children_of_tuples_on_reify(pure):
+    child = integers().map(Expensive, pure=pure)
+    Expensive.calls = 0
+    first, second = reify_twice(tuples(child, child, child))
+    assert all((x is y) == pure for x, y in zip(first, second))
+    assert Expensive.calls == (3 if pure else 6)
+
+
+@pytest.mark.parametrize(u'pure', [False, True])
+def test_reuses_pure_children_of_lists_on_reify(pure):
+    child = integers().map(Expensive, pure=pure)
+    replacement = child.draw_template(Random(1), child.draw_parameter(
+        Random(1)))
+    Expensive.calls = 0
+    first, second = reify_twice(
+        lists(child, min_size=5), lambda t: t[:-1] + (replacement,))
+    assert len(first) == len(second)
+    assert all((x is y) == pure for x, y in zip(first[:-1], second[:-1]))
+    assert first[-1] is not second[-1]
+    n = len(first)
+    assert Expensive.calls == (n + 1 if pure else 2 * n)
+
+
+def test_reuses_pure_values_of_fixed_dictionaries():
+    strat = fixed_dictionaries({
+        u'a': integers().map(Expensive, pure=True),
+        u'b': integers().map(Expensive, pure=True),
+    })
+    Expensive.calls = 0
+    first, second = reify_twice(strat)
+    assert first[u'a'] is second[u'a']
+    assert first[u'b'] is second[u'b']
+    assert Expensive.calls == 2
+
+
+def test_pure_map_has_same_repr():
+    assert repr(integers().map(abs, pure=True)) == repr(integers().map(abs))
+
+
+def test_shrinks_pure_mapped_elements():
+    xs = minimal(
+        lists(integers().map(Expensive, pure=True)),
+        lambda xs: sum(x.n for x in xs) >= 10)
+    assert sum(x.n for x in xs) == 10
+    assert all(x.n > 0 for x in xs)
+
+
+def test_pure_children_are_reified_correctly_from_several_threads():
+    strat = lists(integers().map(Expensive, pure=True), min_size=5)
+    templates = [
+        strat.draw_template(Random(i), strat.draw_parameter(Random(i)))
+        for i in hrange(10)
+    ]
+    expected = [[x.n for x in strat.reify(t)] for t in templates]
+    errors = []
+
+    def reify_all():
+        try:
+            for _ in hrange(50):
+                for template, values in zip(templates, expected):
+                    assert [x.n for x in strat.reify(template)] == values
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=reify_all) for _ in hrange(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+def test_can_copy_strategies_with_reify_caches():
+    strat = lists(integers().map(Expensive, pure=True))
+    copied = deepcopy(strat)
+    template = strat.draw_template(Random(0), strat.draw_parameter(Random(0)))
+    assert [x.n for x in copied.reify(template)] == [
+        x.n for x in strat.reify(template)]
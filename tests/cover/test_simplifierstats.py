@@ -0,0 +1,96 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+from hypothesis.internal.simplifierstats import SimplifierStats, pass_key
+
+
+class Strategy(object):
+
+    def simplify_such_that(self, random, template):
+        return iter(())
+
+    def simplify_index(self, i):
+        def accept(random, template):
+            return iter(template[:i])
+        return accept
+
+
+class OtherStrategy(Strategy):
+    pass
+
+
+def test_bound_passes_keep_their_key_between_rounds():
+    assert pass_key(Strategy().simplify_such_that) == pass_key(
+        Strategy().simplify_such_that)
+
+
+def test_passes_with_the_same_name_from_different_strategies_differ():
+    assert pass_key(Strategy().simplify_such_that) != pass_key(
+        OtherStrategy().simplify_such_that)
+
+
+def test_closures_with_different_captured_values_differ():
+    strategy = Strategy()
+    assert pass_key(strategy.simplify_index(0)) == pass_key(
+        strategy.simplify_index(0))
+    assert pass_key(strategy.simplify_index(0)) != pass_key(
+        strategy.simplify_index(1))
+
+
+def test_closures_wrapping_different_passes_differ():
+    def wrap(simplify):
+        def accept(random, template):
+            return simplify(random, template)
+        return accept
+    assert pass_key(wrap(Strategy().simplify_such_that)) != pass_key(
+        wrap(OtherStrategy().simplify_such_that))
+
+
+def test_skipping_one_pass_does_not_skip_others_with_its_name():
+    stats = SimplifierStats(skip_after=3)
+    failing = stats.key(Strategy().simplify_index(0))
+    working = stats.key(Strategy().simplify_index(1))
+    for _ in range(3):
+        stats.record(failing, False, 0.0)
+    stats.record(working, True, 0.0)
+    assert stats.should_skip(failing)
+    assert not stats.should_skip(working)
+
+
+def test_only_skips_passes_which_have_never_succeeded():
+    stats = SimplifierStats(skip_after=3)
+    for _ in range(3):
+        stats.record(u'never', False, 0.0)
+        stats.record(u'rarely', False, 0.0)
+    stats.record(u'rarely', True, 0.0)
+    assert stats.should_skip(u'never')
+    assert not stats.should_skip(u'rarely')
+    assert not stats.should_skip(u'untried')
+
+
+def test_describes_each_pass_by_name():
+    stats = SimplifierStats()
+    a = stats.key(Strategy().simplify_such_that)
+    b = stats.key(Strategy().simplify_index(0))
+    stats.record(a, True, 0.5)
+    stats.record(a, False, 0.25)
+    stats.record(b, False, 0.0)
+    assert stats.describe_statistics() == (
+        u'simplify_such_that: 1/2 successful in 0.75s\n'
+        u'accept: 0/1 successful in 0.00s'
+    )
@@ -16,21 +16,27 @@
 
 from __future__ import division, print_function, absolute_import
 
+import time
 import inspect
+import threading
 from random import Random
 from collections import namedtuple
 
 import pytest
 
-from hypothesis import assume, Settings
+from hypothesis import find, assume, Settings
 from hypothesis.errors import Flaky, BadData, InvalidDefinition
 from tests.common.utils import raises, capture_out
 from hypothesis.database import ExampleDatabase
-from hypothesis.stateful import rule, Bundle, StateMachineRunner, \
-    GenericStateMachine, RuleBasedStateMachine, \
-    run_state_machine_as_test, StateMachineSearchStrategy
+from hypothesis.stateful import TOMBSTONE, NOT_SERIALIZED, rule, Bundle, \
+    interleaved, SnapshotCache, InterleavedRunner, StateMachineRunner, \
+    GenericStateMachine, RuleBasedStateMachine, find_breaking_runner, \
+    run_state_machine_as_test, InterleavedSearchStrategy, \
+    StateMachineSearchStrategy
 from hypothesis.strategies import just, none, lists, tuples, choices, \
     booleans, integers, sampled_from
+from hypothesis.internal.compat import hrange
+from hypothesis.searchstrategy.strategies import SearchStrategy
 
 
 class ChoosingStateMachine(GenericStateMachine):
@@ -445,9 +451,8 @@ def test_can_produce_minimal_outcomes_from_unreliable_strategies():
 
     assert runner.n_steps == n
     assert len(runner.record) >= n
-    for strat, data in runner.record[:n]:
-        template = strat.from_basic(data[-1])
-        value = strat.reify(template)
+    for step in runner.record[:n]:
+        value = step.strategy.reify(step.template)
         assert value in ([], 0)
 
 
@@ -522,3 +527,621 @@ def test_statemachine_equality():
     assert hash(StateMachineRunner(1, 1, 1)) == hash(
         StateMachineRunner(1, 1, 1))
     assert StateMachineRunner(1, 1, 1) != StateMachineRunner(1, 1, 2)
+
+
+def test_step_strategies_are_cached_by_non_empty_bundles():
+    machine = IntAdder()
+    initial = machine.steps()
+    assert machine.steps() is initial
+    machine.bundle(u'ints').append(1)
+    with_ints = machine.steps()
+    assert with_ints is not initial
+    machine.bundle(u'ints').append(2)
+    assert machine.steps() is with_ints
+
+
+def test_bundle_sampling_sees_values_added_later():
+    machine = IntAdder()
+    produce = IntAdder.rules()[0]
+    machine.execute_step((produce, {u'x': 0}, 0))
+    strategy = machine.steps()
+    for i in hrange(1, 10):
+        machine.execute_step((produce, {u'x': i}, i))
+    seen = set()
+    random = Random(0)
+    for _ in hrange(200):
+        parameter = strategy.draw_parameter(random)
+        rule, data, _ = strategy.reify(
+            strategy.draw_template(random, parameter))
+        if u'y' in data:
+            seen.add(data[u'y'].key)
+    assert seen == set(hrange(10))
+
+
+class CountingStrategy(SearchStrategy):
+
+    def __init__(self):
+        super(CountingStrategy, self).__init__()
+        self.parameters_drawn = 0
+        self.serialized = 0
+        self.deserialized = 0
+
+    def draw_parameter(self, random):
+        self.parameters_drawn += 1
+        return random.random()
+
+    def draw_template(self, random, parameter):
+        return random.random() < parameter
+
+    def reify(self, template):
+        return template
+
+    def to_basic(self, template):
+        self.serialized += 1
+        return template
+
+    def from_basic(self, data):
+        self.deserialized += 1
+        return bool(data)
+
+
+class ReusesStepStrategy(GenericStateMachine):
+
+    def __init__(self):
+        super(ReusesStepStrategy, self).__init__()
+        self.strategy = CountingStrategy()
+
+    def steps(self):
+        return self.strategy
+
+    def execute_step(self, step):
+        pass
+
+
+def test_parameter_is_drawn_once_per_run():
+    machine = ReusesStepStrategy()
+    StateMachineRunner(1, 1, 50).run(machine)
+    assert machine.strategy.parameters_drawn == 1
+
+
+def test_steps_are_only_serialized_when_needed():
+    machine = ReusesStepStrategy()
+    runner = StateMachineRunner(1, 1, 50)
+    runner.run(machine)
+    assert machine.strategy.serialized == 0
+    assert machine.strategy.deserialized == 0
+    StateMachineSearchStrategy().to_basic(runner)
+    assert machine.strategy.serialized == 50
+    StateMachineSearchStrategy().to_basic(runner)
+    assert machine.strategy.serialized == 50
+
+
+def test_replay_with_same_strategy_reuses_live_templates():
+    machine = ReusesStepStrategy()
+    runner = StateMachineRunner(1, 1, 50)
+    runner.run(machine)
+    replay = StateMachineRunner(1, 1, 50, record=runner.record)
+    replay.run(machine)
+    assert machine.strategy.deserialized == 0
+    assert [step.template for step in replay.record] == [
+        step.template for step in runner.record]
+
+
+def test_replay_from_database_format_gives_same_steps():
+    strat = StateMachineSearchStrategy()
+    runner = StateMachineRunner(1, 1, 50)
+    runner.run(ReusesStepStrategy())
+    loaded = strat.from_basic(strat.to_basic(runner))
+    machine = ReusesStepStrategy()
+    loaded.run(machine)
+    assert machine.strategy.deserialized == 50
+    assert machine.strategy.parameters_drawn == 0
+    assert [step.template for step in loaded.record] == [
+        step.template for step in runner.record]
+
+
+class SnapshottingSum(GenericStateMachine):
+    executed = 0
+    restored = 0
+
+    def __init__(self):
+        super(SnapshottingSum, self).__init__()
+        self.total = 0
+
+    def steps(self):
+        return integers(0, 10)
+
+    def execute_step(self, step):
+        SnapshottingSum.executed += 1
+        self.total += step
+        assert self.total < 100
+
+    def snapshot(self):
+        return self.total
+
+    def restore(self, snapshot):
+        SnapshottingSum.restored += 1
+        self.total = snapshot
+
+
+class NoSnapshotSum(SnapshottingSum):
+
+    def snapshot(self):
+        return None
+
+
+def test_rerunning_a_program_restores_the_final_snapshot():
+    snapshots = SnapshotCache()
+    runner = StateMachineRunner(1, 1, 5)
+    runner.run(SnapshottingSum(), snapshots=snapshots)
+    assert len(snapshots) == 5
+    SnapshottingSum.executed = 0
+    machine = SnapshottingSum()
+    StateMachineRunner(1, 1, 5, record=runner.record).run(
+        machine, snapshots=snapshots)
+    assert SnapshottingSum.executed == 0
+    assert machine.total == sum(step.template for step in runner.record)
+
+
+def test_runs_resume_after_the_common_prefix():
+    snapshots = SnapshotCache()
+    runner = StateMachineRunner(1, 1, 10)
+    runner.run(SnapshottingSum(), snapshots=snapshots)
+    record = list(runner.record)
+    record[6] = TOMBSTONE
+    SnapshottingSum.executed = 0
+    machine = SnapshottingSum()
+    StateMachineRunner(
+        1, 1, 10, record=record, templates=runner.templates,
+    ).run(machine, snapshots=snapshots)
+    assert SnapshottingSum.executed == 3
+    assert machine.total == sum(
+        step.template for step in record if step is not TOMBSTONE)
+
+
+def test_snapshots_are_not_used_if_machine_does_not_support_them():
+    snapshots = SnapshotCache()
+    StateMachineRunner(1, 1, 5).run(NoSnapshotSum(), snapshots=snapshots)
+    assert len(snapshots) == 0
+
+
+def test_snapshot_cache_discards_old_snapshots():
+    snapshots = SnapshotCache(max_size=3)
+    StateMachineRunner(1, 1, 10).run(SnapshottingSum(), snapshots=snapshots)
+    assert len(snapshots) == 3
+
+
+def test_snapshots_give_same_outcomes_with_fewer_steps():
+    runner = StateMachineRunner(1, 1, 50)
+    with raises(AssertionError):
+        runner.run(SnapshottingSum())
+    strat = StateMachineSearchStrategy()
+    candidates = [
+        candidate
+        for simplify in strat.simplifiers(Random(0), runner)
+        for candidate in simplify(Random(0), runner)
+    ]
+    assert len(candidates) > 10
+
+    def outcomes(machine, snapshots):
+        SnapshottingSum.executed = 0
+        results = []
+        for candidate in candidates:
+            candidate = StateMachineRunner(
+                candidate.parameter_seed, candidate.template_seed,
+                candidate.n_steps, record=candidate.record,
+                templates=candidate.templates,
+            )
+            try:
+                candidate.run(machine(), snapshots=snapshots)
+                results.append(None)
+            except AssertionError:
+                results.append(candidate.record)
+        return SnapshottingSum.executed, [
+            r and [s.template for s in r if s is not TOMBSTONE]
+            for r in results
+        ]
+
+    without, without_results = outcomes(NoSnapshotSum, None)
+    with_, with_results = outcomes(SnapshottingSum, SnapshotCache())
+    assert with_results == without_results
+    assert with_ < without
+
+
+class Producers(RuleBasedStateMachine):
+    values = Bundle(u'values')
+
+    def __init__(self):
+        super(Producers, self).__init__()
+        self.used = []
+
+    @rule(target=values, x=integers())
+    def produce(self, x):
+        return x
+
+    @rule(target=values, v=values)
+    def copy(self, v):
+        return v
+
+    @rule(v=values)
+    def use(self, v):
+        self.used.append(v)
+
+
+def test_bundle_references_survive_deleting_other_producers():
+    machine = Producers()
+    runner = StateMachineRunner(1, 3, 40)
+    runner.run(machine)
+    strat = StateMachineSearchStrategy()
+    for candidate in strat.delete_unused_steps(Random(0), runner):
+        replayed = Producers()
+        candidate.run(replayed)
+        assert replayed.used == machine.used
+
+
+def test_delete_unused_steps_deletes_values_nothing_uses():
+    machine = Producers()
+    runner = StateMachineRunner(1, 3, 40)
+    runner.run(machine)
+    used = set()
+    for i in hrange(len(runner.record)):
+        used.update(runner.references[i][1])
+    unused = [
+        i for i, (produced, _) in sorted(runner.references.items())
+        if produced and not used.intersection(produced)
+    ]
+    assert unused
+    candidates = list(
+        StateMachineSearchStrategy().delete_unused_steps(Random(0), runner))
+    first = candidates[0]
+    for i in unused:
+        assert first.record[i] is TOMBSTONE
+
+
+def test_delete_unused_steps_deletes_chains_of_unused_values():
+    runner = StateMachineRunner(1, 3, 4)
+    runner.run(Producers())
+    runner.references = {
+        0: ((1,), ()), 1: ((2,), (1,)), 2: ((), ()), 3: ((), ()),
+    }
+    candidate = next(
+        StateMachineSearchStrategy().delete_unused_steps(Random(0), runner))
+    assert candidate.record[:2] == [TOMBSTONE, TOMBSTONE]
+
+
+class LeakyStack(RuleBasedStateMachine):
+    values = Bundle(u'values')
+
+    def __init__(self):
+        super(LeakyStack, self).__init__()
+        self.model = []
+        self.stack = []
+
+    @rule(target=values, value=integers())
+    def value(self, value):
+        return value
+
+    @rule(value=values)
+    def push(self, value):
+        self.model.append(value)
+        if len(self.stack) < 2:
+            self.stack.append(value)
+
+    @rule()
+    def pop(self):
+        if self.model:
+            assert self.stack.pop() == self.model.pop()
+
+
+@pytest.mark.parametrize(u'seed', hrange(6))
+def test_simplified_bundle_references_fail_with_the_users_error(seed):
+    def breaks(runner):
+        try:
+            runner.run(LeakyStack())
+            return False
+        except Exception:
+            return True
+    breaker = find(
+        StateMachineSearchStrategy(Settings(stateful_step_count=20)), breaks,
+        settings=Settings(database=None, max_examples=1000, max_shrinks=10),
+        random=Random(seed))
+    with pytest.raises((AssertionError, IndexError)):
+        breaker.run(LeakyStack())
+
+
+def test_running_a_candidate_does_not_change_references_of_its_parent():
+    runner = StateMachineRunner(3, 3, 40)
+    runner.run(Producers())
+    references = dict(runner.references)
+    strat = StateMachineSearchStrategy()
+    for candidate in strat.delete_chunks(Random(0), runner):
+        candidate.run(Producers())
+    assert runner.references == references
+
+
+def test_new_machine_replays_templates_without_deserializing():
+    runner = StateMachineRunner(3, 3, 40)
+    runner.run(Producers())
+    replay = StateMachineRunner(1, 3, 40, record=runner.record)
+    replay.run(Producers())
+    for original, replayed in zip(runner.record, replay.record):
+        assert replayed.template is original.template
+        assert replayed._basic is NOT_SERIALIZED
+
+
+def test_templates_using_deleted_values_are_not_reused():
+    runner = StateMachineRunner(3, 3, 40)
+    runner.run(Producers())
+    produced, i = next(
+        (produced[0], i)
+        for i, (produced, _) in sorted(runner.references.items())
+        if produced and any(
+            produced[0] in uses for _, uses in runner.references.values()))
+    candidate = StateMachineSearchStrategy().with_deleted(runner, (i,))
+    candidate.run(Producers())
+    for j, (_, uses) in runner.references.items():
+        if produced in uses:
+            assert candidate.record[j].template is not (
+                runner.record[j].template)
+
+
+class SnapshottingProducers(Producers):
+    executed = 0
+
+    def execute_step(self, step):
+        SnapshottingProducers.executed += 1
+        super(SnapshottingProducers, self).execute_step(step)
+
+    def snapshot_state(self):
+        return tuple(self.used)
+
+    def restore_state(self, state):
+        self.used = list(state)
+
+
+def test_rule_based_machines_only_snapshot_if_their_state_does():
+    assert Producers().snapshot() is None
+    assert SnapshottingProducers().snapshot() is not None
+
+
+def test_rule_based_machines_restore_their_bundles_from_snapshots():
+    snapshots = SnapshotCache()
+    runner = StateMachineRunner(3, 3, 40)
+    runner.run(SnapshottingProducers(), snapshots=snapshots)
+    record = list(runner.record)
+    record[30] = TOMBSTONE
+
+    SnapshottingProducers.executed = 0
+    resumed = SnapshottingProducers()
+    StateMachineRunner(
+        3, 3, 40, record=record, templates=runner.templates,
+    ).run(resumed, snapshots=snapshots)
+    assert SnapshottingProducers.executed == 9
+
+    fresh = Producers()
+    StateMachineRunner(
+        3, 3, 40, record=record, templates=runner.templates,
+    ).run(fresh)
+    assert resumed.used == fresh.used
+    assert resumed.bundles == fresh.bundles
+    assert resumed.name_counter == fresh.name_counter
+
+
+def test_steps_in_the_old_database_format_are_drawn_afresh():
+    # Before steps had keys they were pairs, and bundle values were
+    # referred to by position.
+    old_steps = [[None, [[1, u'10']]], [2, [None, [0]]]]
+    loaded = StateMachineSearchStrategy().from_basic(
+        [3, 3, 2, [[step] for step in old_steps]])
+    loaded.run(Producers())
+    assert [step.history for step in loaded.record] == [
+        (step,) for step in old_steps]
+
+
+def test_delete_chunks_tries_halves_then_quarters():
+    runner = StateMachineRunner(1, 1, 8)
+    runner.run(ReusesStepStrategy())
+    deleted = [
+        [i for i, step in enumerate(c.record) if step is TOMBSTONE]
+        for c in StateMachineSearchStrategy().delete_chunks(Random(0), runner)
+    ]
+    assert deleted[:6] == [
+        [0, 1, 2, 3], [4, 5, 6, 7], [0, 1], [2, 3], [4, 5], [6, 7]]
+    assert deleted[6:] == [[i] for i in hrange(8)]
+
+
+def test_delete_chunks_carries_on_from_last_deletion():
+    runner = StateMachineRunner(1, 1, 8)
+    runner.run(ReusesStepStrategy())
+    strat = StateMachineSearchStrategy()
+    candidate = list(strat.delete_chunks(Random(0), runner))[3]
+    assert candidate.next_chunk == (2, 1)
+    deleted = [
+        [i for i, step in enumerate(c.record) if step is TOMBSTONE]
+        for c in strat.delete_chunks(Random(0), candidate)
+    ]
+    assert deleted[0] == [2, 3, 4, 5]
+    assert deleted[1] == [2, 3, 6, 7]
+
+
+class ThreadLocalCache(RuleBasedStateMachine):
+
+    """A cache which wrongly keeps its entries in a thread local, so it
+    only goes wrong when used from more than one thread."""
+
+    def __init__(self):
+        super(ThreadLocalCache, self).__init__()
+        self.local = threading.local()
+        self.model = {}
+
+    @rule(k=integers(0, 3), v=integers())
+    def put(self, k, v):
+        if not hasattr(self.local, u'data'):
+            self.local.data = {}
+        self.local.data[k] = v
+        self.model[k] = v
+
+    @rule(k=integers(0, 3))
+    def get(self, k):
+        assert getattr(self.local, u'data', {}).get(k) == self.model.get(k)
+
+
+def test_thread_local_cache_works_on_one_thread():
+    run_state_machine_as_test(ThreadLocalCache)
+
+
+def test_interleaving_finds_thread_local_cache_bug():
+    with capture_out() as o:
+        with raises(AssertionError):
+            run_state_machine_as_test(interleaved(ThreadLocalCache))
+    lines = [l for l in o.getvalue().splitlines() if u'Step #' in l]
+    assert len(lines) == 2
+    assert lines[0].startswith(u'[worker 0] Step #1: put(')
+    assert lines[1].startswith(u'[worker 1] Step #2: get(')
+
+
+class RecordsThreads(GenericStateMachine):
+
+    def __init__(self):
+        self.threads = {}
+
+    def steps(self):
+        return integers()
+
+    def execute_step(self, step):
+        self.threads[step] = threading.current_thread()
+
+
+def interleaved_runner(workers, n_steps):
+    return InterleavedRunner([
+        StateMachineRunner(1, i, n_steps) for i in hrange(workers)
+    ])
+
+
+def worker_steps(runner):
+    return [
+        [
+            step.strategy.reify(step.template) for step in worker.record
+            if step is not TOMBSTONE
+        ]
+        for worker in runner.runners
+    ]
+
+
+def test_interleaved_runs_replay_on_the_same_workers():
+    machine_class = interleaved(RecordsThreads, workers=3)
+    runner = interleaved_runner(3, 20)
+    schedules = []
+    for _ in hrange(2):
+        machine = machine_class()
+        runner.run(machine)
+        schedules.append(runner.schedule)
+        threads = machine.state_machine.threads
+        per_worker = [
+            set(threads[step] for step in steps)
+            for steps in worker_steps(runner)
+        ]
+        assert all(len(t) == 1 for t in per_worker)
+        assert len(set.union(*per_worker)) == 3
+        assert threading.current_thread() not in set.union(*per_worker)
+    first, replayed = schedules
+    assert [w for w, _ in first] == [w for w, _ in replayed]
+    for (_, waits), (_, replayed_waits) in zip(first, replayed):
+        assert all(x <= y for x, y in zip(waits, replayed_waits))
+
+
+def test_worker_programs_do_not_depend_on_the_interleaving():
+    runner = interleaved_runner(3, 20)
+    runner.run(interleaved(RecordsThreads, workers=3)())
+    for i, steps in enumerate(worker_steps(runner)):
+        alone = StateMachineRunner(1, i, 20)
+        alone.run(RecordsThreads())
+        assert steps == [
+            step.strategy.reify(step.template) for step in alone.record]
+
+
+class SlowSteps(GenericStateMachine):
+    fails_at = 4
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executed = 0
+        self.running = 0
+        self.most_running = 0
+
+    def steps(self):
+        return just(None)
+
+    def execute_step(self, step):
+        with self.lock:
+            self.executed += 1
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+            executed = self.executed
+        time.sleep(0.01)
+        with self.lock:
+            self.running -= 1
+        assert executed != self.fails_at
+
+
+class SlowPassingSteps(SlowSteps):
+    fails_at = None
+
+
+def test_workers_run_steps_at_the_same_time():
+    machine = interleaved(SlowSteps, workers=3)()
+    with raises(AssertionError):
+        interleaved_runner(3, 5).run(machine)
+    assert machine.state_machine.most_running > 1
+
+
+def test_failures_are_raised_once_every_worker_has_stopped():
+    machine = interleaved(SlowSteps, workers=3)()
+    runner = interleaved_runner(3, 5)
+    with raises(AssertionError):
+        runner.run(machine)
+    assert machine.state_machine.running == 0
+    assert machine.state_machine.executed < 15
+    assert len(runner.schedule) == machine.state_machine.executed
+
+
+def test_failing_interleavings_replay():
+    machine_class = interleaved(ThreadLocalCache, workers=3)
+    breaker = find_breaking_runner(machine_class)
+    for _ in hrange(20):
+        with raises(AssertionError):
+            breaker.run(machine_class())
+
+
+def test_schedule_survives_the_database_format():
+    strat = InterleavedSearchStrategy(2)
+    runner = interleaved_runner(2, 10)
+    runner.run(interleaved(RecordsThreads)())
+    loaded = strat.from_basic(strat.to_basic(runner))
+    assert loaded.schedule == runner.schedule
+    loaded.run(interleaved(RecordsThreads)())
+    assert worker_steps(loaded) == worker_steps(runner)
+    with raises(BadData):
+        InterleavedSearchStrategy(3).from_basic(strat.to_basic(runner))
+
+
+def test_simplifies_onto_fewer_workers():
+    runner = interleaved_runner(3, 5)
+    candidates = list(
+        InterleavedSearchStrategy(3).without_workers(Random(0), runner))
+    assert [
+        [worker.n_steps for worker in candidate.runners]
+        for candidate in candidates
+    ] == [[0, 5, 5], [5, 0, 5]]
+
+
+def test_simplifies_towards_workers_taking_turns():
+    strat = InterleavedSearchStrategy(2)
+    runner = interleaved_runner(2, 10)
+    assert list(strat.in_order(Random(0), runner)) == []
+    runner.run(interleaved(SlowPassingSteps)())
+    in_order = next(strat.in_order(Random(0), runner))
+    machine = interleaved(SlowPassingSteps)()
+    in_order.run(machine)
+    assert machine.state_machine.most_running == 1
+    assert list(strat.in_order(Random(0), in_order)) == []
@@ -0,0 +1,93 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+import os
+from itertools import islice
+
+import pytest
+import hypothesis.strategies as st
+from hypothesis.errors import NoExamples, InvalidArgument
+
+
+def test_streams_are_reproducible_from_a_seed():
+    s = st.lists(st.integers())
+    assert list(s.stream_examples(seed=1, n=250)) == \
+        list(s.stream_examples(seed=1, n=250))
+
+
+def test_stream_has_n_values():
+    assert len(list(st.integers().stream_examples(n=250, batch_size=7))) == \
+        250
+
+
+def test_stream_without_n_goes_on():
+    values = list(islice(st.booleans().stream_examples(batch_size=3), 1000))
+    assert len(values) == 1000
+
+
+def test_stream_values_come_from_the_strategy():
+    for x in st.integers(0, 10).map(str).stream_examples(n=100):
+        assert x in [str(i) for i in range(11)]
+
+
+def test_stream_skips_filtered_values():
+    for x in st.integers().filter(lambda x: x % 2).stream_examples(n=100):
+        assert x % 2
+
+
+@pytest.mark.parametrize(u'batch_size', [0, -1])
+def test_batch_size_must_be_positive(batch_size):
+    with pytest.raises(InvalidArgument):
+        st.integers().stream_examples(batch_size=batch_size)
+
+
+def test_stream_of_impossible_strategy_raises():
+    with pytest.raises(NoExamples):
+        next(st.integers().filter(lambda x: False).stream_examples())
+
+
+@pytest.mark.skipif(not hasattr(os, u'fork'), reason=u'Needs fork')
+def test_processes_give_the_same_values():
+    s = st.tuples(st.integers(), st.text())
+    assert list(s.stream_examples(seed=2, n=500, processes=2)) == \
+        list(s.stream_examples(seed=2, n=500))
+
+
+@pytest.mark.skipif(not hasattr(os, u'fork'), reason=u'Needs fork')
+def test_can_stop_reading_from_processes():
+    stream = st.integers().stream_examples(processes=2, batch_size=10)
+    assert len(list(islice(stream, 55))) == 55
+    stream.close()
+
+
+@pytest.mark.skipif(not hasattr(os, u'fork'), reason=u'Needs fork')
+def test_processes_draw_the_values():
+    parent = os.getpid()
+    pids = set(
+        st.integers().map(lambda x: os.getpid()).stream_examples(
+            n=100, batch_size=10, processes=2))
+    assert parent not in pids
+    assert 1 <= len(pids) <= 2
+
+
+@pytest.mark.skipif(not hasattr(os, u'fork'), reason=u'Needs fork')
+def test_errors_in_processes_are_raised_here():
+    stream = st.integers().filter(lambda x: False).stream_examples(
+        processes=2)
+    with pytest.raises(NoExamples):
+        next(stream)
@@ -23,13 +23,15 @@ from itertools import islice
 import pytest
 
 from hypothesis import find, given
+from hypothesis.types import STREAM_CHUNK_SIZE
 from hypothesis.errors import InvalidArgument
 from hypothesis.control import BuildContext
 from hypothesis.strategies import text, lists, floats, booleans, \
     integers, streaming
 from hypothesis.utils.show import show
 from hypothesis.internal.debug import minimal, some_template
-from hypothesis.searchstrategy.streams import Stream, StreamTemplate
+from hypothesis.searchstrategy.streams import Stream, StreamTemplate, \
+    StreamStrategy
 
 
 @given(lists(booleans()))
@@ -103,6 +105,46 @@ def test_can_replace_value():
     assert list(y[:3]) == [11, 2, 11]
 
 
+def test_replacing_values_does_not_change_the_original():
+    x = Stream(loop(0))
+    y = x.with_values([(1, 1), (40, 2)])
+    z = y.with_value(1, 3)
+    assert list(x[:41]) == [0] * 41
+    assert y[1] == 1 and y[40] == 2
+    assert z[1] == 3 and z[40] == 2
+    assert list(z[:3]) == [0, 3, 0]
+
+
+def test_replacing_values_shares_unchanged_chunks():
+    x = Stream(loop(0)).with_values([(1, 1), (100, 1)])
+    y = x.with_value(2, 2)
+    assert y.source is x.source
+    assert y.chunks[100 // STREAM_CHUNK_SIZE] is \
+        x.chunks[100 // STREAM_CHUNK_SIZE]
+    assert y.chunks[0] is not x.chunks[0]
+
+
+def test_replacing_a_value_only_evaluates_up_to_it():
+    x = Stream(loop(0))
+    y = x.with_value(5, 1)
+    assert y._thunked() == 6
+    assert x._thunked() == 0
+
+
+def test_can_replace_values_of_finite_stream():
+    x = Stream([1, 2, 3])
+    assert list(x.with_value(2, 4)) == [1, 2, 4]
+    with pytest.raises(IndexError):
+        x.with_value(3, 4)
+
+
+def test_long_chains_of_replacements_do_not_nest():
+    x = Stream(loop(0))
+    for i in range(5000):
+        x = x.with_value(i % 100, i)
+    assert x[99] == 4999
+
+
 def test_can_minimize():
     x = minimal(streaming(integers()), lambda x: x[10] >= 1)
     ts = list(x[:11])
@@ -180,3 +222,26 @@ def test_decreasing_streams():
         streaming(integers()), lambda x: all(
             x[i] >= n - i for i in range(n + 1)))
     assert list(x[:(n + 1)]) == list(range(n, -1, -1))
+
+
+def test_chunk_deletes_shift_simpler_values_down():
+    strat = StreamStrategy(booleans())
+    template = strat.draw_template(Random(0), strat.draw_parameter(Random(0)))
+    template = template.with_values(
+        [(0, True), (1, False), (2, False), (3, False)])
+    deletes = list(strat.stream_delete_chunks(Random(0), template))
+    assert deletes
+    for d in deletes:
+        assert strat.strictly_simpler(d, template)
+    assert list(deletes[0].stream[:2]) == [False, False]
+
+
+def test_chunk_deletes_round_trip_via_basic():
+    strat = StreamStrategy(booleans())
+    template = strat.draw_template(Random(0), strat.draw_parameter(Random(0)))
+    template = template.with_values(
+        [(0, True), (1, False), (2, False), (3, False)])
+    for d in strat.stream_delete_chunks(Random(0), template):
+        d.stream._thunk_to(10)
+        round_tripped = strat.from_basic(strat.to_basic(d))
+        assert list(round_tripped.stream[:10]) == list(d.stream[:10])
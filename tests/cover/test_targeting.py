@@ -0,0 +1,120 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+from random import Random
+
+import pytest
+import hypothesis.strategies as st
+from hypothesis import find, given, target, Settings
+from hypothesis.errors import InvalidArgument
+from hypothesis.control import BuildContext
+from tests.common.utils import capture_out
+from hypothesis.settings import Verbosity
+from hypothesis.reporting import default as default_reporter
+from hypothesis.reporting import with_reporter
+from hypothesis.internal.targeting import TargetScores, hill_climb
+from hypothesis.searchstrategy.numbers import nearby_integers
+
+
+def test_target_returns_its_score():
+    with BuildContext():
+        assert target(1.5) == 1.5
+
+
+def test_cannot_target_outside_a_build_context():
+    with pytest.raises(InvalidArgument):
+        target(1)
+
+
+@pytest.mark.parametrize(u'score', [u'1', None, True, float(u'nan')])
+def test_scores_must_be_numbers(score):
+    with BuildContext():
+        with pytest.raises(InvalidArgument):
+            target(score)
+
+
+def test_each_label_can_only_be_targeted_once():
+    with BuildContext():
+        target(1, label=u'a')
+        target(1, label=u'b')
+        with pytest.raises(InvalidArgument):
+            target(2, label=u'a')
+
+
+def test_targets_are_reset_between_examples():
+    @given(st.integers())
+    def test(x):
+        target(x)
+
+    test()
+
+
+def test_keeps_the_highest_score_for_each_label():
+    scores = TargetScores()
+    scores.record(1, {u'a': 1, u'b': 5})
+    scores.record(2, {u'a': 3, u'b': 4})
+    scores.record(3, {u'a': 2})
+    assert len(scores) == 2
+    assert scores.best[u'a'].template == 2
+    assert scores.best[u'b'].template == 1
+
+
+def test_hill_climb_stops_when_nothing_improves():
+    strat = st.integers(0, 0)
+    template = strat.draw_and_produce(Random(0))
+    scores = TargetScores()
+    scores.record(template, {u'': 0})
+    climbed = list(hill_climb(strat, Random(0), scores))
+    assert all(t == template for t in climbed)
+
+
+def test_nearby_integers_stay_in_bounds():
+    for x in nearby_integers(Random(0), 5, lower=0, upper=10):
+        assert 0 <= x <= 10 and x != 5
+
+
+def test_find_climbs_to_values_random_search_does_not_reach():
+    x = find(
+        st.integers(min_value=0), lambda x: target(x) >= 10 ** 10,
+        settings=Settings(database=None),
+    )
+    assert x == 10 ** 10
+
+
+def test_given_climbs_to_high_scores():
+    best = [0]
+
+    @given(st.integers(min_value=0), settings=Settings(database=None))
+    def test(x):
+        best[0] = max(best[0], target(x))
+
+    test()
+    assert best[0] >= 10 ** 10
+
+
+def test_reports_highest_scores_when_verbose():
+    @given(st.integers(0, 10), settings=Settings(
+        database=None, verbosity=Verbosity.verbose))
+    def test_scored(n):
+        target(n, label=u'n')
+
+    with capture_out() as o:
+        with with_reporter(default_reporter):
+            test_scored()
+    out = o.getvalue()
+    assert u'Highest target scores:\nn: 10 from test_scored(n=10)' in out
@@ -0,0 +1,61 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+import weakref
+from copy import copy, deepcopy
+
+import pytest
+
+from hypothesis.types import Stream
+from hypothesis.stateful import StateMachineRunner
+from hypothesis.extra.datetime import DateTimeTemplate
+from hypothesis.searchstrategy.basic import Generated, Simplified
+from hypothesis.searchstrategy.streams import StreamTemplate
+from hypothesis.searchstrategy.morphers import Morpher
+from hypothesis.searchstrategy.composite import CompositeTemplate
+from hypothesis.searchstrategy.collections import UniqueListTemplate
+
+TEMPLATES = [
+    Stream(iter(range(10))),
+    StreamTemplate(1, 2, iter(range(10))),
+    Morpher(1, 2),
+    UniqueListTemplate(3, 1, None, 2, None),
+    Generated(1, 2),
+    Simplified(1, 2, Generated(1, 2)),
+    CompositeTemplate(1, 2),
+    StateMachineRunner(1, 2, 3),
+    DateTimeTemplate(2000, 1, 1, 0, 0, 0, 0, None),
+]
+
+
+@pytest.mark.parametrize(
+    u'template', TEMPLATES, ids=[type(t).__name__ for t in TEMPLATES])
+def test_hot_templates_have_no_instance_dict(template):
+    assert not hasattr(template, u'__dict__')
+
+
+@pytest.mark.parametrize(
+    u'template', TEMPLATES, ids=[type(t).__name__ for t in TEMPLATES])
+def test_hot_templates_can_still_be_copied(template):
+    copy(template)
+    deepcopy(template)
+
+
+def test_basic_templates_support_weak_references():
+    template = Generated(1, 2)
+    assert weakref.ref(template)() is template
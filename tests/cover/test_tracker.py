@@ -18,7 +18,7 @@ from __future__ import division, print_function, absolute_import
 
 import pytest
 
-from hypothesis.internal.tracker import Tracker
+from hypothesis.internal.tracker import Tracker, OutcomeCache, value_key
 
 
 class Foo(object):
@@ -97,3 +97,40 @@ def test_includes_repr_in_marshal_error():
     with pytest.raises(ValueError) as e:
         Tracker().track(Hello())
     assert u'hello world' in e.value.args[0]
+
+
+def test_value_key_distinguishes_types():
+    assert value_key(1) != value_key(True)
+    assert value_key(1) != value_key(1.0)
+    assert value_key(0.0) != value_key(-0.0)
+    assert value_key((1,)) != value_key([1])
+
+
+def test_value_key_of_equal_values_is_equal():
+    assert value_key({u'a': [1, (2, 3)]}) == value_key({u'a': [1, (2, 3)]})
+
+
+def test_value_key_is_none_for_custom_objects():
+    assert value_key(Foo()) is None
+    assert value_key([1, Foo()]) is None
+
+
+def test_outcome_cache_counts_hits_and_misses():
+    cache = OutcomeCache()
+    key = cache.key([1, 2])
+    assert cache.lookup(key) is None
+    cache.record(key, True)
+    assert cache.lookup(key) is True
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert cache.hit_rate == 0.5
+    assert u'1 hits' in cache.describe_statistics()
+
+
+def test_outcome_cache_ignores_uncacheable_values():
+    cache = OutcomeCache()
+    key = cache.key(Foo())
+    cache.record(key, True)
+    assert cache.lookup(key) is None
+    assert len(cache) == 0
+    assert cache.hit_rate == 0.0
@@ -124,3 +124,24 @@ def test_includes_intermediate_results_in_verbose_mode():
     lines = o.getvalue().splitlines()
     assert len([l for l in lines if u'example' in l]) > 2
     assert len([l for l in lines if u'AssertionError' in l])
+
+
+def test_reports_outcome_cache_statistics_in_debug():
+    with capture_verbosity(Verbosity.debug) as o:
+        @fails
+        @given(lists(integers()), settings=Settings(database=None))
+        def test_foo(x):
+            assert not x
+        test_foo()
+    assert u'Outcome cache: ' in o.getvalue()
+
+
+def test_reports_simplifier_statistics():
+    with capture_verbosity(Verbosity.verbose) as o:
+        @fails
+        @given(lists(integers()), settings=Settings(database=None))
+        def test_foo(x):
+            assert sum(x) < 1000
+        test_foo()
+    assert u'Simplification passes:' in o.getvalue()
+    assert u' successful in ' in o.getvalue()
@@ -0,0 +1,289 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+import asyncio
+from unittest import TestCase
+
+import pytest
+from hypothesis import Settings, given, example
+from hypothesis.control import cleanup, current_build_context
+from hypothesis.stateful import Bundle, GenericStateMachine, \
+    RuleBasedStateMachine, rule, interleaved, InterleavedRunner, \
+    StateMachineRunner, run_state_machine_as_test
+from hypothesis.executors import EventLoopExecutor
+from hypothesis.strategies import just, lists, integers
+from tests.common.utils import capture_out
+
+
+def test_runs_coroutine_tests():
+    seen = []
+
+    @given(integers())
+    async def test(x):
+        await asyncio.sleep(0)
+        seen.append(x)
+
+    test()
+    assert seen
+
+
+def test_finds_and_shrinks_failures_in_coroutine_tests():
+    @given(integers())
+    async def test(x):
+        await asyncio.sleep(0)
+        assert x < 10
+
+    with capture_out() as o:
+        with pytest.raises(AssertionError):
+            test()
+    assert u'test(x=10)' in o.getvalue()
+
+
+def test_runs_generator_based_coroutines():
+    @given(integers())
+    @asyncio.coroutine
+    def test(x):
+        yield from asyncio.sleep(0)
+        assert x < 10
+
+    with capture_out() as o:
+        with pytest.raises(AssertionError):
+            test()
+    assert u'test(x=10)' in o.getvalue()
+
+
+def test_runs_explicit_examples_of_coroutine_tests():
+    seen = []
+
+    @example(x=1000)
+    @given(integers(), settings=Settings(max_examples=1))
+    async def test(x):
+        seen.append(x)
+
+    test()
+    assert seen[0] == 1000
+
+
+def test_all_examples_run_on_one_event_loop():
+    loops = set()
+
+    @given(lists(integers()))
+    async def test(xs):
+        loops.add(asyncio.get_event_loop())
+        assert sum(xs) < 100
+
+    with capture_out():
+        with pytest.raises(AssertionError):
+            test()
+    assert len(loops) == 1
+    assert not list(loops)[0].is_closed()
+
+
+class TestWithOwnLoop(TestCase):
+    event_loop = asyncio.new_event_loop()
+
+    @given(integers())
+    async def test_uses_event_loop(self, x):
+        assert asyncio.get_event_loop() is self.event_loop
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.event_loop.close()
+
+
+running = [0]
+most_running = [0]
+
+
+class TestConcurrentExamples(EventLoopExecutor, TestCase):
+    concurrency = 10
+
+    def setUp(self):
+        most_running[0] = 0
+
+    @given(integers(), settings=Settings(max_examples=50))
+    async def test_runs_examples_concurrently(self, x):
+        context = current_build_context()
+        running[0] += 1
+        most_running[0] = max(most_running[0], running[0])
+        try:
+            await asyncio.sleep(0.001)
+        finally:
+            running[0] -= 1
+        assert current_build_context() is context
+        assert most_running[0] > 1
+
+    def test_shrinks_concurrent_failures(self):
+        @given(lists(integers()))
+        async def test(self, xs):
+            await asyncio.sleep(0)
+            assert len(xs) < 3
+
+        with capture_out() as o:
+            with pytest.raises(AssertionError):
+                test(self)
+        assert u'xs=[0, 0, 0]' in o.getvalue()
+
+    def test_runs_cleanup_for_every_example(self):
+        started = []
+        finished = []
+
+        @given(integers(), settings=Settings(max_examples=50))
+        async def test(self, x):
+            started.append(x)
+            cleanup(lambda: finished.append(x))
+            await asyncio.sleep(0)
+
+        test(self)
+        assert started
+        assert sorted(started) == sorted(finished)
+
+    def test_can_run_plain_tests(self):
+        seen = []
+
+        @given(integers())
+        def test(self, x):
+            seen.append(x)
+
+        test(self)
+        assert seen
+
+
+class AsyncCounter(RuleBasedStateMachine):
+    counters = Bundle(u'counters')
+
+    @rule(target=counters, n=integers(0, 10))
+    async def counter(self, n):
+        await asyncio.sleep(0)
+        return [n]
+
+    @rule(c=counters)
+    async def increment(self, c):
+        await asyncio.sleep(0)
+        c[0] += 1
+        assert c[0] < 12
+
+
+def test_runs_coroutine_rules():
+    with capture_out():
+        with pytest.raises(AssertionError):
+            run_state_machine_as_test(AsyncCounter)
+
+
+class AsyncSteps(GenericStateMachine):
+
+    def __init__(self):
+        self.total = 0
+        self.torn_down = False
+
+    def steps(self):
+        return just(1)
+
+    async def execute_step(self, step):
+        await asyncio.sleep(0)
+        self.total += step
+
+    async def teardown(self):
+        await asyncio.sleep(0)
+        self.torn_down = True
+
+
+def test_runs_coroutine_steps_and_teardown():
+    machine = AsyncSteps()
+    run_state_machine_as_test(lambda: machine, Settings(max_examples=1))
+    assert machine.total > 0
+    assert machine.torn_down
+
+
+class RacyPool(RuleBasedStateMachine):
+
+    """A pool of one connection which checks it has a free connection before
+    doing a handshake and only then taking it."""
+
+    connections = Bundle(u'connections')
+
+    def __init__(self):
+        super(RacyPool, self).__init__()
+        self.free = 1
+
+    async def handshake(self):
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+    @rule(target=connections)
+    async def acquire(self):
+        if not self.free:
+            return None
+        await self.handshake()
+        self.free -= 1
+        assert self.free >= 0
+        return object()
+
+    @rule(connection=connections)
+    async def release(self, connection):
+        await asyncio.sleep(0)
+        if connection is not None:
+            self.free += 1
+
+
+def test_racy_pool_works_with_one_step_at_a_time():
+    run_state_machine_as_test(RacyPool, Settings(max_examples=50))
+
+
+def test_interleaved_tasks_find_race():
+    with capture_out() as o:
+        with pytest.raises(AssertionError):
+            run_state_machine_as_test(
+                interleaved(RacyPool, workers=2, use_tasks=True))
+    lines = [l for l in o.getvalue().splitlines() if u'Step #' in l]
+    assert lines == [
+        u'[worker 0] Step #1: v1 = acquire()',
+        u'[worker 1] Step #2: v2 = acquire()',
+    ]
+
+
+class Sleeper(GenericStateMachine):
+
+    def __init__(self):
+        self.running = 0
+        self.most_running = 0
+
+    def steps(self):
+        return just(None)
+
+    async def execute_step(self, step):
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        await asyncio.sleep(0.001)
+        self.running -= 1
+
+
+def test_steps_on_a_worker_run_one_at_a_time():
+    runner = InterleavedRunner([StateMachineRunner(1, i, 7) for i in range(3)])
+    machine = interleaved(Sleeper, workers=3, use_tasks=True)()
+    runner.run(machine)
+    assert 1 < machine.state_machine.most_running <= 3
+    assert machine.state_machine.running == 0
+
+
+def test_threads_run_coroutine_steps_on_loops_of_their_own():
+    runner = InterleavedRunner([StateMachineRunner(1, i, 7) for i in range(3)])
+    machine = interleaved(Sleeper, workers=3)()
+    runner.run(machine)
+    assert machine.state_machine.most_running >= 1
+    assert machine.state_machine.running == 0